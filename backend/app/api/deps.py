@@ -1,12 +1,15 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import BaseModel
 from sqlmodel import Session, select
-from app.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import engine, get_session
+from app.db.async_session import get_async_session
 from app.core import security
 from app.core.config import settings
+from app.core.principal import Principal, load_principal
 from app.models.user import User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -20,10 +23,18 @@ def get_db() -> Generator:
     # Just a wrapper for consistent naming in dependencies
     yield from get_session()
 
-def get_current_user(
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Use from `async def` endpoints so queries don't block the event loop
+    async for session in get_async_session():
+        yield session
+
+def get_current_principal(
     db: Session = Depends(get_db),
     token: str = Depends(reusable_oauth2)
-) -> User:
+) -> Principal:
+    return principal_from_token(db, token)
+
+def principal_from_token(db: Session, token: str) -> Principal:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -35,12 +46,32 @@ def get_current_user(
             detail="Could not validate credentials",
         )
     
-    user = db.get(User, token_data.sub)
-    if not user:
+    principal = load_principal(db, token_data.sub)
+    if not principal:
         raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+    if not principal.user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
+    return principal
+
+def get_websocket_principal(token: Optional[str]) -> Optional[Principal]:
+    # WebSockets can't send an Authorization header; the token comes as a
+    # query parameter. Uses a short-lived session rather than get_db, which
+    # would hold a connection for the socket's whole lifetime.
+    if not token:
+        return None
+    with Session(engine) as db:
+        try:
+            return principal_from_token(db, token)
+        except HTTPException:
+            return None
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal),
+) -> User:
+    # Attach a copy of the cached snapshot to this request's session without
+    # a SELECT, so relationships like patient_profile still lazy-load
+    return db.merge(principal.user, load=False)
 
 def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
@@ -0,0 +1,153 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+from sqlmodel import Session
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    Common query parameters for list endpoints. Use as `params: PageParams = Depends()`.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description=f"Opaque value from the {NEXT_CURSOR_HEADER} header"),
+        sort: Optional[str] = Query(None, description="Sort key, defaults per endpoint"),
+        order: str = Query("desc", pattern="^(asc|desc)$"),
+        patient_id: Optional[int] = None,
+        date_from: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+        date_to: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+        status: Optional[str] = None,
+        unpaginated: bool = Query(False, description="Return every matching row (legacy behaviour)"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.order = order
+        self.patient_id = patient_id
+        self.date_from = date_from
+        self.date_to = date_to
+        self.status = status
+        self.unpaginated = unpaginated
+
+
+@dataclass
+class ListSpec:
+    """
+    Describes how a model is sorted and filtered by PageParams.
+
+    `sort_fields` maps public sort keys to column attributes; `id_field` is
+    the unique tie-breaker appended to every keyset.
+    """
+    sort_fields: Dict[str, Any]
+    default_sort: str
+    id_field: Any
+    date_field: Optional[Any] = None
+    patient_field: Optional[Any] = None
+    status_field: Optional[Any] = None
+
+
+def encode_cursor(sort: str, order: str, value: Any, row_id: int) -> str:
+    if isinstance(value, datetime):
+        encoded = {"t": "dt", "v": value.isoformat()}
+    elif isinstance(value, date):
+        encoded = {"t": "d", "v": value.isoformat()}
+    else:
+        encoded = {"t": "raw", "v": value}
+    payload = json.dumps({"s": sort, "o": order, "k": encoded, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = payload["k"]
+        if key["t"] == "dt":
+            value = datetime.fromisoformat(key["v"])
+        elif key["t"] == "d":
+            value = date.fromisoformat(key["v"])
+        else:
+            value = key["v"]
+        return payload["s"], payload["o"], value, int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_filters(statement, spec: ListSpec, params: PageParams):
+    """
+    Apply the patient/date/status filters that the model supports.
+    Dates are half-open, [date_from, date_to), so they stay index friendly.
+    """
+    if params.patient_id is not None and spec.patient_field is not None:
+        statement = statement.where(spec.patient_field == params.patient_id)
+    if spec.date_field is not None:
+        if params.date_from is not None:
+            statement = statement.where(spec.date_field >= params.date_from)
+        if params.date_to is not None:
+            statement = statement.where(spec.date_field < params.date_to)
+    if params.status is not None and spec.status_field is not None:
+        statement = statement.where(spec.status_field == params.status)
+    return statement
+
+
+def paginate(
+    db: Session,
+    statement,
+    spec: ListSpec,
+    params: PageParams,
+    response: Optional[Response] = None,
+) -> List[Any]:
+    """
+    Run `statement` one keyset page at a time.
+
+    Fetches limit + 1 rows to find out whether another page exists and, if
+    so, sets the X-Next-Cursor response header. The body stays a plain list.
+    """
+    sort = params.sort or spec.default_sort
+    if sort not in spec.sort_fields:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort key, expected one of: {', '.join(sorted(spec.sort_fields))}",
+        )
+    column = spec.sort_fields[sort]
+    descending = params.order == "desc"
+
+    statement = apply_filters(statement, spec, params)
+
+    if params.cursor and not params.unpaginated:
+        cursor_sort, cursor_order, value, last_id = decode_cursor(params.cursor)
+        if (cursor_sort, cursor_order) != (sort, params.order):
+            raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+        if descending:
+            statement = statement.where(or_(column < value, and_(column == value, spec.id_field < last_id)))
+        else:
+            statement = statement.where(or_(column > value, and_(column == value, spec.id_field > last_id)))
+
+    if descending:
+        statement = statement.order_by(column.desc(), spec.id_field.desc())
+    else:
+        statement = statement.order_by(column.asc(), spec.id_field.asc())
+
+    if params.unpaginated:
+        return db.exec(statement).all()
+
+    rows = db.exec(statement.limit(params.limit + 1)).all()
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        last = rows[-1]
+        if response is not None:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                sort, params.order, getattr(last, column.key), getattr(last, spec.id_field.key)
+            )
+    return rows
@@ -1,9 +1,16 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
+from app.db import availability
+from app.models.schedule import DoctorSchedule
 from app.models.user import User, UserRole, Doctor, Patient
 from app.models.appointment import Appointment, AppointmentStatus, AppointmentType
 from app.schemas import AppointmentCreate, Appointment as AppointmentSchema, AppointmentUpdate
@@ -11,71 +18,119 @@ from app.core.websockets import manager
 
 router = APIRouter()
 
+SLOT_TAKEN = "This time slot is already booked"
+
+APPOINTMENTS_LIST = ListSpec(
+    sort_fields={"appointment_time": Appointment.appointment_time, "created_at": Appointment.created_at, "id": Appointment.id},
+    default_sort="appointment_time",
+    id_field=Appointment.id,
+    date_field=Appointment.appointment_time,
+    patient_field=Appointment.patient_id,
+    status_field=Appointment.status,
+)
+
 @router.post("/", response_model=AppointmentSchema)
 async def create_appointment(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     appointment_in: AppointmentCreate,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Create new appointment. Only Patients can generally create requests, 
     but for simplicity/flexibility we allow logged in users. 
     Ideally verify current_user.role == PATIENT.
     """
-    if current_user.role != UserRole.PATIENT:
+    if principal.role != UserRole.PATIENT:
          raise HTTPException(status_code=400, detail="Only patients can book appointments")
          
     # Verify doctor exists
-    doctor = db.get(Doctor, appointment_in.doctor_id)
+    doctor = await db.get(Doctor, appointment_in.doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
         
-    # Get patient profile
-    patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-    if not patient:
+    if not principal.patient_id:
          raise HTTPException(status_code=404, detail="Patient profile not found")
 
+    schedules = (await db.exec(
+        select(DoctorSchedule).where(DoctorSchedule.doctor_id == appointment_in.doctor_id)
+    )).all()
+    slot = availability.resolve_slot(schedules, appointment_in.appointment_time)
+    taken = slot is not None and (await db.exec(availability.conflicts(appointment_in.doctor_id, slot))).first()
+    if slot is None or taken:
+        # End the read transaction here rather than in the session teardown
+        await db.rollback()
+    if slot is None:
+        raise HTTPException(status_code=400, detail="The doctor is not available at this time")
+    if taken:
+        raise HTTPException(status_code=409, detail=SLOT_TAKEN)
+
     appointment = Appointment(
         doctor_id=appointment_in.doctor_id,
-        patient_id=patient.id,
+        patient_id=principal.patient_id,
         appointment_time=appointment_in.appointment_time,
         type=appointment_in.type,
         communication_preference=appointment_in.communication_preference,
         reason=appointment_in.reason,
         notes=appointment_in.notes,
-        status=AppointmentStatus.PENDING
+        status=AppointmentStatus.PENDING,
+        slot_start=slot[0],
+        slot_end=slot[1],
     )
     db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost the race for the slot to a concurrent booking
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=SLOT_TAKEN)
+
+    # Response includes doctor/patient info; lazy loads are not allowed on
+    # an AsyncSession so load them up front
+    appointment = (await db.exec(
+        select(Appointment)
+        .where(Appointment.id == appointment.id)
+        .options(
+            selectinload(Appointment.doctor).selectinload(Doctor.user),
+            selectinload(Appointment.patient).selectinload(Patient.user),
+        )
+        .execution_options(populate_existing=True)
+    )).one()
     
-    # Broadcast notification
-    await manager.global_broadcast(f"New appointment booked by patient ID {patient.id}")
+    # Notify the doctor and the front desk
+    event = {
+        "appointment_id": appointment.id,
+        "patient_id": principal.patient_id,
+        "doctor_id": appointment.doctor_id,
+        "appointment_time": appointment.appointment_time,
+        "message": f"New appointment booked by patient ID {principal.patient_id}",
+    }
+    await manager.notify_user(doctor.user_id, "appointment.created", event)
+    await manager.notify_role(UserRole.RECEPTIONIST, "appointment.created", event)
     
     return appointment
 
 @router.get("/my-appointments", response_model=List[AppointmentSchema])
 def read_appointments(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get appointments for current user (Doctor or Patient).
     """
-    if current_user.role == UserRole.DOCTOR:
-        doctor = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-        if not doctor: return []
-        statement = select(Appointment).where(Appointment.doctor_id == doctor.id)
-    elif current_user.role == UserRole.PATIENT:
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient: return []
-        statement = select(Appointment).where(Appointment.patient_id == patient.id)
+    if principal.role == UserRole.DOCTOR:
+        if not principal.doctor_id: return []
+        statement = select(Appointment).where(Appointment.doctor_id == principal.doctor_id)
+    elif principal.role == UserRole.PATIENT:
+        if not principal.patient_id: return []
+        statement = select(Appointment).where(Appointment.patient_id == principal.patient_id)
     else:
         # Admin sees all?
         statement = select(Appointment)
         
-    return db.exec(statement).all()
+    return paginate(db, statement, APPOINTMENTS_LIST, params, response)
 
 @router.put("/{appointment_id}", response_model=AppointmentSchema)
 def update_appointment(
@@ -97,6 +152,16 @@ def update_appointment(
     
     # Update logic
     if appointment_in.status:
+        if appointment_in.status == AppointmentStatus.CANCELLED:
+            # Free the slot for someone else
+            appointment.slot_start = appointment.slot_end = None
+        elif appointment.status == AppointmentStatus.CANCELLED:
+            # Reinstated: the slot has to be claimed again
+            schedules = db.exec(select(DoctorSchedule).where(DoctorSchedule.doctor_id == appointment.doctor_id)).all()
+            slot = availability.resolve_slot(schedules, appointment.appointment_time)
+            if slot and db.exec(availability.conflicts(appointment.doctor_id, slot, exclude_id=appointment.id)).first():
+                raise HTTPException(status_code=409, detail=SLOT_TAKEN)
+            appointment.slot_start, appointment.slot_end = slot or (None, None)
         appointment.status = appointment_in.status
     if appointment_in.meeting_link:
         # Only doctor should set this ideally
@@ -105,10 +170,11 @@ def update_appointment(
         appointment.notes = appointment_in.notes
     
     db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
-    db.add(appointment)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=SLOT_TAKEN)
     db.refresh(appointment)
     return appointment
 
@@ -117,7 +183,7 @@ def read_appointment(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get appointment by ID.
@@ -127,13 +193,13 @@ def read_appointment(
         raise HTTPException(status_code=404, detail="Appointment not found")
     
     # Permission check
-    if current_user.role == UserRole.DOCTOR:
+    if principal.role == UserRole.DOCTOR:
          # Simplified check or use doctor_profile
-         if current_user.doctor_profile and appointment.doctor_id != current_user.doctor_profile.id:
+         if principal.doctor_id and appointment.doctor_id != principal.doctor_id:
              # Fallback if relationship not loaded or mismatch
              pass 
-    elif current_user.role == UserRole.PATIENT:
-         if current_user.patient_profile and appointment.patient_id != current_user.patient_profile.id:
+    elif principal.role == UserRole.PATIENT:
+         if principal.patient_id and appointment.patient_id != principal.patient_id:
              raise HTTPException(status_code=403, detail="Not authorized")
              
     return appointment 
@@ -1,14 +1,23 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
 from datetime import datetime
 
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
 from app.models.user import User, UserRole
 from app.models.attendance import AttendanceLog
 
 router = APIRouter()
 
+ATTENDANCE_LIST = ListSpec(
+    sort_fields={"check_in_time": AttendanceLog.check_in_time, "id": AttendanceLog.id},
+    default_sort="check_in_time",
+    id_field=AttendanceLog.id,
+    date_field=AttendanceLog.check_in_time,
+    status_field=AttendanceLog.status,
+)
+
 @router.post("/check-in", response_model=AttendanceLog)
 def check_in(
     *,
@@ -61,7 +70,10 @@ def check_out(
 
 @router.get("/my-history", response_model=List[AttendanceLog])
 def read_attendance_history(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    return db.exec(select(AttendanceLog).where(AttendanceLog.user_id == current_user.id)).all()
+    statement = select(AttendanceLog).where(AttendanceLog.user_id == current_user.id)
+    return paginate(db, statement, ATTENDANCE_LIST, params, response)
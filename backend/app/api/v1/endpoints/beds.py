@@ -1,20 +1,32 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
 from app.models.user import User, UserRole
 from app.models.bed import Bed, BedStatus
 from app.models.user import Patient as PatientModel # Renamed to avoid name clash if needed, but simple import is fine
 
 router = APIRouter()
 
+BEDS_LIST = ListSpec(
+    sort_fields={"id": Bed.id, "ward_name": Bed.ward_name, "updated_at": Bed.updated_at},
+    default_sort="id",
+    id_field=Bed.id,
+    date_field=Bed.updated_at,
+    patient_field=Bed.patient_id,
+    status_field=Bed.status,
+)
+
 @router.get("/", response_model=List[Bed])
 def get_beds(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     # Any authenticated staff should see beds
-    return db.exec(select(Bed)).all()
+    return paginate(db, select(Bed), BEDS_LIST, params, response)
 
 @router.post("/", response_model=Bed)
 def create_bed(
@@ -1,43 +1,113 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 from datetime import datetime, timedelta
-import random
 
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
+from app.db.ledger import InsufficientFunds, credit, debit, ensure_wallet, from_minor, to_minor
+from app.db.retry import run_with_retry
+from app.db.revenue import RollupBatch
+from app.db.sequences import invoice_numbers
 from app.models.user import User, UserRole, Patient
 from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
-from app.models.wallet import Wallet
+from app.models.wallet import Wallet, WalletEntry
 from app.models.transaction import Transaction, TransactionType, PaymentMethod, TransactionStatus
-from app.schemas.finance import InvoiceCreate, Invoice as InvoiceSchema, Wallet as WalletSchema, WalletTopup, Transaction as TransactionSchema
+from app.schemas.finance import InvoiceCreate, Invoice as InvoiceSchema, Wallet as WalletSchema, WalletEntry as WalletEntrySchema, WalletTopup, Transaction as TransactionSchema
 
 router = APIRouter()
 
+INVOICES_LIST = ListSpec(
+    sort_fields={"created_at": Invoice.created_at, "due_date": Invoice.due_date, "id": Invoice.id},
+    default_sort="created_at",
+    id_field=Invoice.id,
+    date_field=Invoice.created_at,
+    patient_field=Invoice.patient_id,
+    status_field=Invoice.status,
+)
+
 @router.get("/invoices/my", response_model=List[InvoiceSchema])
 def get_my_invoices(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
-    if current_user.role != UserRole.PATIENT:
+    if principal.role != UserRole.PATIENT:
         # For staff, we might want to return all or filter by search, 
         # but for this specific "my" endpoint, we return based on current patient
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-    if not patient:
+    if not principal.patient_id:
         return []
         
-    return db.exec(select(Invoice).where(Invoice.patient_id == patient.id)).all()
+    return db.exec(select(Invoice).where(Invoice.patient_id == principal.patient_id)).all()
 
 @router.get("/invoices", response_model=List[InvoiceSchema])
 def get_all_invoices(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     if current_user.role == UserRole.PATIENT:
          raise HTTPException(status_code=403, detail="Use /my endpoint")
     
-    return db.exec(select(Invoice)).all()
+    return paginate(db, select(Invoice), INVOICES_LIST, params, response)
+
+# Largest end-of-day billing run accepted by POST /invoices/batch
+MAX_INVOICE_BATCH = 500
+
+def _create_invoices(db: Session, invoices_in: List[InvoiceCreate]) -> List[InvoiceSchema]:
+    """
+    Insert the invoices, then all of their items, as two multi-row INSERTs
+    in one transaction. RETURNING gives back everything the response needs,
+    so nothing is re-read after the commit.
+    """
+    numbers = invoice_numbers(db, datetime.now().year, len(invoices_in))
+    created_at = datetime.utcnow()
+    invoice_rows = [
+        {
+            "invoice_number": number,
+            "patient_id": invoice_in.patient_id,
+            "doctor_id": invoice_in.doctor_id,
+            "amount": invoice_in.amount,
+            "status": InvoiceStatus.PENDING,
+            "due_date": invoice_in.due_date,
+            "created_at": created_at,
+        }
+        for invoice_in, number in zip(invoices_in, numbers)
+    ]
+    # Multi-row RETURNING order isn't guaranteed; match on the unique number
+    ids = dict(db.execute(insert(Invoice).returning(Invoice.invoice_number, Invoice.id), invoice_rows).all())
+
+    item_rows = [
+        {"invoice_id": ids[number], "description": item_in.description, "amount": item_in.amount}
+        for invoice_in, number in zip(invoices_in, numbers)
+        for item_in in invoice_in.items
+    ]
+    items: Dict[int, List[Dict[str, Any]]] = {invoice_id: [] for invoice_id in ids.values()}
+    if item_rows:
+        returned = db.execute(
+            insert(InvoiceItem).returning(
+                InvoiceItem.id, InvoiceItem.invoice_id, InvoiceItem.description, InvoiceItem.amount
+            ),
+            item_rows,
+        )
+        for row in sorted(returned.mappings(), key=lambda row: row["id"]):
+            items[row["invoice_id"]].append(dict(row))
+
+    rollups = RollupBatch()
+    for row in invoice_rows:
+        rollups.invoice_created(created_at, row["due_date"], to_minor(row["amount"]), row["doctor_id"])
+    rollups.apply(db.connection())
+    db.commit()
+
+    return [
+        InvoiceSchema(id=ids[row["invoice_number"]], items=items[ids[row["invoice_number"]]], **row)
+        for row in invoice_rows
+    ]
 
 @router.post("/invoices", response_model=InvoiceSchema)
 def create_invoice(
@@ -46,82 +116,99 @@ def create_invoice(
     invoice_in: InvoiceCreate,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    # Generate unique invoice number
-    inv_num = f"INV-{datetime.now().year}-{random.randint(1000, 9999)}"
-    
-    invoice = Invoice(
-        invoice_number=inv_num,
-        patient_id=invoice_in.patient_id,
-        amount=invoice_in.amount,
-        due_date=invoice_in.due_date,
-        status=InvoiceStatus.PENDING
-    )
-    db.add(invoice)
-    db.commit()
-    db.refresh(invoice)
-    
-    for item_in in invoice_in.items:
-        item = InvoiceItem(
-            invoice_id=invoice.id,
-            description=item_in.description,
-            amount=item_in.amount
-        )
-        db.add(item)
-    
-    db.commit()
-    db.refresh(invoice)
-    return invoice
+    return _create_invoices(db, [invoice_in])[0]
+
+@router.post("/invoices/batch", response_model=List[InvoiceSchema])
+def create_invoices_batch(
+    *,
+    db: Session = Depends(deps.get_db),
+    invoices_in: List[InvoiceCreate],
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Create many invoices at once (e.g. end-of-day ward billing). All or nothing.
+    """
+    if principal.role == UserRole.PATIENT:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not invoices_in:
+        return []
+    if len(invoices_in) > MAX_INVOICE_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_INVOICE_BATCH} invoices per batch")
+    return _create_invoices(db, invoices_in)
+
+WALLET_ENTRIES_LIST = ListSpec(
+    sort_fields={"id": WalletEntry.id},
+    default_sort="id",
+    id_field=WalletEntry.id,
+    date_field=WalletEntry.created_at,
+)
 
 @router.get("/wallet", response_model=WalletSchema)
 def get_my_wallet(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
-    patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-    if not patient:
+    if not principal.patient_id:
         raise HTTPException(status_code=404, detail="Patient profile not found")
         
-    wallet = db.exec(select(Wallet).where(Wallet.patient_id == patient.id)).first()
+    wallet = db.exec(select(Wallet).where(Wallet.patient_id == principal.patient_id)).first()
     if not wallet:
         # Create wallet if not exists
-        wallet = Wallet(patient_id=patient.id, balance=0.0)
-        db.add(wallet)
+        ensure_wallet(db, principal.patient_id)
         db.commit()
-        db.refresh(wallet)
+        wallet = db.exec(select(Wallet).where(Wallet.patient_id == principal.patient_id)).one()
     
     return wallet
 
+@router.get("/wallet/entries", response_model=List[WalletEntrySchema])
+def get_my_wallet_entries(
+    response: Response,
+    params: PageParams = Depends(),
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    The wallet ledger, newest first by default.
+    """
+    if not principal.patient_id:
+        return []
+    statement = select(WalletEntry).where(WalletEntry.patient_id == principal.patient_id)
+    return paginate(db, statement, WALLET_ENTRIES_LIST, params, response)
+
 @router.post("/wallet/topup", response_model=TransactionSchema)
 def topup_wallet(
     *,
     db: Session = Depends(deps.get_db),
     topup_in: WalletTopup,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
-    patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-    if not patient:
+    if not principal.patient_id:
         raise HTTPException(status_code=404, detail="Patient profile not found")
-        
-    wallet = db.exec(select(Wallet).where(Wallet.patient_id == patient.id)).first()
-    if not wallet:
-        wallet = Wallet(patient_id=patient.id, balance=0.0)
-        db.add(wallet)
-    
-    wallet.balance += topup_in.amount
-    wallet.updated_at = datetime.utcnow()
-    
-    transaction = Transaction(
-        patient_id=patient.id,
-        amount=topup_in.amount,
-        type=TransactionType.TOPUP,
-        payment_method=topup_in.payment_method,
-        reference=topup_in.reference,
-        status=TransactionStatus.COMPLETED
-    )
-    
-    db.add(wallet)
-    db.add(transaction)
-    db.commit()
+    amount_minor = to_minor(topup_in.amount)
+    if amount_minor <= 0:
+        raise HTTPException(status_code=400, detail="Top-up amount must be positive")
+
+    def record_topup() -> Transaction:
+        transaction = Transaction(
+            patient_id=principal.patient_id,
+            amount=from_minor(amount_minor),
+            type=TransactionType.TOPUP,
+            payment_method=topup_in.payment_method,
+            reference=topup_in.reference,
+            status=TransactionStatus.COMPLETED
+        )
+        db.add(transaction)
+        db.flush()
+        credit(db, principal.patient_id, amount_minor, TransactionType.TOPUP.value, transaction.id)
+        rollups = RollupBatch()
+        rollups.transaction_recorded(transaction.created_at, TransactionType.TOPUP, topup_in.payment_method, amount_minor)
+        rollups.apply(db.connection())
+        return transaction
+
+    try:
+        transaction = run_with_retry(db, record_topup)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="A transaction with this reference already exists")
     db.refresh(transaction)
     return transaction
 
@@ -131,7 +218,7 @@ def pay_invoice(
     db: Session = Depends(deps.get_db),
     invoice_id: int,
     payment_method: PaymentMethod,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     invoice = db.get(Invoice, invoice_id)
     if not invoice:
@@ -140,45 +227,63 @@ def pay_invoice(
     if invoice.status == InvoiceStatus.PAID:
         raise HTTPException(status_code=400, detail="Invoice already paid")
 
-    if current_user.role == UserRole.PATIENT:
+    if principal.role == UserRole.PATIENT:
         # Verify ownership
-        current_patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not current_patient or invoice.patient_id != current_patient.id:
+        if not principal.patient_id or invoice.patient_id != principal.patient_id:
             raise HTTPException(status_code=403, detail="Not authorized to pay this invoice")
-        
-    patient = db.get(Patient, invoice.patient_id)
-    
-    if payment_method == PaymentMethod.WALLET:
-        wallet = db.exec(select(Wallet).where(Wallet.patient_id == patient.id)).first()
-        if not wallet or wallet.balance < invoice.amount:
-            raise HTTPException(status_code=400, detail="Insufficient wallet balance")
-        wallet.balance -= invoice.amount
-        wallet.updated_at = datetime.utcnow()
-        db.add(wallet)
-    
-    invoice.status = InvoiceStatus.PAID
-    
-    transaction = Transaction(
-        patient_id=patient.id,
-        invoice_id=invoice.id,
-        amount=invoice.amount,
-        type=TransactionType.PAYMENT,
-        payment_method=payment_method,
-        reference=f"PAY-{invoice.invoice_number}-{random.randint(100, 999)}",
-        status=TransactionStatus.COMPLETED
-    )
-    
-    db.add(invoice)
-    db.add(transaction)
-    db.commit()
+
+    patient_id, invoice_number = invoice.patient_id, invoice.invoice_number
+    doctor_id, due_date, seen_status = invoice.doctor_id, invoice.due_date, invoice.status
+    amount_minor = to_minor(invoice.amount)
+    invoices = Invoice.__table__
+
+    def record_payment() -> None:
+        # Claim the invoice first: of two concurrent payments only one matches.
+        # Matching the status we saw also tells the rollups where it moves from.
+        status = seen_status
+        while not db.execute(
+            update(invoices)
+            .where(invoices.c.id == invoice_id, invoices.c.status == status)
+            .values(status=InvoiceStatus.PAID)
+        ).rowcount:
+            status = db.execute(select(invoices.c.status).where(invoices.c.id == invoice_id)).scalar_one()
+            if status == InvoiceStatus.PAID:
+                raise HTTPException(status_code=400, detail="Invoice already paid")
+        # The claim serialises payments of this invoice, so the count is stable
+        previous = db.exec(
+            select(func.count(Transaction.id)).where(
+                Transaction.invoice_id == invoice_id, Transaction.type == TransactionType.PAYMENT
+            )
+        ).one()
+        transaction = Transaction(
+            patient_id=patient_id,
+            invoice_id=invoice_id,
+            amount=from_minor(amount_minor),
+            type=TransactionType.PAYMENT,
+            payment_method=payment_method,
+            reference=f"PAY-{invoice_number}-{previous + 1}",
+            status=TransactionStatus.COMPLETED
+        )
+        db.add(transaction)
+        db.flush()
+        if payment_method == PaymentMethod.WALLET and amount_minor > 0:
+            try:
+                debit(db, patient_id, amount_minor, TransactionType.PAYMENT.value, transaction.id)
+            except InsufficientFunds:
+                raise HTTPException(status_code=400, detail="Insufficient wallet balance")
+        rollups = RollupBatch()
+        rollups.invoice_status_changed(due_date, amount_minor, status, InvoiceStatus.PAID)
+        rollups.transaction_recorded(transaction.created_at, TransactionType.PAYMENT, payment_method, amount_minor, doctor_id)
+        rollups.apply(db.connection())
+
+    run_with_retry(db, record_payment)
     db.refresh(invoice)
     return invoice
 
 @router.get("/transactions/my", response_model=List[TransactionSchema])
 def get_my_transactions(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
-    patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-    if not patient: return []
-    return db.exec(select(Transaction).where(Transaction.patient_id == patient.id).order_by(Transaction.created_at.desc())).all()
+    if not principal.patient_id: return []
+    return db.exec(select(Transaction).where(Transaction.patient_id == principal.patient_id).order_by(Transaction.created_at.desc())).all()
@@ -0,0 +1,260 @@
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.api import deps
+from app.core.principal import Principal
+from app.db import revenue
+from app.db.ledger import from_minor
+from app.models.stats import RevenueRollup
+from app.models.transaction import TransactionType
+from app.models.user import Doctor, User, UserRole
+
+router = APIRouter()
+
+FINANCE_ROLES = (UserRole.ADMIN, UserRole.ACCOUNTANT)
+DEFAULT_PERIOD_DAYS = 30
+
+# Report column for each rollup metric
+COLUMNS = {
+    revenue.INVOICED: "invoiced",
+    TransactionType.PAYMENT.value: "collected",
+    TransactionType.TOPUP.value: "topups",
+    TransactionType.REFUND.value: "refunds",
+}
+
+# (label, first and last day overdue; None for open-ended)
+AGING_BUCKETS: List[Tuple[str, int, Optional[int]]] = [
+    ("1-30", 1, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+]
+
+
+def _require_finance(principal: Principal) -> None:
+    if principal.role not in FINANCE_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+
+def _period(date_from: Optional[date], date_to: Optional[date]) -> Tuple[date, date]:
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    return date_from, date_to
+
+
+def _sums(db: Session, dimension: str, date_from: date, date_to: date, group_by):
+    """
+    (metric, <group_by>, count, amount_minor) for the period, summed over days.
+    """
+    return db.exec(
+        select(
+            RevenueRollup.metric, group_by, func.sum(RevenueRollup.count), func.sum(RevenueRollup.amount_minor)
+        )
+        .where(
+            RevenueRollup.dimension == dimension,
+            RevenueRollup.metric.in_(COLUMNS),
+            RevenueRollup.day >= revenue.day_key(date_from),
+            RevenueRollup.day <= revenue.day_key(date_to),
+        )
+        .group_by(RevenueRollup.metric, group_by)
+    ).all()
+
+
+def _figures() -> Dict[str, Any]:
+    figures: Dict[str, Any] = {}
+    for column in COLUMNS.values():
+        figures[column] = 0
+        figures[f"{column}_count"] = 0
+    return figures
+
+
+def _add(figures: Dict[str, Any], metric: str, count: int, amount_minor: int) -> None:
+    column = COLUMNS[metric]
+    figures[column] += amount_minor
+    figures[f"{column}_count"] += count
+
+
+def _in_naira(figures: Dict[str, Any]) -> Dict[str, Any]:
+    for column in COLUMNS.values():
+        figures[column] = from_minor(figures[column])
+    return figures
+
+
+def _doctor_labels(db: Session, buckets) -> Dict[str, Tuple[str, str]]:
+    """
+    bucket -> (doctor name, department) for the doctors in `buckets`.
+    """
+    ids = [int(bucket) for bucket in buckets if bucket]
+    labels = {"": ("Unassigned", "Unassigned")}
+    if ids:
+        rows = db.exec(
+            select(Doctor.id, User.full_name, Doctor.department, Doctor.specialization)
+            .join(User, User.id == Doctor.user_id)
+            .where(Doctor.id.in_(ids))
+        ).all()
+        for doctor_id, name, department, specialization in rows:
+            labels[str(doctor_id)] = (name, department or specialization)
+    return labels
+
+
+@router.get("/revenue")
+def get_revenue_report(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    group_by: str = Query("day", pattern="^(day|payment_method|doctor|department)$"),
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Invoiced, collected, top-up and refund totals for a period (inclusive,
+    default the last 30 days), broken down by day, payment method, doctor
+    or department. Answered from the daily rollups.
+    """
+    _require_finance(principal)
+    date_from, date_to = _period(date_from, date_to)
+
+    totals = _figures()
+    for metric, _, count, amount in _sums(db, revenue.ALL, date_from, date_to, RevenueRollup.dimension):
+        _add(totals, metric, count, amount)
+
+    dimension = {
+        "day": revenue.ALL,
+        "payment_method": revenue.PAYMENT_METHOD,
+        "doctor": revenue.DOCTOR,
+        "department": revenue.DOCTOR,
+    }[group_by]
+    group_column = RevenueRollup.day if group_by == "day" else RevenueRollup.bucket
+    sums = _sums(db, dimension, date_from, date_to, group_column)
+
+    labels = _doctor_labels(db, {key for _, key, _, _ in sums}) if dimension == revenue.DOCTOR else {}
+    rows: Dict[str, Dict[str, Any]] = {}
+    for metric, key, count, amount in sums:
+        if group_by == "doctor":
+            row = rows.setdefault(key, {"doctor_id": int(key) if key else None, "doctor": labels.get(key, (key, ""))[0], **_figures()})
+        elif group_by == "department":
+            department = labels.get(key, ("", "Unassigned"))[1]
+            row = rows.setdefault(department, {"department": department, **_figures()})
+        else:
+            row = rows.setdefault(key, {group_by: key, **_figures()})
+        _add(row, metric, count, amount)
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "group_by": group_by,
+        "totals": _in_naira(totals),
+        "rows": [_in_naira(rows[key]) for key in sorted(rows)],
+    }
+
+
+@router.get("/aging")
+def get_aging_report(
+    as_of: Optional[date] = None,
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Unpaid invoices (pending, overdue, partial) by how long past due they
+    are on `as_of` (default today), with totals per status.
+    """
+    _require_finance(principal)
+    as_of = as_of or date.today()
+    rows = db.exec(
+        select(
+            RevenueRollup.day, RevenueRollup.bucket, func.sum(RevenueRollup.count), func.sum(RevenueRollup.amount_minor)
+        )
+        .where(
+            RevenueRollup.metric == revenue.DUE,
+            RevenueRollup.dimension == revenue.STATUS,
+            RevenueRollup.bucket.in_(revenue.OPEN_STATUSES),
+        )
+        .group_by(RevenueRollup.day, RevenueRollup.bucket)
+    ).all()
+
+    labels = ["current"] + [label for label, _, _ in AGING_BUCKETS]
+    buckets = {label: [0, 0] for label in labels}
+    statuses = {status: [0, 0] for status in revenue.OPEN_STATUSES}
+    for day, status, count, amount in rows:
+        overdue = (as_of - date.fromisoformat(day)).days
+        label = "current"
+        for name, first, last in AGING_BUCKETS:
+            if overdue >= first and (last is None or overdue <= last):
+                label = name
+        for target in (buckets[label], statuses[status]):
+            target[0] += count
+            target[1] += amount
+
+    def figures(count: int, amount: int) -> Dict[str, Any]:
+        return {"count": count, "amount": from_minor(amount)}
+
+    return {
+        "as_of": as_of,
+        "buckets": [{"bucket": label, **figures(*buckets[label])} for label in labels],
+        "by_status": {status: figures(*value) for status, value in statuses.items()},
+        "total": figures(sum(count for count, _ in buckets.values()), sum(amount for _, amount in buckets.values())),
+    }
+
+
+@router.get("/collections")
+def get_collections_report(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Amount collected per day and payment method against the amount invoiced,
+    with the collection rate for the period.
+    """
+    _require_finance(principal)
+    date_from, date_to = _period(date_from, date_to)
+    rows = db.exec(
+        select(
+            RevenueRollup.day,
+            RevenueRollup.metric,
+            RevenueRollup.dimension,
+            RevenueRollup.bucket,
+            RevenueRollup.amount_minor,
+        ).where(
+            RevenueRollup.metric.in_((revenue.INVOICED, TransactionType.PAYMENT.value)),
+            RevenueRollup.dimension.in_((revenue.ALL, revenue.PAYMENT_METHOD)),
+            RevenueRollup.day >= revenue.day_key(date_from),
+            RevenueRollup.day <= revenue.day_key(date_to),
+        )
+    ).all()
+
+    days: Dict[str, Dict[str, Any]] = {}
+    methods: Dict[str, int] = {}
+    invoiced = collected = 0
+    for day, metric, dimension, bucket, amount in rows:
+        entry = days.setdefault(day, {"day": day, "invoiced": 0, "collected": 0, "by_method": {}})
+        if dimension == revenue.PAYMENT_METHOD:
+            entry["by_method"][bucket] = entry["by_method"].get(bucket, 0) + amount
+            methods[bucket] = methods.get(bucket, 0) + amount
+        elif metric == revenue.INVOICED:
+            entry["invoiced"] += amount
+            invoiced += amount
+        else:
+            entry["collected"] += amount
+            collected += amount
+
+    for entry in days.values():
+        entry["invoiced"] = from_minor(entry["invoiced"])
+        entry["collected"] = from_minor(entry["collected"])
+        entry["by_method"] = {method: from_minor(amount) for method, amount in entry["by_method"].items()}
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "invoiced": from_minor(invoiced),
+        "collected": from_minor(collected),
+        "collection_rate": round(collected / invoiced, 4) if invoiced else None,
+        "by_method": {method: from_minor(amount) for method, amount in methods.items()},
+        "days": [days[day] for day in sorted(days)],
+    }
@@ -1,18 +1,111 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, status
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.api import deps
+from app.core.config import settings
+from app.core.principal import Principal
 from app.core.websockets import manager
-from typing import Any
+from app.db.chat_store import chat_store, chat_frame
+from app.models.consultation import Consultation
+from app.models.user import UserRole
+from typing import Any, List, Optional
 
 router = APIRouter()
 
+# Staff who may join any consultation's chat besides its doctor
+CHAT_STAFF_ROLES = {UserRole.ADMIN, UserRole.NURSE}
+
+def _may_chat(principal: Principal, consultation: Consultation) -> bool:
+    """
+    Whether `principal` may read and write this consultation's chat: its
+    patient, its doctor or clinical staff.
+    """
+    if principal.role == UserRole.PATIENT:
+        return consultation.patient_id == principal.patient_id
+    if principal.role == UserRole.DOCTOR:
+        return consultation.doctor_id == principal.doctor_id
+    return principal.role in CHAT_STAFF_ROLES
+
+def _chat_principal(token: Optional[str], consultation_id: int) -> Optional[Principal]:
+    """
+    The caller if they may join this consultation's chat. None for a bad
+    token, an unknown consultation or anyone not allowed by _may_chat.
+    """
+    principal = deps.get_websocket_principal(token)
+    if principal is None:
+        return None
+    with Session(deps.engine) as db:
+        consultation = db.get(Consultation, consultation_id)
+    if not consultation or not _may_chat(principal, consultation):
+        return None
+    return principal
+
 @router.websocket("/ws/consultations/{consultation_id}")
-async def websocket_endpoint(websocket: WebSocket, consultation_id: str):
-    await manager.connect(websocket, consultation_id)
+async def websocket_endpoint(
+    websocket: WebSocket, consultation_id: int, last_seq: Optional[int] = None, token: Optional[str] = None,
+):
+    """
+    Consultation chat room (`?token=<access token>`). Every frame is stored
+    (write-behind, batched) and relayed with its `seq`; reconnect with
+    `?last_seq=<seq>` to receive what was missed first.
+    """
+    principal = await run_in_threadpool(_chat_principal, token, consultation_id)
+    if principal is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    replay = None
+    if last_seq is not None:
+        async def replay():
+            missed = await chat_store.history(consultation_id, after_seq=last_seq, limit=settings.CHAT_REPLAY_LIMIT)
+            return [chat_frame(message) for message in missed]
+
+    if not await manager.connect(websocket, consultation_id, replay=replay, user_id=principal.id):
+        return
     try:
         while True:
             data = await websocket.receive_text()
-            # Simple echo/broadcast to the room
-            await manager.broadcast(data, consultation_id)
+            if manager.touch(websocket, data):
+                continue
+            message = await chat_store.append(
+                consultation_id, data, sender_user_id=principal.id, sender_name=principal.user.full_name,
+            )
+            await manager.broadcast(chat_frame(message), consultation_id)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, consultation_id)
         # Optional: Broadcast that user left
         # await manager.broadcast(f"User left chat", consultation_id)
+        pass
+    finally:
+        manager.disconnect(websocket, consultation_id)
+
+@router.get("/chat/consultations/{consultation_id}/messages", response_model=List[Any])
+async def get_chat_history(
+    consultation_id: int,
+    after_seq: Optional[int] = Query(None, description="Messages after this seq, oldest first"),
+    before_seq: Optional[int] = Query(None, description="Messages before this seq (default: the newest)"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(deps.get_async_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Chat history of a consultation, in seq order, for the same people who
+    may join its chat.
+    """
+    consultation = await db.get(Consultation, consultation_id)
+    if not consultation:
+        raise HTTPException(status_code=404, detail="Consultation not found")
+    if not _may_chat(principal, consultation):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    messages = await chat_store.history(consultation_id, after_seq=after_seq, before_seq=before_seq, limit=limit)
+    return [
+        {
+            "seq": message["seq"],
+            "senderUserId": message["sender_user_id"],
+            "senderName": message["sender_name"],
+            "text": message["body"],
+            "sentAt": message["created_at"],
+        }
+        for message in messages
+    ]
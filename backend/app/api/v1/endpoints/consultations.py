@@ -1,23 +1,47 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
 from app.models.user import User, UserRole, Doctor, Patient
 from app.models.appointment import Appointment, AppointmentStatus, AppointmentType
 from app.models.consultation import Consultation
+from app.schemas import ConsultationBundle
 from datetime import datetime
 
 router = APIRouter()
 
+CONSULTATIONS_LIST = ListSpec(
+    sort_fields={"created_at": Consultation.created_at, "id": Consultation.id},
+    default_sort="created_at",
+    id_field=Consultation.id,
+    date_field=Consultation.created_at,
+    patient_field=Consultation.patient_id,
+)
+
+# Everything a ConsultationBundle serializes, in one query per relationship
+# (prescriptions and lab results through their consultation_id indexes).
+# The appointment's doctor and patient are the ones loaded here, so
+# serializing them needs no further queries.
+BUNDLE_OPTIONS = (
+    selectinload(Consultation.appointment),
+    selectinload(Consultation.doctor).selectinload(Doctor.user),
+    selectinload(Consultation.patient).selectinload(Patient.user),
+    selectinload(Consultation.prescriptions),
+    selectinload(Consultation.lab_results),
+)
+
 @router.post("/", response_model=Consultation)
 def create_consultation(
     *,
     db: Session = Depends(deps.get_db),
     consultation_in: Consultation, # Using model as schema for speed
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """Start/Save a consultation"""
-    if current_user.role != UserRole.DOCTOR:
+    if principal.role != UserRole.DOCTOR:
         raise HTTPException(status_code=403, detail="Only doctors can consult")
 
     # Verify Appointment Link
@@ -26,11 +50,10 @@ def create_consultation(
         raise HTTPException(status_code=404, detail="Appointment not found")
         
     # Verify Doctor
-    doctor = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-    if not doctor or doctor.id != consultation_in.doctor_id:
+    if not principal.doctor_id or principal.doctor_id != consultation_in.doctor_id:
          # Auto-fix doctor_id if valid doctor
-         if doctor:
-             consultation_in.doctor_id = doctor.id
+         if principal.doctor_id:
+             consultation_in.doctor_id = principal.doctor_id
          else:
              raise HTTPException(status_code=403, detail="Doctor profile not found")
 
@@ -49,20 +72,40 @@ def get_consultation(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     consultation = db.get(Consultation, id)
     if not consultation:
         raise HTTPException(status_code=404, detail="Consultation not found")
         
     # Access control: Doctor, Admin, or the Patient themselves
-    if current_user.role == UserRole.PATIENT:
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient or consultation.patient_id != patient.id:
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id or consultation.patient_id != principal.patient_id:
             raise HTTPException(status_code=403, detail="Not authorized")
             
     return consultation
 
+@router.get("/{id}/bundle", response_model=ConsultationBundle)
+def get_consultation_bundle(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    The consultation with its appointment, doctor, patient, prescriptions
+    and lab results.
+    """
+    consultation = db.exec(select(Consultation).where(Consultation.id == id).options(*BUNDLE_OPTIONS)).first()
+    if not consultation:
+        raise HTTPException(status_code=404, detail="Consultation not found")
+
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id or consultation.patient_id != principal.patient_id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+    return consultation
+
 @router.get("/appointment/{appointment_id}", response_model=Consultation)
 def get_consultation_by_appointment(
     *,
@@ -79,15 +122,34 @@ def get_consultation_by_appointment(
 @router.get("/history/my", response_model=List[Consultation])
 def get_my_consultations(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """Get all consultations for the current patient"""
-    if current_user.role != UserRole.PATIENT:
+    if principal.role != UserRole.PATIENT:
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-    if not patient:
+    if not principal.patient_id:
          return []
          
-    return db.exec(select(Consultation).where(Consultation.patient_id == patient.id)).all()
+    return db.exec(select(Consultation).where(Consultation.patient_id == principal.patient_id)).all()
+
+
+@router.get("/history/my/bundle", response_model=List[ConsultationBundle])
+def get_my_consultation_bundles(
+    response: Response,
+    params: PageParams = Depends(),
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    The current patient's consultations as bundles, newest first. The query
+    count does not depend on the page size.
+    """
+    if principal.role != UserRole.PATIENT:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if not principal.patient_id:
+         return []
 
+    statement = select(Consultation).where(Consultation.patient_id == principal.patient_id).options(*BUNDLE_OPTIONS)
+    return paginate(db, statement, CONSULTATIONS_LIST, params, response)
@@ -1,51 +1,68 @@
 from typing import Any
 from fastapi import APIRouter, Depends
-from sqlmodel import Session, select, func
-from datetime import datetime, date
+from sqlmodel import Session
+from datetime import date, timedelta
 
 from app.api import deps
-from app.models.user import User, UserRole, Doctor, Patient
-from app.models.appointment import Appointment, AppointmentStatus
+from app.core.principal import Principal
+from app.core.stats_cache import stats_cache, stats_key
+from app.db import counters
+from app.models.user import User, UserRole
 
 router = APIRouter()
 
 @router.get("/stats")
 def get_dashboard_stats(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get dashboard statistics for the current user.
+    Cached briefly per (role, doctor); concurrent misses share one query.
     """
-    
-    # Defaults
-    stats = {
-        "appointments_today": 0,
-        "appointments_delta": 0,
-        "active_patients": 0,
-        "patients_delta": 0,
-        "pending_labs": 0,
-        "labs_delta": 0,
-        "available_beds": 12, # Hardcoded for now until Beds module
-        "beds_delta": 0
+    # Doctors see their own appointments, everyone else the whole clinic
+    doctor_id = counters.ALL_DOCTORS
+    if principal.role == UserRole.DOCTOR and principal.doctor_id:
+        doctor_id = principal.doctor_id
+
+    return stats_cache.get_or_compute(
+        stats_key(principal.role, doctor_id),
+        lambda: compute_dashboard_stats(db, doctor_id),
+    )
+
+@router.get("/stats/cache")
+def get_dashboard_stats_cache(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Hit/miss counters of the dashboard stats cache (admin only).
+    """
+    return stats_cache.stats()
+
+def compute_dashboard_stats(db: Session, doctor_id: int) -> Any:
+    """
+    Read the figures from the pre-aggregated counters (app/db/counters.py) in one query.
+    """
+    today = counters.day_key(date.today())
+    yesterday = counters.day_key(date.today() - timedelta(days=1))
+
+    keys = {
+        "appointments_today": (counters.APPOINTMENTS, today, doctor_id),
+        "appointments_yesterday": (counters.APPOINTMENTS, yesterday, doctor_id),
+    }
+    for name in counters.GAUGES:
+        keys[name] = (name, counters.TOTAL, counters.ALL_DOCTORS)
+        keys[f"{name}_today"] = (name, today, counters.ALL_DOCTORS)
+    values = counters.read_counters(db, keys.values())
+    value = {label: values[key] for label, key in keys.items()}
+
+    return {
+        "appointments_today": value["appointments_today"],
+        "appointments_delta": value["appointments_today"] - value["appointments_yesterday"],
+        "active_patients": value[counters.PATIENTS],
+        "patients_delta": value[f"{counters.PATIENTS}_today"],
+        "pending_labs": value[counters.LABS_PENDING],
+        "labs_delta": value[f"{counters.LABS_PENDING}_today"],
+        "available_beds": value[counters.BEDS_AVAILABLE],
+        "beds_delta": value[f"{counters.BEDS_AVAILABLE}_today"],
     }
-    
-    today = date.today()
-    
-    # 1. Appointments Today
-    # Filter by doctor if doctor
-    query = select(func.count(Appointment.id)).where(func.date(Appointment.appointment_time) == today)
-    if current_user.role == UserRole.DOCTOR:
-        doctor = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-        if doctor:
-            query = query.where(Appointment.doctor_id == doctor.id)
-    
-    count_today = db.exec(query).one()
-    stats["appointments_today"] = count_today
-    
-    # 2. Total Patients (Active) - Simplified: Count all patients
-    # Ideally should be 'patients assigned to this doctor' or just all patients for now
-    patient_count = db.exec(select(func.count(Patient.id))).one()
-    stats["active_patients"] = patient_count
-    
-    return stats
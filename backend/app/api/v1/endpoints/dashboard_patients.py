@@ -1,56 +1,95 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends
+from typing import Any, List, Optional
+from datetime import date
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy import Date, Integer, case, cast, func, or_
 from sqlmodel import Session, select
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
 from app.models.user import User, Patient, UserRole
-from app.schemas import PatientInfo
 
 router = APIRouter()
 
+PATIENT_DIRECTORY_LIST = ListSpec(
+    sort_fields={"name": User.full_name, "email": User.email, "created_at": User.created_at, "id": Patient.id},
+    default_sort="name",
+    id_field=Patient.id,
+    date_field=User.created_at,
+    patient_field=Patient.id,
+)
+
+def age_expression(dialect_name: str, today: date):
+    """
+    Age in whole years from the YYYY-MM-DD `date_of_birth` string, computed
+    by the database. Malformed or missing dates give NULL.
+    """
+    dob = Patient.date_of_birth
+    if dialect_name == "postgresql":
+        return case(
+            (dob.op("~")(r"^\d{4}-\d{2}-\d{2}$"), cast(func.date_part("year", func.age(today, cast(dob, Date))), Integer)),
+            else_=None,
+        )
+    birthday_pending = case((func.strftime("%m-%d", dob) > today.strftime("%m-%d"), 1), else_=0)
+    return today.year - cast(func.strftime("%Y", dob), Integer) - birthday_pending
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
 @router.get("/patients", response_model=List[Any])
 def get_patients(
+    response: Response,
+    q: Optional[str] = None,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get all patients (for doctors/admin).
+    Paginated, sortable by name/email/created_at and searchable with `q`
+    (name, email or phone).
     """
-    if current_user.role == UserRole.PATIENT:
+    if principal.role == UserRole.PATIENT:
          # Patient can only see themselves ideally, or return empty
          return []
-         
-    # Fetch all patients with user details
-    patients = db.exec(select(Patient)).all()
-    
-    # Construct response manually or via schema if complicated
-    result = []
-    from datetime import date
-    
-    for p in patients:
-        # User might be lazy loaded
-        user = db.get(User, p.user_id)
-        if user:
-            age = 0
-            if p.date_of_birth:
-                try:
-                    dob = date.fromisoformat(p.date_of_birth)
-                    today = date.today()
-                    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-                except ValueError:
-                    age = 30 # Default if format is wrong
-            
-            result.append({
-                "id": p.id,
-                "name": user.full_name,
-                "email": user.email,
-                "role": user.role,
-                "date_of_birth": p.date_of_birth,
-                "blood_group": p.blood_group,
-                "age": age or 30,
-                "gender": p.gender or "Unknown",
-                "phone": user.phone_number or "+234 000 0000",
-                "lastVisit": "2024-01-01", # Still mock, but better
-                "status": "Active" if user.is_active else "Inactive"
-            })
-            
-    return result
+
+    age = age_expression(db.get_bind().dialect.name, date.today()).label("age")
+    statement = select(
+        Patient.id,
+        Patient.date_of_birth,
+        Patient.blood_group,
+        Patient.gender,
+        User.full_name,
+        User.email,
+        User.role,
+        User.phone_number,
+        User.is_active,
+        User.created_at,
+        age,
+    ).join(User, User.id == Patient.user_id)
+
+    if q:
+        pattern = _like_pattern(q.strip())
+        statement = statement.where(or_(
+            User.full_name.ilike(pattern, escape="\\"),
+            User.email.ilike(pattern, escape="\\"),
+            User.phone_number.ilike(pattern, escape="\\"),
+        ))
+
+    rows = paginate(db, statement, PATIENT_DIRECTORY_LIST, params, response)
+    return [
+        {
+            "id": row.id,
+            "name": row.full_name,
+            "email": row.email,
+            "role": row.role,
+            "date_of_birth": row.date_of_birth,
+            "blood_group": row.blood_group,
+            "age": row.age or 30,
+            "gender": row.gender or "Unknown",
+            "phone": row.phone_number or "+234 000 0000",
+            "lastVisit": "2024-01-01", # Still mock, but better
+            "status": "Active" if row.is_active else "Inactive"
+        }
+        for row in rows
+    ]
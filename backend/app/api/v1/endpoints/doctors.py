@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, delete, select
+
+from app.api import deps
+from app.core.config import settings
+from app.core.principal import Principal
+from app.db import availability
+from app.models.schedule import DoctorSchedule
+from app.models.user import Doctor, UserRole
+from app.schemas import DoctorSchedule as DoctorScheduleSchema, DoctorScheduleCreate, Slot
+
+router = APIRouter()
+
+def _get_doctor(db: Session, doctor_id: int) -> Doctor:
+    doctor = db.get(Doctor, doctor_id)
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return doctor
+
+@router.get("/{doctor_id}/schedule", response_model=List[DoctorScheduleSchema])
+def get_doctor_schedule(
+    doctor_id: int,
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    The doctor's weekly working-hours templates.
+    """
+    _get_doctor(db, doctor_id)
+    return db.exec(
+        select(DoctorSchedule)
+        .where(DoctorSchedule.doctor_id == doctor_id)
+        .order_by(DoctorSchedule.weekday, DoctorSchedule.start_time)
+    ).all()
+
+@router.put("/{doctor_id}/schedule", response_model=List[DoctorScheduleSchema])
+def set_doctor_schedule(
+    doctor_id: int,
+    schedule_in: List[DoctorScheduleCreate],
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Replace the doctor's working hours. The doctor themself or an admin.
+    Existing bookings are kept.
+    """
+    if principal.role != UserRole.ADMIN and principal.doctor_id != doctor_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    _get_doctor(db, doctor_id)
+    for entry in schedule_in:
+        if entry.start_time >= entry.end_time:
+            raise HTTPException(status_code=400, detail="start_time must be before end_time")
+        if entry.valid_from and entry.valid_to and entry.valid_from > entry.valid_to:
+            raise HTTPException(status_code=400, detail="valid_from must not be after valid_to")
+
+    db.exec(delete(DoctorSchedule).where(DoctorSchedule.doctor_id == doctor_id))
+    schedules = [DoctorSchedule(doctor_id=doctor_id, **entry.model_dump()) for entry in schedule_in]
+    db.add_all(schedules)
+    db.commit()
+    for schedule in schedules:
+        db.refresh(schedule)
+    return sorted(schedules, key=lambda schedule: (schedule.weekday, schedule.start_time))
+
+@router.get("/{doctor_id}/slots", response_model=List[Slot])
+def get_doctor_slots(
+    doctor_id: int,
+    date_from: datetime = Query(..., alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Exclusive, defaults to a week after `from`"),
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Free slots of the doctor's working hours starting in [from, to),
+    skipping slots already in the past.
+    """
+    _get_doctor(db, doctor_id)
+    date_from = availability.wall_clock(date_from)
+    date_to = availability.wall_clock(date_to) if date_to else date_from + timedelta(days=7)
+    if date_to <= date_from:
+        raise HTTPException(status_code=400, detail="`to` must be after `from`")
+    if date_to - date_from > timedelta(days=settings.AVAILABILITY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"At most {settings.AVAILABILITY_MAX_DAYS} days at a time")
+
+    schedules = db.exec(select(DoctorSchedule).where(DoctorSchedule.doctor_id == doctor_id)).all()
+    slots = availability.generate_slots(schedules, max(date_from, datetime.now()), date_to)
+    if not slots:
+        return []
+    booked = db.exec(availability.booked_statement(doctor_id, slots[0][0], slots[-1][1])).all()
+    return [Slot(start=start, end=end) for start, end in availability.free_slots(slots, booked)]
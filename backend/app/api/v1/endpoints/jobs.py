@@ -0,0 +1,60 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlmodel import Session, select
+
+from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.scheduler import JobBusy, scheduler
+from app.db import maintenance  # noqa: F401  (registers the jobs)
+from app.models.job import JobRun
+from app.models.user import User
+
+router = APIRouter()
+
+JOB_RUNS_LIST = ListSpec(
+    sort_fields={"id": JobRun.id, "started_at": JobRun.started_at, "duration_ms": JobRun.duration_ms},
+    default_sort="id",
+    id_field=JobRun.id,
+    date_field=JobRun.started_at,
+    status_field=JobRun.status,
+)
+
+@router.get("/")
+def get_jobs(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Registered periodic jobs: schedule, lock holder, last run and recent durations (admin only).
+    """
+    return scheduler.status()
+
+@router.get("/runs", response_model=List[JobRun])
+def get_job_runs(
+    response: Response,
+    name: Optional[str] = None,
+    params: PageParams = Depends(),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Run history, newest first; filter with ?name= and ?status= (admin only).
+    """
+    statement = select(JobRun)
+    if name:
+        statement = statement.where(JobRun.name == name)
+    return paginate(db, statement, JOB_RUNS_LIST, params, response)
+
+@router.post("/{name}/run")
+def run_job(
+    name: str,
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Run a job now, outside its schedule (admin only).
+    """
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        return scheduler.run(name, force=True)
+    except JobBusy:
+        raise HTTPException(status_code=409, detail="Job is already running")
@@ -1,26 +1,38 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
 from app.models.user import User, UserRole, Patient
 from app.models.lab_result import LabResult
 from app.schemas.lab_result import LabResultCreate, LabResultUpdate, LabResult as LabResultSchema
 
 router = APIRouter()
 
+LAB_RESULTS_LIST = ListSpec(
+    sort_fields={"recorded_at": LabResult.recorded_at, "id": LabResult.id},
+    default_sort="recorded_at",
+    id_field=LabResult.id,
+    date_field=LabResult.recorded_at,
+    patient_field=LabResult.patient_id,
+    status_field=LabResult.status,
+)
+
 @router.get("/", response_model=List[LabResultSchema])
 def get_lab_results(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
-    if current_user.role == UserRole.PATIENT:
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient:
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id:
             return []
-        results = db.exec(select(LabResult).where(LabResult.patient_id == patient.id)).all()
+        statement = select(LabResult).where(LabResult.patient_id == principal.patient_id)
     else:
-        results = db.exec(select(LabResult)).all()
-    return results
+        statement = select(LabResult)
+    return paginate(db, statement, LAB_RESULTS_LIST, params, response)
 
 @router.post("/", response_model=LabResultSchema)
 def create_lab_result(
@@ -1,7 +1,10 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
 from app.models.user import User, UserRole, Patient
 from app.models.medical_record import MedicalRecord
 from app.schemas.medical_record import MedicalRecordCreate, MedicalRecordUpdate, MedicalRecord as MedicalRecordSchema
@@ -9,30 +12,39 @@ from app.core.websockets import manager
 
 router = APIRouter()
 
+MEDICAL_RECORDS_LIST = ListSpec(
+    sort_fields={"visit_date": MedicalRecord.visit_date, "created_at": MedicalRecord.created_at, "id": MedicalRecord.id},
+    default_sort="visit_date",
+    id_field=MedicalRecord.id,
+    date_field=MedicalRecord.visit_date,
+    patient_field=MedicalRecord.patient_id,
+)
+
 @router.get("/", response_model=List[MedicalRecordSchema])
 def get_medical_records(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get all medical records. Patients see only theirs, doctors see all.
     """
-    if current_user.role == UserRole.PATIENT:
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient:
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id:
             return []
-        records = db.exec(select(MedicalRecord).where(MedicalRecord.patient_id == patient.id)).all()
-    elif current_user.role in [UserRole.DOCTOR, UserRole.ADMIN]:
-        records = db.exec(select(MedicalRecord)).all()
+        statement = select(MedicalRecord).where(MedicalRecord.patient_id == principal.patient_id)
+    elif principal.role in [UserRole.DOCTOR, UserRole.ADMIN]:
+        statement = select(MedicalRecord)
     else:
         # Nurse/Receptionist/etc might need specific access, but for now restrict default "ALL" view
-        records = []
-    return records
+        return []
+    return paginate(db, statement, MEDICAL_RECORDS_LIST, params, response)
 
 @router.post("/", response_model=MedicalRecordSchema)
 async def create_medical_record(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     record_in: MedicalRecordCreate,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
@@ -44,11 +56,17 @@ async def create_medical_record(
     
     db_obj = MedicalRecord.from_orm(record_in)
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
     
-    # Broadcast notification
-    await manager.broadcast(f"New medical record created for patient ID {db_obj.patient_id}")
+    # Notify the patient
+    patient_user_id = (await db.exec(select(Patient.user_id).where(Patient.id == db_obj.patient_id))).first()
+    if patient_user_id:
+        await manager.notify_user(patient_user_id, "medical_record.created", {
+            "record_id": db_obj.id,
+            "patient_id": db_obj.patient_id,
+            "message": f"New medical record created for patient ID {db_obj.patient_id}",
+        })
     
     return db_obj
 
@@ -57,7 +75,7 @@ def get_medical_record(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get a medical record by ID.
@@ -66,9 +84,8 @@ def get_medical_record(
     if not record:
         raise HTTPException(status_code=404, detail="Medical record not found")
     
-    if current_user.role == UserRole.PATIENT:
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient or record.patient_id != patient.id:
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id or record.patient_id != principal.patient_id:
             raise HTTPException(status_code=403, detail="Not enough permissions")
             
     return record
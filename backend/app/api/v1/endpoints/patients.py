@@ -0,0 +1,82 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import Session
+from app.api import deps
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.principal import Principal
+from app.db.search import search_patients
+from app.db.timeline import STREAMS, patient_timeline
+from app.models.user import Patient, UserRole
+from app.schemas import PatientSearchHit, TimelineEvent
+
+router = APIRouter()
+
+# Which timeline events each role may read; roles not listed (reception,
+# accounts) have their own appointment and billing screens
+ROLE_TIMELINE_KINDS = {
+    UserRole.ADMIN: set(STREAMS),
+    UserRole.DOCTOR: set(STREAMS),
+    UserRole.PATIENT: set(STREAMS),  # Only their own, checked below
+    UserRole.NURSE: {"appointment", "consultation", "lab_result", "prescription", "vitals"},
+    UserRole.PHARMACIST: {"prescription"},
+    UserRole.LAB_TECH: {"lab_result"},
+}
+
+@router.get("/search", response_model=List[PatientSearchHit])
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Search patients by name, email, phone or profile fields (staff only).
+    Prefix/substring matches rank first, followed by close spellings.
+    """
+    if principal.role == UserRole.PATIENT:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return search_patients(db, q, limit)
+
+@router.get("/{patient_id}/timeline", response_model=List[TimelineEvent])
+def timeline(
+    patient_id: int,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description=f"Opaque value from the {NEXT_CURSOR_HEADER} header"),
+    kind: Optional[List[str]] = Query(None, description=f"Only these event kinds: {', '.join(STREAMS)}"),
+    date_from: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+    date_to: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    The patient's appointments, consultations, invoices, lab results,
+    medical records, prescriptions and vitals merged into one stream,
+    newest first. Each role sees the kinds in ROLE_TIMELINE_KINDS;
+    patients only their own.
+    """
+    allowed = ROLE_TIMELINE_KINDS.get(principal.role)
+    if not allowed or (principal.role == UserRole.PATIENT and principal.patient_id != patient_id):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not db.get(Patient, patient_id):
+        raise HTTPException(status_code=404, detail="Patient not found")
+    unknown = set(kind or ()) - set(STREAMS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid kind, expected one of: {', '.join(STREAMS)}")
+    kind = [name for name in STREAMS if name in allowed and (not kind or name in kind)]
+    if not kind:
+        return []
+
+    after = None
+    if cursor:
+        cursor_kind, order, at, last_id = decode_cursor(cursor)
+        if cursor_kind not in STREAMS or order != "desc":
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (at, cursor_kind, last_id)
+
+    events, next_key = patient_timeline(db, patient_id, limit, after, kind, date_from, date_to)
+    if next_key is not None:
+        at, next_kind, last_id = next_key
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(next_kind, "desc", at, last_id)
+    return events
@@ -1,37 +1,48 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.api import deps
-from app.models.user import User, UserRole
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
+from app.models.user import User, UserRole, Patient
 from app.models.prescription import Prescription
 from app.schemas.prescription import PrescriptionCreate, PrescriptionUpdate, Prescription as PrescriptionSchema
 from app.core.websockets import manager
 
 router = APIRouter()
 
+PRESCRIPTIONS_LIST = ListSpec(
+    sort_fields={"created_at": Prescription.created_at, "id": Prescription.id},
+    default_sort="created_at",
+    id_field=Prescription.id,
+    date_field=Prescription.created_at,
+    patient_field=Prescription.patient_id,
+    status_field=Prescription.status,
+)
+
 @router.get("/", response_model=List[PrescriptionSchema])
 def get_prescriptions(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get all prescriptions. Patients see only theirs, doctors see all.
     """
-    if current_user.role == UserRole.PATIENT:
-        # Need to get patient record for the user
-        from app.models.user import Patient
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient:
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id:
             return []
-        prescriptions = db.exec(select(Prescription).where(Prescription.patient_id == patient.id)).all()
+        statement = select(Prescription).where(Prescription.patient_id == principal.patient_id)
     else:
-        prescriptions = db.exec(select(Prescription)).all()
-    return prescriptions
+        statement = select(Prescription)
+    return paginate(db, statement, PRESCRIPTIONS_LIST, params, response)
 
 @router.post("/", response_model=PrescriptionSchema)
 async def create_prescription(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     prescription_in: PrescriptionCreate,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
@@ -43,11 +54,20 @@ async def create_prescription(
     
     db_obj = Prescription.from_orm(prescription_in)
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
     
-    # Broadcast notification
-    await manager.broadcast(f"New prescription created for patient ID {db_obj.patient_id}")
+    # Notify the patient and the pharmacy
+    event = {
+        "prescription_id": db_obj.id,
+        "patient_id": db_obj.patient_id,
+        "medication": db_obj.medication,
+        "message": f"New prescription created for patient ID {db_obj.patient_id}",
+    }
+    patient_user_id = (await db.exec(select(Patient.user_id).where(Patient.id == db_obj.patient_id))).first()
+    if patient_user_id:
+        await manager.notify_user(patient_user_id, "prescription.created", event)
+    await manager.notify_role(UserRole.PHARMACIST, "prescription.created", event)
     
     return db_obj
 
@@ -56,7 +76,7 @@ def get_prescription(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get a prescription by ID.
@@ -65,10 +85,8 @@ def get_prescription(
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
-    if current_user.role == UserRole.PATIENT:
-        from app.models.user import Patient
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient or prescription.patient_id != patient.id:
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id or prescription.patient_id != principal.patient_id:
             raise HTTPException(status_code=403, detail="Not enough permissions")
             
     return prescription
@@ -1,7 +1,9 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.api import deps
+from app.core.principal import Principal
 from app.models.user import User, UserRole, Doctor
 from app.models.referral import Referral, ReferralStatus
 from app.core.websockets import manager
@@ -11,72 +13,81 @@ router = APIRouter()
 @router.post("/", response_model=Referral)
 async def create_referral(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     referral_in: Referral, # Minimal schema would be better but using Model for speed
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """Doctor refers patient to another doctor"""
-    if current_user.role != UserRole.DOCTOR:
+    if principal.role != UserRole.DOCTOR:
         raise HTTPException(status_code=403, detail="Only doctors can refer")
     
     # Verify sender is the logged in doctor logic? 
     # For now assume FE sends correct from_doctor_id or we override it:
     
     # Get current doctor profile
-    sender_profile = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-    if not sender_profile:
+    if not principal.doctor_id:
          raise HTTPException(status_code=400, detail="Doctor profile not found")
          
-    referral_in.from_doctor_id = sender_profile.id
+    referral_in.from_doctor_id = principal.doctor_id
     referral_in.status = ReferralStatus.PENDING
     
     db.add(referral_in)
-    db.commit()
-    db.refresh(referral_in)
+    await db.commit()
+    await db.refresh(referral_in)
     
-    # Broadcast notification to the receiving doctor (optimize to target specific user later)
-    # Ideally we should send to specific user ID of the to_doctor
-    to_doctor = db.get(Doctor, referral_in.to_doctor_id)
+    # Notify the receiving doctor only
+    to_doctor = await db.get(Doctor, referral_in.to_doctor_id)
     if to_doctor:
-        await manager.broadcast(f"REFERRAL:{to_doctor.user_id}:New referral from Dr. {current_user.full_name}")
+        await manager.notify_user(to_doctor.user_id, "referral.created", {
+            "referral_id": referral_in.id,
+            "patient_id": referral_in.patient_id,
+            "from_doctor_id": principal.doctor_id,
+            "from_doctor_name": principal.user.full_name,
+            "urgency": referral_in.urgency,
+            "message": f"New referral from Dr. {principal.user.full_name}",
+        })
     
     return referral_in
 
 @router.get("/received", response_model=List[Referral])
 def get_received_referrals(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """Get referrals sent TO the current doctor"""
-    doctor = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-    if not doctor:
+    if not principal.doctor_id:
         return []
         
-    return db.exec(select(Referral).where(Referral.to_doctor_id == doctor.id)).all()
+    return db.exec(select(Referral).where(Referral.to_doctor_id == principal.doctor_id)).all()
 
 @router.post("/{id}/accept", response_model=Referral)
 async def accept_referral(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
-    referral = db.get(Referral, id)
+    referral = await db.get(Referral, id)
     if not referral:
         raise HTTPException(status_code=404, detail="Referral not found")
         
     # Check if current user is the target doctor
-    doctor = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-    if not doctor or referral.to_doctor_id != doctor.id:
+    if not principal.doctor_id or referral.to_doctor_id != principal.doctor_id:
         raise HTTPException(status_code=403, detail="Not authorized")
         
     referral.status = ReferralStatus.ACCEPTED
     db.add(referral)
-    db.commit()
-    db.refresh(referral)
+    await db.commit()
+    await db.refresh(referral)
     
     # Notify sender
-    # sender_user_id lookup omitted for brevity
+    from_doctor = await db.get(Doctor, referral.from_doctor_id)
+    if from_doctor:
+        await manager.notify_user(from_doctor.user_id, "referral.accepted", {
+            "referral_id": referral.id,
+            "patient_id": referral.patient_id,
+            "message": f"Referral accepted by Dr. {principal.user.full_name}",
+        })
     
     return referral
 
@@ -85,14 +96,13 @@ def reject_referral(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     referral = db.get(Referral, id)
     if not referral:
         raise HTTPException(status_code=404, detail="Referral not found")
 
-    doctor = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-    if not doctor or referral.to_doctor_id != doctor.id:
+    if not principal.doctor_id or referral.to_doctor_id != principal.doctor_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     referral.status = ReferralStatus.REJECTED
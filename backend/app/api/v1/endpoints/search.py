@@ -0,0 +1,66 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+from app.api import deps
+from app.core.principal import Principal
+from app.db.search import CLINICAL_KINDS, search_clinical
+from app.models.user import UserRole
+from app.schemas import ClinicalSearchHit
+
+router = APIRouter()
+
+class ClinicalField(str, Enum):
+    DIAGNOSIS = "diagnosis"
+    SYMPTOMS = "symptoms"
+    TREATMENT = "treatment"
+    NOTES = "notes"
+
+# Which clinical documents each role may search
+ROLE_DOCUMENT_TYPES = {
+    UserRole.ADMIN: set(CLINICAL_KINDS),
+    UserRole.DOCTOR: set(CLINICAL_KINDS),
+    UserRole.PATIENT: set(CLINICAL_KINDS),  # Scoped to their own records below
+    UserRole.NURSE: {"consultation", "prescription"},
+    UserRole.PHARMACIST: {"prescription"},
+}
+
+@router.get("/clinical", response_model=List[ClinicalSearchHit])
+def clinical_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[List[str]] = Query(None, description="medical_record, consultation, prescription"),
+    field: Optional[ClinicalField] = None,
+    patient_id: Optional[int] = None,
+    date_from: Optional[datetime] = Query(None, description="Inclusive lower bound"),
+    date_to: Optional[datetime] = Query(None, description="Exclusive upper bound"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    db: Session = Depends(deps.get_db),
+    principal: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Ranked full-text search over medical records, consultations and
+    prescriptions, e.g. q=malaria&field=diagnosis&date_from=2026-07-01.
+    """
+    allowed = ROLE_DOCUMENT_TYPES.get(principal.role)
+    if not allowed:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    requested = set(types) if types else set(CLINICAL_KINDS)
+    unknown = requested - set(CLINICAL_KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown document type: {', '.join(sorted(unknown))}")
+    kinds = [kind for kind in CLINICAL_KINDS if kind in requested & allowed]
+    if not kinds:
+        return []
+
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id:
+            return []
+        patient_id = principal.patient_id
+
+    return search_clinical(
+        db, q, kinds=kinds, field=field.value if field else None, patient_id=patient_id,
+        date_from=date_from, date_to=date_to, limit=limit, offset=offset,
+    )
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 
 from app.api import deps
+from app.core.principal import Principal
 from app.core import security
 from app.models.user import User, Patient, Doctor, UserRole
 from app.schemas import UserCreate, User as UserSchema
@@ -54,18 +55,17 @@ from app.models.appointment import Appointment
 @router.get("/patients/my", response_model=List[Any]) # Return simplified patient list
 def get_my_patients(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """Get patients treated by the current doctor"""
-    if current_user.role != UserRole.DOCTOR:
+    if principal.role != UserRole.DOCTOR:
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    doctor = db.exec(select(Doctor).where(Doctor.user_id == current_user.id)).first()
-    if not doctor:
+    if not principal.doctor_id:
         return []
         
     # Get patients from appointments
-    statement = select(Patient).join(Appointment).where(Appointment.doctor_id == doctor.id).distinct()
+    statement = select(Patient).join(Appointment).where(Appointment.doctor_id == principal.doctor_id).distinct()
     patients = db.exec(statement).all()
     
     # Enrich with user info
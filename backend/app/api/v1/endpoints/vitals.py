@@ -1,26 +1,37 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel import Session, select
 from app.api import deps
+from app.api.pagination import ListSpec, PageParams, paginate
+from app.core.principal import Principal
 from app.models.user import User, UserRole, Patient
 from app.models.vitals import Vitals
 from app.schemas.vitals import VitalsCreate, Vitals as VitalsSchema
 
 router = APIRouter()
 
+VITALS_LIST = ListSpec(
+    sort_fields={"recorded_at": Vitals.recorded_at, "id": Vitals.id},
+    default_sort="recorded_at",
+    id_field=Vitals.id,
+    date_field=Vitals.recorded_at,
+    patient_field=Vitals.patient_id,
+)
+
 @router.get("/", response_model=List[VitalsSchema])
 def get_vitals(
+    response: Response,
+    params: PageParams = Depends(),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    principal: Principal = Depends(deps.get_current_principal),
 ) -> Any:
-    if current_user.role == UserRole.PATIENT:
-        patient = db.exec(select(Patient).where(Patient.user_id == current_user.id)).first()
-        if not patient:
+    if principal.role == UserRole.PATIENT:
+        if not principal.patient_id:
             return []
-        vitals = db.exec(select(Vitals).where(Vitals.patient_id == patient.id)).all()
+        statement = select(Vitals).where(Vitals.patient_id == principal.patient_id)
     else:
-        vitals = db.exec(select(Vitals)).all()
-    return vitals
+        statement = select(Vitals)
+    return paginate(db, statement, VITALS_LIST, params, response)
 
 @router.post("/", response_model=VitalsSchema)
 def create_vitals(
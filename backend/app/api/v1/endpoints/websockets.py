@@ -1,16 +1,52 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.core.websockets import manager
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+from app.api import deps
+from app.core.websockets import manager, role_channel, user_channel
+from app.models.user import User
 
 router = APIRouter()
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Notification stream for the authenticated user (`?token=<access token>`).
+    Subscribes to the user's own channel and their role's channel; events
+    arrive as JSON envelopes, see app.core.websockets.event_envelope.
+    """
+    principal = await run_in_threadpool(deps.get_websocket_principal, token)
+    if principal is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    channel = user_channel(principal.id)
+    if not await manager.connect(websocket, channel, role_channel(principal.role), user_id=principal.id):
+        return
     try:
         while True:
-            data = await websocket.receive_text()
-            # Echo or handle commands
-            # For this task, we mainly use it for server->client broadcast
-            await websocket.send_text(f"Message received: {data}")
+            # Server -> client only; client frames are heartbeats
+            manager.touch(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        # Also on errors and cancellation, or the connection stays registered
+        manager.disconnect(websocket, channel)
+
+@router.get("/ws/metrics")
+def websocket_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Per-room delivery counters and send latency (admin only).
+    """
+    return manager.metrics_snapshot()
+
+@router.get("/ws/connections")
+def websocket_connections(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Live connection, user and per-room counts of this worker, plus how many
+    sockets were reaped as idle, rejected over capacity or evicted (admin only).
+    """
+    return manager.connection_stats()
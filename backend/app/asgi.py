@@ -0,0 +1,8 @@
+"""
+Server entry point, `uvicorn app.asgi:app` (run.py uses it): the app of
+app.main, imported with the garbage collector paused (see paused_gc).
+"""
+from app.core.startup import paused_gc
+
+with paused_gc():
+    from app.main import app  # noqa: F401
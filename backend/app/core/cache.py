@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class _Flight:
+    """
+    A computation in progress that other callers can wait on.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache(Generic[V]):
+    """
+    Small thread-safe LRU cache with per-entry expiry.
+
+    Sync endpoints run in a threadpool, so every operation takes the lock.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        # Bumped by invalidate()/clear() so a computation that started before
+        # an invalidation doesn't store its stale result afterwards
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, key: Hashable) -> Any:
+        # Caller holds the lock
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], V], ttl: Optional[float] = None) -> V:
+        """
+        Return the cached value or compute it, single-flight: concurrent
+        misses for the same key wait for one call to `compute` and share
+        its result (or its exception).
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                if flight.error is None and generation == self._generation:
+                    self._store(key, flight.value, ttl)
+            flight.done.set()
+        return flight.value
+
+    def _store(self, key: Hashable, value: V, ttl: Optional[float]) -> None:
+        # Caller holds the lock
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None, generation: Optional[int] = None) -> bool:
+        """
+        Store `value`. With `generation` (read before loading the value),
+        skip it if an invalidation happened since. Returns whether stored.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "NAJBEL Clinic API"
@@ -7,9 +7,111 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "YOUR_SUPER_SECRET_KEY_CHANGE_ME"  # TODO: Change in production
     # In production, use: SECRET_KEY = os.getenv("SECRET_KEY")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+
+    # Authenticated user + profile ids, cached per user id (app/core/principal.py).
+    # Also how long a role change or deactivation can take to reach other workers
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 15
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    # Dashboard stats are polled by every open tab; writes invalidate early
+    DASHBOARD_STATS_CACHE_TTL_SECONDS: int = 15
+
+    # WebSocket delivery (app/core/websockets.py): per-connection outbound
+    # queue, per-send timeout, and what to do when a client can't keep up:
+    # "coalesce" drops its oldest queued message, "disconnect" closes it
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    WS_SLOW_CONSUMER_POLICY: str = "coalesce"
+    WS_LATENCY_SAMPLES: int = 500
+    # Heartbeat: ping every interval, close sockets silent for the idle
+    # timeout. Caps are per worker; a user over their cap loses the oldest
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 20.0
+    WS_IDLE_TIMEOUT_SECONDS: float = 60.0
+    WS_MAX_CONNECTIONS: int = 5000
+    WS_MAX_CONNECTIONS_PER_USER: int = 5
+
+    # Cross-worker broadcast transport (app/core/pubsub.py): "memory" for a
+    # single worker, "sqlite" for several workers on one host, "redis" otherwise
+    PUBSUB_BACKEND: str = "memory"
+    PUBSUB_SQLITE_PATH: str = "./pubsub.db"
+    PUBSUB_POLL_INTERVAL_SECONDS: float = 0.05
+    PUBSUB_RETENTION_SECONDS: int = 60
+    PUBSUB_CHANNEL: str = "najbel:ws"
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Consultation chat (app/db/chat_store.py): messages are written behind in
+    # batches of up to CHAT_FLUSH_BATCH_SIZE or every CHAT_FLUSH_INTERVAL_MS;
+    # senders wait for the writer once CHAT_BUFFER_MAX messages are pending
+    CHAT_FLUSH_INTERVAL_MS: int = 200
+    CHAT_FLUSH_BATCH_SIZE: int = 200
+    CHAT_BUFFER_MAX: int = 10000
+    # Flushes a batch may wait out a locked database before it is written
+    # row by row, dropping rows that still fail
+    CHAT_FLUSH_MAX_ATTEMPTS: int = 5
+    # Most messages replayed to a client reconnecting with last_seq
+    CHAT_REPLAY_LIMIT: int = 500
+    # Distinguishes workers in chat sequence numbers (0-31). Required, and
+    # different on every worker, with any PUBSUB_BACKEND but memory
+    CHAT_WORKER_ID: Optional[int] = None
+
+    # Idempotency-Key support on payment and booking endpoints (app/core/idempotency.py):
+    # responses are replayed for this long; a key whose first request is still
+    # unfinished after the lock timeout (crashed worker) may be taken over
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 60
+    IDEMPOTENCY_PURGE_EVERY: int = 500  # Expired keys are deleted after this many stored responses
+
+    # Periodic jobs (app/core/scheduler.py, jobs in app/db/maintenance.py). Every
+    # worker polls; a shared lease makes each run happen on one worker only
+    JOBS_ENABLED: bool = True
+    JOBS_POLL_SECONDS: float = 15.0
+    JOBS_LOCK_TIMEOUT_SECONDS: int = 300  # A crashed worker's lock lapses after this
+    JOBS_HISTORY_RETENTION_DAYS: int = 14
+    JOBS_STATS_WINDOW: int = 50  # Runs per job summarised by GET /jobs
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 300
+    OVERDUE_SWEEP_BATCH_SIZE: int = 500
+    MAINTENANCE_PURGE_INTERVAL_SECONDS: int = 3600
     
+    # Appointment slots for doctors without working-hours templates, and the
+    # widest window GET /doctors/{id}/slots searches at once
+    APPOINTMENT_SLOT_MINUTES: int = 30
+    AVAILABILITY_MAX_DAYS: int = 31
+
     # SQLite for now
     DATABASE_URL: str = "sqlite:///./najbel.db"
+    # Derived from DATABASE_URL (aiosqlite / asyncpg) when not set
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Engine profile (see app/db/session.py)
+    DB_ECHO: bool = False  # Log every SQL statement, debugging only
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+
+    # SQLite pragmas, applied on every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"  # Readers no longer block behind writers
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL, one fsync per checkpoint
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+
+    # Run pending migrations (app/db/migrations) when the app starts; off
+    # by default, deployments run `alembic upgrade head` as their own step
+    DB_MIGRATE_ON_STARTUP: bool = False
+    # Rows per transaction in migration backfills on large tables
+    MIGRATION_CHUNK_SIZE: int = 5000
+
+    # Log how long each startup step took (router imports, lifespan steps)
+    STARTUP_PROFILE: bool = False
+
+    # Short write transactions (wallet ledger) that hit a lock are re-run this many times in total
+    DB_BUSY_RETRIES: int = 4
+    DB_BUSY_BACKOFF_MS: float = 25  # Doubled on every retry, with jitter
+
+    # PostgreSQL connection options
+    POSTGRES_STATEMENT_TIMEOUT_MS: Optional[int] = 30000
+    POSTGRES_APPLICATION_NAME: str = "najbel-api"
 
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
 
@@ -0,0 +1,247 @@
+"""
+Idempotency-Key support for retried writes.
+
+A client that may retry a payment or booking sends a unique
+Idempotency-Key header. The first request with a key runs normally and its
+response is stored; a retry with the same key and the same request gets the
+stored response back, marked Idempotent-Replayed: true, without the endpoint
+running again. Keys are scoped to the calling user and expire after
+IDEMPOTENCY_TTL_SECONDS.
+
+- same key, different method/path/query/body: 422
+- same key while the first request is still running: 409
+- 5xx and 401/403/409/429 responses are not stored, so a retry runs again
+- requests without the header, or without a valid token, pass straight through
+"""
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Pattern, Sequence, Tuple
+
+from jose import JWTError, jwt
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import security
+from app.core.config import settings
+from app.models.idempotency import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+HEADER = "idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+UNSTORED_STATUSES = {401, 403, 409, 429}
+
+# (method, path under API_V1_STR) of the endpoints that honour the header
+IDEMPOTENT_ROUTES: Sequence[Tuple[str, str]] = (
+    ("PUT", r"/billing/invoices/\d+/pay"),
+    ("POST", r"/billing/wallet/topup"),
+    ("POST", r"/appointments/?"),
+)
+
+_table = IdempotencyRecord.__table__
+
+
+def _sha256(*parts: Any) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def request_user(authorization: Optional[str]) -> Optional[str]:
+    """
+    Subject of the bearer token, or None when absent or invalid (the
+    endpoint itself will then answer 401).
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine] = None,
+        ttl: float = settings.IDEMPOTENCY_TTL_SECONDS,
+        lock_timeout: float = settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS,
+        purge_every: int = settings.IDEMPOTENCY_PURGE_EVERY,
+    ):
+        self._engine = engine
+        self.ttl = timedelta(seconds=ttl)
+        self.lock_timeout = timedelta(seconds=lock_timeout)
+        self.purge_every = purge_every
+        self.stored = 0
+        self.replayed = 0
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            from app.db.async_session import async_engine
+            self._engine = async_engine
+        return self._engine
+
+    async def begin(self, key: str, request_hash: str):
+        """
+        Claim `key` for a new request. Returns None when claimed, otherwise
+        the existing record (finished, or still running elsewhere).
+        """
+        for _ in range(2):
+            now = datetime.utcnow()
+            try:
+                async with self.engine.begin() as connection:
+                    row = (await connection.execute(select(_table).where(_table.c.key == key))).first()
+                    if row is not None and (
+                        row.expires_at <= now
+                        or (row.status_code is None and row.created_at <= now - self.lock_timeout)
+                    ):
+                        await connection.execute(delete(_table).where(_table.c.key == key))
+                        row = None
+                    if row is not None:
+                        return row
+                    await connection.execute(
+                        insert(_table).values(
+                            key=key, request_hash=request_hash, created_at=now, expires_at=now + self.ttl
+                        )
+                    )
+                    return None
+            except IntegrityError:
+                # Another request claimed the key between our read and insert
+                continue
+        raise RuntimeError("Could not claim idempotency key")
+
+    async def complete(self, key: str, status_code: int, content_type: Optional[str], body: bytes) -> None:
+        async with self.engine.begin() as connection:
+            await connection.execute(
+                update(_table)
+                .where(_table.c.key == key)
+                .values(status_code=status_code, content_type=content_type, response_body=body)
+            )
+        self.stored += 1
+        if self.purge_every and self.stored % self.purge_every == 0:
+            await self.purge_expired()
+
+    async def release(self, key: str) -> None:
+        async with self.engine.begin() as connection:
+            await connection.execute(delete(_table).where(_table.c.key == key))
+
+    async def purge_expired(self) -> int:
+        async with self.engine.begin() as connection:
+            result = await connection.execute(delete(_table).where(_table.c.expires_at <= datetime.utcnow()))
+        return result.rowcount
+
+
+idempotency_store = IdempotencyStore()
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: Optional[IdempotencyStore] = None,
+        routes: Sequence[Tuple[str, str]] = IDEMPOTENT_ROUTES,
+        prefix: str = settings.API_V1_STR,
+    ):
+        self.app = app
+        self.store = store or idempotency_store
+        self.routes: List[Tuple[str, Pattern]] = [(method, re.compile(prefix + path)) for method, path in routes]
+
+    def _applies(self, scope: Scope) -> bool:
+        return scope["type"] == "http" and any(
+            scope["method"] == method and pattern.fullmatch(scope["path"]) for method, pattern in self.routes
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._applies(scope):
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        client_key = headers.get(HEADER)
+        user = request_user(headers.get("authorization")) if client_key is not None else None
+        if user is None:
+            return await self.app(scope, receive, send)
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"}, status_code=400)
+            return await response(scope, receive, send)
+
+        body = await _read_body(receive)
+        key = _sha256(user, client_key)
+        request_hash = _sha256(scope["method"], scope["path"], scope.get("query_string", b""), body)
+
+        existing = await self.store.begin(key, request_hash)
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                response = JSONResponse(
+                    {"detail": "Idempotency-Key was already used for a different request"}, status_code=422
+                )
+            elif existing.status_code is None:
+                response = JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"}, status_code=409
+                )
+            else:
+                self.store.replayed += 1
+                response = Response(
+                    existing.response_body,
+                    status_code=existing.status_code,
+                    media_type=existing.content_type,
+                    headers={REPLAYED_HEADER: "true"},
+                )
+            return await response(scope, receive, send)
+
+        await self._run(scope, body, receive, send, key)
+
+    async def _run(self, scope: Scope, body: bytes, receive: Receive, send: Send, key: str) -> None:
+        body_sent = False
+        status_code: Optional[int] = None
+        content_type: Optional[str] = None
+        chunks: List[bytes] = []
+
+        async def replay_body() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        try:
+            if status_code is None or status_code >= 500 or status_code in UNSTORED_STATUSES:
+                await self.store.release(key)
+            else:
+                await self.store.complete(key, status_code, content_type, b"".join(chunks))
+        except Exception:
+            # The client already has its response; the key frees itself after the lock timeout
+            logger.exception("Could not store idempotent response")
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
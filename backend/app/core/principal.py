@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession, object_session
+from sqlmodel import Session, select
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User, UserRole, Patient, Doctor
+
+
+@dataclass
+class Principal:
+    """
+    The authenticated user plus the ids of their Patient/Doctor profiles.
+
+    `user` is a detached snapshot shared between requests, treat it as
+    read-only. Use deps.get_current_user for a session-bound User.
+    """
+    user: User
+    patient_id: Optional[int] = None
+    doctor_id: Optional[int] = None
+
+    @property
+    def id(self) -> int:
+        return self.user.id
+
+    @property
+    def role(self) -> UserRole:
+        return self.user.role
+
+
+# Invalidation below only reaches this process, and only ORM writes: a user
+# deactivated or demoted on another worker, or by a Core/bulk UPDATE, keeps
+# their cached role and active flag there for up to
+# PRINCIPAL_CACHE_TTL_SECONDS. Keep the TTL short.
+principal_cache: TTLCache[Principal] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """
+    Resolve a user and their profile ids in a single query, going through
+    the cache first.
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    # Read before the query: if the user is written while it runs, the
+    # row may predate the write and must not be cached
+    generation = principal_cache.generation
+    row = db.exec(
+        select(User, Patient.id, Doctor.id)
+        .outerjoin(Patient, Patient.user_id == User.id)
+        .outerjoin(Doctor, Doctor.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    if not row:
+        return None
+
+    user, patient_id, doctor_id = row
+    # Detach so the snapshot can outlive this request's session
+    db.expunge(user)
+    principal = Principal(user=user, patient_id=patient_id, doctor_id=doctor_id)
+    principal_cache.set(user_id, principal, generation=generation)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.invalidate(user_id)
+
+
+# Invalidation: any write to a user or their profile drops the cached
+# principal, once at flush and again after commit so a concurrent request
+# can't re-cache the pre-commit row for a whole TTL.
+_PENDING_KEY = "principal_invalidations"
+
+
+def _on_user_write(mapper, connection, target):
+    user_id = target.id if isinstance(target, User) else target.user_id
+    if user_id is None:
+        return
+    invalidate_principal(user_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+for _model in (User, Patient, Doctor):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _on_user_write)
+
+
+@event.listens_for(SASession, "after_commit")
+def _after_commit(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,182 @@
+"""
+Pub/sub backends that carry WebSocket broadcasts between workers.
+
+Every worker subscribes at startup; ConnectionManager publishes each
+broadcast and delivers to its own sockets when the message comes back,
+so rooms are shared by all processes (and nodes, with Redis).
+
+- memory: single process, delivers synchronously (the default)
+- sqlite: a shared SQLite file polled by every worker, for one host and tests
+- redis:  Redis PUBLISH/SUBSCRIBE, requires the `redis` package
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+
+class PubSub(ABC):
+    """
+    Interface: start() subscribes `handler`, which is then called with every
+    payload published by any worker, this one included.
+    """
+
+    @abstractmethod
+    async def start(self, handler: Handler) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, payload: str) -> None:
+        ...
+
+    async def stop(self) -> None:
+        pass
+
+
+class MemoryPubSub(PubSub):
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+
+    async def publish(self, payload: str) -> None:
+        if self._handler is not None:
+            self._handler(payload)
+
+
+class SQLitePubSub(PubSub):
+    """
+    Append-only message table polled by every subscriber. Rows older than
+    `retention` seconds are pruned by publishers.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, poll_interval: float = 0.05, retention: float = 60.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_id = 0
+        self._published = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pubsub_message ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    async def start(self, handler: Handler) -> None:
+        # Only messages published from now on
+        rows = await asyncio.to_thread(self._execute, "SELECT coalesce(max(id), 0) FROM pubsub_message")
+        self._last_id = rows[0][0]
+        self._task = asyncio.create_task(self._poll(handler))
+
+    async def _poll(self, handler: Handler) -> None:
+        while True:
+            try:
+                rows = await asyncio.to_thread(
+                    self._execute, "SELECT id, payload FROM pubsub_message WHERE id > ? ORDER BY id", (self._last_id,)
+                )
+            except sqlite3.Error as error:
+                logger.warning("pub/sub poll failed: %s", error)
+                rows = []
+            for message_id, payload in rows:
+                self._last_id = message_id
+                try:
+                    handler(payload)
+                except Exception:
+                    logger.exception("pub/sub handler failed")
+            await asyncio.sleep(self.poll_interval)
+
+    def _insert(self, payload: str) -> None:
+        now = time.time()
+        self._execute("INSERT INTO pubsub_message (payload, created_at) VALUES (?, ?)", (payload, now))
+        self._published += 1
+        if self._published % self.PRUNE_EVERY == 0:
+            self._execute("DELETE FROM pubsub_message WHERE created_at < ?", (now - self.retention,))
+
+    async def publish(self, payload: str) -> None:
+        await asyncio.to_thread(self._insert, payload)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class RedisPubSub(PubSub):
+    def __init__(self, url: str, channel: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("PUBSUB_BACKEND=redis requires the redis package (pip install redis)")
+        self._client = redis.from_url(url)
+        self.channel = channel
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(handler))
+
+    async def _listen(self, handler: Handler) -> None:
+        async for message in self._pubsub.listen():
+            data = message["data"]
+            try:
+                handler(data.decode() if isinstance(data, bytes) else data)
+            except Exception:
+                logger.exception("pub/sub handler failed")
+
+    async def publish(self, payload: str) -> None:
+        await self._client.publish(self.channel, payload)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self._client.aclose()
+
+
+def create_pubsub(backend: Optional[str] = None) -> PubSub:
+    backend = backend or settings.PUBSUB_BACKEND
+    if backend == "memory":
+        return MemoryPubSub()
+    if backend == "sqlite":
+        return SQLitePubSub(
+            settings.PUBSUB_SQLITE_PATH,
+            poll_interval=settings.PUBSUB_POLL_INTERVAL_SECONDS,
+            retention=settings.PUBSUB_RETENTION_SECONDS,
+        )
+    if backend == "redis":
+        return RedisPubSub(settings.REDIS_URL, settings.PUBSUB_CHANNEL)
+    raise ValueError(f"Unknown PUBSUB_BACKEND: {backend}")
@@ -0,0 +1,219 @@
+"""
+In-process periodic jobs, coordinated between workers through the database.
+
+Every worker runs the same loop. Each job has one `joblease` row holding
+its next run time and a lock; a worker runs a job only after taking that
+lock with a single conditional UPDATE:
+
+    UPDATE joblease SET owner = :me, locked_until = :now + timeout
+    WHERE name = :name AND locked_until <= :now AND next_run_at <= :now
+
+so a run happens on exactly one worker, and a crashed worker's lock lapses
+after the job's timeout. Finishing sets the next run time for everyone.
+Each run is recorded in `jobrun` with its duration and result.
+
+Jobs are plain functions taking a Session and returning an optional
+JSON-able summary; they run in a thread.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.job import JobLease, JobRun
+
+logger = logging.getLogger(__name__)
+
+_leases = JobLease.__table__
+_runs = JobRun.__table__
+
+JobFunc = Callable[[Session], Optional[Dict[str, Any]]]
+
+
+class JobBusy(Exception):
+    """
+    The job is running on another worker (or not due, for scheduled runs).
+    """
+
+
+@dataclass
+class Job:
+    name: str
+    func: JobFunc
+    interval: float
+    timeout: float
+
+
+class Scheduler:
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        poll_interval: float = settings.JOBS_POLL_SECONDS,
+        owner: Optional[str] = None,
+    ):
+        self._engine = engine
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs: Dict[str, Job] = {}
+        self._leased: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            from app.db.session import engine
+            self._engine = engine
+        return self._engine
+
+    def job(self, name: str, interval: float, timeout: Optional[float] = None):
+        """
+        Decorator registering `func` to run every `interval` seconds.
+        """
+        def register(func: JobFunc) -> JobFunc:
+            self.jobs[name] = Job(name, func, interval, timeout or settings.JOBS_LOCK_TIMEOUT_SECONDS)
+            return func
+        return register
+
+    def _ensure_lease(self, name: str) -> None:
+        if name in self._leased:
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    insert(_leases).values(name=name, locked_until=datetime.min, next_run_at=datetime.utcnow())
+                )
+        except IntegrityError:
+            pass  # Created by another worker
+        self._leased.add(name)
+
+    def _acquire(self, job: Job, force: bool) -> bool:
+        self._ensure_lease(job.name)
+        now = datetime.utcnow()
+        statement = (
+            update(_leases)
+            .where(_leases.c.name == job.name, _leases.c.locked_until <= now)
+            .values(owner=self.owner, locked_until=now + timedelta(seconds=job.timeout))
+        )
+        if not force:
+            statement = statement.where(_leases.c.next_run_at <= now)
+        with self.engine.begin() as connection:
+            return connection.execute(statement).rowcount == 1
+
+    def _release(self, job: Job) -> None:
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(_leases)
+                .where(_leases.c.name == job.name, _leases.c.owner == self.owner)
+                .values(locked_until=now, next_run_at=now + timedelta(seconds=job.interval))
+            )
+
+    def run(self, name: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Run job `name` now if due (or regardless of schedule with `force`)
+        and nobody else is running it. Blocking; returns the JobRun row.
+        Raises KeyError for unknown jobs and JobBusy when the lease is taken.
+        """
+        job = self.jobs[name]
+        if not self._acquire(job, force):
+            raise JobBusy(name)
+        started = time.perf_counter()
+        with self.engine.begin() as connection:
+            run_id = connection.execute(
+                insert(_runs).values(name=name, owner=self.owner, status="running", started_at=datetime.utcnow())
+            ).inserted_primary_key[0]
+        values: Dict[str, Any] = {}
+        try:
+            with Session(self.engine) as session:
+                result = job.func(session)
+            values = {"status": "succeeded", "result": json.dumps(result, default=str) if result is not None else None}
+        except Exception as error:
+            logger.exception("Job %s failed", name)
+            values = {"status": "failed", "error": f"{type(error).__name__}: {error}"[:2000]}
+        finally:
+            values.update(finished_at=datetime.utcnow(), duration_ms=round((time.perf_counter() - started) * 1000, 3))
+            with self.engine.begin() as connection:
+                connection.execute(update(_runs).where(_runs.c.id == run_id).values(**values))
+            self._release(job)
+        with self.engine.connect() as connection:
+            return dict(connection.execute(select(_runs).where(_runs.c.id == run_id)).one()._mapping)
+
+    def run_due(self) -> int:
+        """
+        One pass over every job; returns how many ran here.
+        """
+        ran = 0
+        for name in list(self.jobs):
+            try:
+                self.run(name)
+                ran += 1
+            except JobBusy:
+                pass
+            except Exception:
+                logger.exception("Could not run job %s", name)
+        return ran
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.to_thread(self.run_due)
+            await asyncio.sleep(self.poll_interval)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Registered jobs with their lease, last run and recent durations.
+        """
+        now = datetime.utcnow()
+        jobs = []
+        with self.engine.connect() as connection:
+            leases = {row.name: row for row in connection.execute(select(_leases))}
+            for job in self.jobs.values():
+                recent = connection.execute(
+                    select(_runs)
+                    .where(_runs.c.name == job.name)
+                    .order_by(_runs.c.id.desc())
+                    .limit(settings.JOBS_STATS_WINDOW)
+                ).all()
+                durations = [run.duration_ms for run in recent if run.duration_ms is not None]
+                lease = leases.get(job.name)
+                jobs.append({
+                    "name": job.name,
+                    "interval_seconds": job.interval,
+                    "timeout_seconds": job.timeout,
+                    "running": bool(lease and lease.locked_until > now),
+                    "owner": lease.owner if lease else None,
+                    "next_run_at": lease.next_run_at if lease else None,
+                    "last_run": dict(recent[0]._mapping) if recent else None,
+                    "recent_runs": len(recent),
+                    "recent_failures": sum(run.status == "failed" for run in recent),
+                    "avg_duration_ms": round(sum(durations) / len(durations), 3) if durations else None,
+                    "max_duration_ms": max(durations) if durations else None,
+                })
+        return {"owner": self.owner, "jobs": jobs}
+
+    def prune_history(self, session: Session, older_than: timedelta) -> int:
+        result = session.execute(delete(_runs).where(_runs.c.started_at < datetime.utcnow() - older_than))
+        return result.rowcount
+
+
+scheduler = Scheduler()
@@ -0,0 +1,48 @@
+from typing import Any, Dict, Hashable
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession, object_session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.appointment import Appointment
+from app.models.bed import Bed
+from app.models.lab_result import LabResult
+from app.models.user import Patient
+
+# Keyed by (role, doctor_id); there are only a handful of distinct keys
+stats_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    maxsize=256,
+    ttl=settings.DASHBOARD_STATS_CACHE_TTL_SECONDS,
+)
+
+
+def stats_key(role: str, doctor_id: int) -> Hashable:
+    return (str(role), doctor_id)
+
+
+# Invalidation: writes to any counted model drop every cached entry, at
+# flush and again after commit, so a request racing the commit can't keep
+# the old figures for a whole TTL.
+_PENDING_KEY = "stats_invalidation"
+
+
+def _on_counted_write(mapper, connection, target):
+    stats_cache.clear()
+    session = object_session(target)
+    if session is not None:
+        session.info[_PENDING_KEY] = True
+
+
+for _model in (Appointment, Bed, Patient, LabResult):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _on_counted_write)
+
+
+@event.listens_for(SASession, "after_commit")
+def _after_commit(session):
+    if session.info.pop(_PENDING_KEY, False):
+        stats_cache.clear()
+
+
+@event.listens_for(SASession, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
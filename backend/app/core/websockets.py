@@ -1,34 +1,431 @@
-from typing import List, Dict
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
 from fastapi import WebSocket
+from app.core.config import settings
+from app.core.pubsub import PubSub, create_pubsub
+
+logger = logging.getLogger(__name__)
+
+# What to do when a connection's outbound queue is full
+SLOW_CONSUMER_DISCONNECT = "disconnect"  # close the socket, the client reconnects
+SLOW_CONSUMER_COALESCE = "coalesce"      # discard the oldest queued message
+SLOW_CONSUMER_POLICIES = (SLOW_CONSUMER_DISCONNECT, SLOW_CONSUMER_COALESCE)
+
+# 1013 "Try Again Later"
+CLOSE_SLOW_CONSUMER = 1013
+CLOSE_OVER_CAPACITY = 1013
+# 1001 "Going Away"
+CLOSE_IDLE = 1001
+CLOSE_REPLACED = 1001
+
+# Application-level heartbeat: ASGI doesn't expose protocol ping frames, so
+# the server sends {"type": "ping"} and clients answer {"type": "pong"}.
+# Any frame from the client counts as a sign of life.
+PING_FRAME = json.dumps({"type": "ping"})
+PONG_FRAME = json.dumps({"type": "pong"})
+CONTROL_TYPES = ("ping", "pong")
+
+# Loads frames a reconnecting client missed; sent before any live message
+Replay = Callable[[], Awaitable[List[str]]]
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def role_channel(role: Any) -> str:
+    return f"role:{getattr(role, 'value', role)}"
+
+
+def event_envelope(event_type: str, data: Dict[str, Any]) -> str:
+    """
+    JSON frame for notifications: {"type": "referral.created", "data": {...}, "sent_at": "..."}.
+    """
+    return json.dumps(
+        {"type": event_type, "data": data, "sent_at": datetime.utcnow().isoformat()},
+        default=lambda value: value.isoformat() if hasattr(value, "isoformat") else str(value),
+    )
+
+
+class RoomMetrics:
+    """
+    Delivery counters and send latency (enqueue -> send completed) for one room.
+    """
+
+    def __init__(self, samples: int):
+        self.sent = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+        self.send_errors = 0
+        self.latencies: Deque[float] = deque(maxlen=samples)
+
+    def record(self, latency: float) -> None:
+        self.sent += 1
+        self.latencies.append(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+            "send_errors": self.send_errors,
+            "latency_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(ordered[-1] * 1000, 3) if ordered else None,
+            },
+        }
+
+
+class Connection:
+    """
+    One socket, subscribed to one or more rooms, with a bounded outbound
+    queue drained by its own writer task so a slow client only ever delays
+    itself.
+    """
+
+    def __init__(
+        self,
+        manager: "ConnectionManager",
+        websocket: WebSocket,
+        rooms: Tuple[str, ...],
+        user_id: Optional[int] = None,
+    ):
+        self.manager = manager
+        self.websocket = websocket
+        self.rooms = rooms
+        self.user_id = user_id
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+        self.queue: "asyncio.Queue[Tuple[str, float, str]]" = asyncio.Queue(maxsize=manager.queue_size)
+        self.writer: Optional[asyncio.Task] = None
+
+    def start(self, replay: Optional[Replay] = None) -> None:
+        self.writer = asyncio.create_task(self._write_loop(replay))
+
+    def stop(self) -> None:
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+    @property
+    def room_id(self) -> str:
+        return self.rooms[0]
+
+    def enqueue(self, message: str, room_id: str) -> bool:
+        """
+        Queue a message without waiting. Returns False when the connection
+        was dropped as a slow consumer.
+        """
+        item = (message, time.monotonic(), room_id)
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        metrics = self.manager.room_metrics(room_id)
+        if self.manager.slow_consumer_policy == SLOW_CONSUMER_COALESCE:
+            self.queue.get_nowait()
+            self.queue.put_nowait(item)
+            metrics.dropped += 1
+            return True
+
+        metrics.slow_disconnects += 1
+        self.manager.drop(self, CLOSE_SLOW_CONSUMER)
+        return False
+
+    async def _send(self, message: str, room_id: str) -> bool:
+        try:
+            await asyncio.wait_for(self.websocket.send_text(message), self.manager.send_timeout)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logger.info("Dropping websocket in room %s: %s", self.room_id, error or type(error).__name__)
+            self.manager.room_metrics(room_id).send_errors += 1
+            self.manager.drop(self)
+            return False
+
+    async def _write_loop(self, replay: Optional[Replay]) -> None:
+        # The socket is already subscribed while the backlog loads, so nothing
+        # is missed in between; a message may arrive twice, clients de-duplicate
+        if replay is not None:
+            for message in await replay():
+                if not await self._send(message, self.room_id):
+                    return
+        while True:
+            message, enqueued_at, room_id = await self.queue.get()
+            if not await self._send(message, room_id):
+                return
+            self.manager.room_metrics(room_id).record(time.monotonic() - enqueued_at)
+
 
 class ConnectionManager:
-    def __init__(self):
-        # Map room_id to list of active connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    """
+    Rooms of local sockets. Broadcasts go through the pub/sub backend so
+    that every worker delivers them to its own sockets.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WS_SEND_TIMEOUT_SECONDS,
+        slow_consumer_policy: str = settings.WS_SLOW_CONSUMER_POLICY,
+        latency_samples: int = settings.WS_LATENCY_SAMPLES,
+        pubsub: Optional[PubSub] = None,
+        heartbeat_interval: Optional[float] = settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+        idle_timeout: float = settings.WS_IDLE_TIMEOUT_SECONDS,
+        max_connections: int = settings.WS_MAX_CONNECTIONS,
+        max_connections_per_user: int = settings.WS_MAX_CONNECTIONS_PER_USER,
+    ):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+        if max_connections < 1 or max_connections_per_user < 1:
+            raise ValueError("max_connections and max_connections_per_user must be at least 1")
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.slow_consumer_policy = slow_consumer_policy
+        self.latency_samples = latency_samples
+        # Map room_id to its connections, keyed by socket for O(1) removal
+        self.active_connections: Dict[str, Dict[WebSocket, Connection]] = {}
+        self.metrics: Dict[str, RoomMetrics] = {}
+        self.pubsub = pubsub or create_pubsub()
+        self._started = False
+        # Every local connection once, and per user in connection order
+        self.connections: Dict[WebSocket, Connection] = {}
+        self.user_connections: Dict[int, Dict[WebSocket, Connection]] = {}
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+        self.max_connections_per_user = max_connections_per_user
+        self._reaper: Optional[asyncio.Task] = None
+        # The event loop only keeps weak references to tasks; hold the
+        # background closes until they finish
+        self._closing: Set[asyncio.Task] = set()
+        self.reaped = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    async def start(self) -> None:
+        """
+        Subscribe to the pub/sub backend. Called from the app lifespan, and
+        lazily on first use so scripts and tests work without it.
+        """
+        if self._started:
+            return
+        self._started = True
+        try:
+            await self.pubsub.start(self._on_message)
+        except Exception:
+            self._started = False
+            raise
+        if self.heartbeat_interval:
+            self._reaper = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        if self._started:
+            self._started = False
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+            await self.pubsub.stop()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                self.reap_and_ping()
+            except Exception:
+                logger.exception("WebSocket heartbeat failed")
+
+    def reap_and_ping(self) -> int:
+        """
+        Close connections silent for longer than idle_timeout and ping the
+        rest. Returns how many were reaped.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        reaped = 0
+        for connection in list(self.connections.values()):
+            if connection.last_seen < deadline:
+                self.drop(connection, CLOSE_IDLE)
+                reaped += 1
+            else:
+                connection.enqueue(PING_FRAME, connection.room_id)
+        self.reaped += reaped
+        return reaped
 
-    async def connect(self, websocket: WebSocket, room_id: str):
+    def touch(self, websocket: WebSocket, data: Optional[str] = None) -> bool:
+        """
+        Record that the client is alive. Returns True when `data` was a
+        heartbeat frame the caller should not process further.
+        """
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.last_seen = time.monotonic()
+        if data is None or not data.startswith("{"):
+            return False
+        try:
+            frame_type = json.loads(data).get("type")
+        except (ValueError, AttributeError):
+            return False
+        if frame_type not in CONTROL_TYPES:
+            return False
+        if frame_type == "ping" and connection is not None:
+            connection.enqueue(PONG_FRAME, connection.room_id)
+        return True
+
+    def _on_message(self, payload: str) -> None:
+        event = json.loads(payload)
+        room_id, message = event["room"], event["message"]
+        if room_id is not None:
+            for connection in list(self.active_connections.get(room_id, {}).values()):
+                connection.enqueue(message, room_id)
+            return
+        # Global: once per socket, even when it sits in several rooms
+        for connection in list(self.connections.values()):
+            connection.enqueue(message, connection.room_id)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        room_id: str,
+        *extra_rooms: str,
+        replay: Optional[Replay] = None,
+        user_id: Optional[int] = None,
+    ) -> bool:
+        """
+        Accept the socket and subscribe it to `room_id` plus any `extra_rooms`.
+        `replay` frames are sent first, e.g. chat messages missed while offline.
+
+        Returns False, with the socket closed, when the worker is at
+        max_connections. A user at max_connections_per_user gets their
+        oldest connection closed instead.
+        """
+        rooms = tuple(dict.fromkeys(str(room) for room in (room_id, *extra_rooms)))
+        await self.start()
+        if len(self.connections) >= self.max_connections:
+            self.rejected += 1
+            await websocket.close(code=CLOSE_OVER_CAPACITY)
+            return False
+        if user_id is not None:
+            existing = self.user_connections.get(user_id, {})
+            while existing and len(existing) >= self.max_connections_per_user:
+                self.evicted += 1
+                self.drop(next(iter(existing.values())), CLOSE_REPLACED)
         await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append(websocket)
+        connection = Connection(self, websocket, rooms, user_id)
+        self.connections[websocket] = connection
+        if user_id is not None:
+            self.user_connections.setdefault(user_id, {})[websocket] = connection
+        for room in rooms:
+            self.active_connections.setdefault(room, {})[websocket] = connection
+        connection.start(replay)
+        return True
+
+    def disconnect(self, websocket: WebSocket, room_id: Optional[str] = None):
+        """
+        Remove the socket from every room it was subscribed to.
+        """
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        connection.stop()
+        if connection.user_id is not None:
+            mine = self.user_connections.get(connection.user_id, {})
+            mine.pop(websocket, None)
+            if not mine:
+                self.user_connections.pop(connection.user_id, None)
+        for joined in connection.rooms:
+            room = self.active_connections.get(joined)
+            if room is None:
+                continue
+            room.pop(websocket, None)
+            if not room:
+                del self.active_connections[joined]
+                self.metrics.pop(joined, None)
+
+    def drop(self, connection: Connection, close_code: Optional[int] = None) -> None:
+        """
+        Remove a connection the server gave up on and close its socket in the background.
+        """
+        self.disconnect(connection.websocket, connection.room_id)
+        if close_code is not None:
+            task = asyncio.create_task(self._close(connection.websocket, close_code))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
 
-    def disconnect(self, websocket: WebSocket, room_id: str):
-        if room_id in self.active_connections:
-            if websocket in self.active_connections[room_id]:
-                self.active_connections[room_id].remove(websocket)
-            if not self.active_connections[room_id]:
-                del self.active_connections[room_id]
+    def room_metrics(self, room_id: str) -> RoomMetrics:
+        metrics = self.metrics.get(room_id)
+        if metrics is None:
+            metrics = self.metrics[room_id] = RoomMetrics(self.latency_samples)
+        return metrics
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """
+        Live counts for this worker.
+        """
+        now = time.monotonic()
+        return {
+            "connections": len(self.connections),
+            "users": len(self.user_connections),
+            "rooms": {room_id: len(room) for room_id, room in self.active_connections.items()},
+            "oldest_connection_seconds": round(max((now - c.connected_at for c in self.connections.values()), default=0), 1),
+            "reaped": self.reaped,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_connections_per_user": self.max_connections_per_user,
+                "idle_timeout_seconds": self.idle_timeout,
+            },
+        }
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        return {
+            room_id: {"connections": len(self.active_connections.get(room_id, ())), **metrics.snapshot()}
+            for room_id, metrics in self.metrics.items()
+        }
 
     async def broadcast(self, message: str, room_id: str):
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                await connection.send_text(message)
-    
+        """
+        Publish `message` to the room on every worker. Delivery only queues
+        it per connection; writer tasks send independently, so this never
+        waits on a client.
+        """
+        await self.start()
+        await self.pubsub.publish(json.dumps({"room": str(room_id), "message": message}))
+
     # Keep old global broadcast for backward compatibility if needed, or remove
     async def global_broadcast(self, message: str):
-        # Flatten all lists
-        for room in self.active_connections.values():
-            for connection in room:
-                await connection.send_text(message)
+        await self.start()
+        await self.pubsub.publish(json.dumps({"room": None, "message": message}))
+
+    async def notify_user(self, user_id: int, event_type: str, data: Dict[str, Any]):
+        """
+        Send a typed event to every socket of one user, on any worker.
+        """
+        await self.broadcast(event_envelope(event_type, data), user_channel(user_id))
+
+    async def notify_role(self, role: Any, event_type: str, data: Dict[str, Any]):
+        await self.broadcast(event_envelope(event_type, data), role_channel(role))
 
 manager = ConnectionManager()
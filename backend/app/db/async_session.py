@@ -0,0 +1,43 @@
+from typing import AsyncGenerator
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.db.session import configure_engine, engine_options
+
+# Async drivers for each sync backend we support
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def async_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its async driver, e.g.
+    sqlite:///./najbel.db -> sqlite+aiosqlite:///./najbel.db
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    async_engine = create_async_engine(url, **engine_options(url))
+    # Pragmas are applied on the underlying sync engine's DBAPI connections
+    configure_engine(async_engine.sync_engine)
+    return async_engine
+
+
+async_engine = build_async_engine(settings.ASYNC_DATABASE_URL or async_url(settings.DATABASE_URL))
+
+# expire_on_commit=False: attributes stay readable after commit without
+# an implicit (and in async code, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,137 @@
+"""
+Doctor availability.
+
+Working hours come from DoctorSchedule templates. Each booked appointment
+holds its slot in slot_start/slot_end; ux_appointment_doctor_id_slot_start
+guarantees one booking per doctor and slot start, and doubles as the
+interval index: the bookings overlapping a window are a single range read
+
+    doctor_id = ? AND slot_start >= <from - MAX_SLOT_MINUTES> AND slot_start < <to>
+
+however many years of history the doctor has. Free slots are the template
+slots of the window minus those bookings, found with one merge pass.
+
+Doctors without any template keep the old behaviour: any time can be
+booked, on a grid of APPOINTMENT_SLOT_MINUTES from midnight.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.appointment import Appointment
+from app.models.schedule import DoctorSchedule
+
+# Longest slot a template may define; bounds the overlap range read
+MAX_SLOT_MINUTES = 240
+
+Slot = Tuple[datetime, datetime]
+
+
+def wall_clock(when: datetime) -> datetime:
+    """
+    `when` as a naive wall-clock time, the way slots and schedule templates
+    are stored. A client's UTC offset (e.g. a trailing Z) is dropped.
+    """
+    return when.replace(tzinfo=None)
+
+
+def _applies(schedule: DoctorSchedule, day: date) -> bool:
+    return (
+        schedule.weekday == day.weekday()
+        and (schedule.valid_from is None or schedule.valid_from <= day)
+        and (schedule.valid_to is None or day <= schedule.valid_to)
+    )
+
+
+def _day_slots(schedule: DoctorSchedule, day: date) -> Iterable[Slot]:
+    length = timedelta(minutes=schedule.slot_minutes)
+    start = datetime.combine(day, schedule.start_time)
+    end = datetime.combine(day, schedule.end_time)
+    while start + length <= end:
+        yield start, start + length
+        start += length
+
+
+def generate_slots(schedules: Sequence[DoctorSchedule], start: datetime, end: datetime) -> List[Slot]:
+    """
+    Template slots starting in [start, end), in order.
+    """
+    slots = []
+    day = start.date()
+    while day <= end.date():
+        for schedule in schedules:
+            if _applies(schedule, day):
+                slots.extend(slot for slot in _day_slots(schedule, day) if start <= slot[0] < end)
+        day += timedelta(days=1)
+    return sorted(set(slots))
+
+
+def resolve_slot(schedules: Sequence[DoctorSchedule], when: datetime) -> Optional[Slot]:
+    """
+    The slot a booking at `when` occupies: the template slot containing it,
+    or None outside working hours. Without templates, the default grid slot.
+    """
+    when = wall_clock(when)
+    if not schedules:
+        length = timedelta(minutes=settings.APPOINTMENT_SLOT_MINUTES)
+        midnight = datetime.combine(when.date(), time())
+        start = midnight + length * ((when - midnight) // length)
+        return start, start + length
+    for schedule in schedules:
+        if not _applies(schedule, when.date()):
+            continue
+        for slot in _day_slots(schedule, when.date()):
+            if slot[0] <= when < slot[1]:
+                return slot
+    return None
+
+
+def booked_statement(doctor_id: int, start: datetime, end: datetime):
+    """
+    (slot_start, slot_end) of the doctor's bookings overlapping [start, end),
+    in order, read through the (doctor_id, slot_start) index.
+    """
+    return (
+        select(Appointment.slot_start, Appointment.slot_end)
+        .where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.slot_start >= start - timedelta(minutes=MAX_SLOT_MINUTES),
+            Appointment.slot_start < end,
+            Appointment.slot_end > start,
+        )
+        .order_by(Appointment.slot_start)
+    )
+
+
+def free_slots(slots: Sequence[Slot], booked: Sequence[Slot]) -> List[Slot]:
+    """
+    Slots not overlapping any booking. Both inputs sorted by start.
+    """
+    free = []
+    index = 0
+    for start, end in slots:
+        # Bookings ending before this slot can't overlap it or any later one
+        while index < len(booked) and booked[index][1] <= start:
+            index += 1
+        overlap = False
+        probe = index
+        while probe < len(booked) and booked[probe][0] < end:
+            if booked[probe][1] > start:
+                overlap = True
+                break
+            probe += 1
+        if not overlap:
+            free.append((start, end))
+    return free
+
+
+def conflicts(doctor_id: int, slot: Slot, exclude_id: Optional[int] = None):
+    """
+    Statement selecting an appointment that overlaps `slot`, if any.
+    """
+    statement = booked_statement(doctor_id, *slot).with_only_columns(Appointment.id).limit(1)
+    if exclude_id is not None:
+        statement = statement.where(Appointment.id != exclude_id)
+    return statement
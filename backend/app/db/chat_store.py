@@ -0,0 +1,297 @@
+"""
+Consultation chat persistence.
+
+Messages get their sequence number as they arrive and are broadcast at
+once; rows are written behind, in batches, by a background task. A burst
+of chat costs one INSERT ... VALUES (...), (...) and one commit per batch
+rather than one per frame.
+
+A batch that finds the database locked is kept for the next flush, a few
+times at most. Any other failure means a bad row (a consultation that no
+longer exists, say): the batch is then written row by row and the rows
+that still fail are logged and dropped, so they can't hold up the rest.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.retry import is_busy
+from app.models.chat import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+_table = ChatMessage.__table__
+
+
+class SequenceGenerator:
+    """
+    Time-ordered ids without a database round trip:
+    milliseconds since EPOCH_MS << 12 | worker id (5 bits) << 7 | counter (7 bits).
+    Stays below 2**53 until 2093, so JavaScript clients read it exactly.
+    """
+
+    EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+    WORKER_BITS = 5
+    COUNTER_BITS = 7
+
+    def __init__(self, worker_id: int):
+        if not 0 <= worker_id < 1 << self.WORKER_BITS:
+            raise ValueError(f"Chat worker id must be 0-{(1 << self.WORKER_BITS) - 1}, got {worker_id}")
+        self.worker_id = worker_id
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._counter = 0
+
+    def next(self) -> int:
+        with self._lock:
+            now = max(int(time.time() * 1000), self._last_ms)  # never step back with the clock
+            if now == self._last_ms:
+                self._counter = (self._counter + 1) & ((1 << self.COUNTER_BITS) - 1)
+                if self._counter == 0:
+                    # Counter wrapped within this millisecond, borrow the next one
+                    now += 1
+            else:
+                self._counter = 0
+            self._last_ms = now
+            return ((now - self.EPOCH_MS) << (self.WORKER_BITS + self.COUNTER_BITS)) | (
+                self.worker_id << self.COUNTER_BITS
+            ) | self._counter
+
+
+def chat_worker_id() -> int:
+    """
+    This worker's id in sequence numbers. Workers sharing chat rooms (any
+    pub/sub backend but memory) must each be given their own through
+    CHAT_WORKER_ID; two with the same id could issue the same seq. A single
+    worker is 0.
+    """
+    if settings.CHAT_WORKER_ID is not None:
+        return settings.CHAT_WORKER_ID
+    if settings.PUBSUB_BACKEND != "memory":
+        raise RuntimeError(
+            f"CHAT_WORKER_ID must be set, to a different value (0-{(1 << SequenceGenerator.WORKER_BITS) - 1}) "
+            f"on each worker, with PUBSUB_BACKEND={settings.PUBSUB_BACKEND}"
+        )
+    return 0
+
+
+def parse_frame(text: str) -> str:
+    """
+    The message text. Chat clients send {"text": ...}; anything else is
+    stored as plain text. A senderName in the frame is ignored, the sender
+    is whoever the socket authenticated as.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict) and isinstance(data.get("text"), str):
+        return data["text"]
+    return text
+
+
+def chat_frame(message: Dict[str, Any]) -> str:
+    """
+    Outgoing frame. Keeps the senderName/text shape clients already read,
+    plus seq for de-duplication and resume and senderUserId to tell whose
+    message it is.
+    """
+    return json.dumps({
+        "seq": message["seq"],
+        "consultationId": message["consultation_id"],
+        "senderUserId": message["sender_user_id"],
+        "senderName": message["sender_name"],
+        "text": message["body"],
+        "sentAt": message["created_at"].isoformat(),
+    })
+
+
+class ChatStore:
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine] = None,
+        worker_id: Optional[int] = None,
+        batch_size: int = settings.CHAT_FLUSH_BATCH_SIZE,
+        flush_interval: float = settings.CHAT_FLUSH_INTERVAL_MS / 1000,
+        max_pending: int = settings.CHAT_BUFFER_MAX,
+        max_attempts: int = settings.CHAT_FLUSH_MAX_ATTEMPTS,
+    ):
+        self._engine = engine
+        # Resolved on start() when not given, so a misconfigured worker
+        # fails at startup rather than on import
+        self.sequence: Optional[SequenceGenerator] = None if worker_id is None else SequenceGenerator(worker_id)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._busy_attempts = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.dropped_rows = 0
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            from app.db.async_session import async_engine
+            self._engine = async_engine
+        return self._engine
+
+    def start(self) -> None:
+        if self.sequence is None:
+            self.sequence = SequenceGenerator(chat_worker_id())
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def append(
+        self,
+        consultation_id: int,
+        text: str,
+        sender_user_id: Optional[int] = None,
+        sender_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Assign a sequence number and queue the message for writing.
+        Returns the message so it can be broadcast right away.
+        """
+        self.start()
+        message = {
+            "consultation_id": consultation_id,
+            "seq": self.sequence.next(),
+            "created_at": datetime.utcnow(),
+            "sender_user_id": sender_user_id,
+            "sender_name": sender_name,
+            "body": parse_frame(text),
+        }
+        self._pending.append(message)
+        if len(self._pending) >= self.max_pending:
+            # Writer is behind; make this sender wait for it
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Chat flush failed, %d messages pending", len(self._pending))
+        elif len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return message
+
+    async def flush(self) -> int:
+        """
+        Write everything queued so far in one transaction. Returns the
+        number of rows written; raises, keeping the rows, only while the
+        database is locked and the batch has attempts left.
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                await self._insert(batch)
+                written = len(batch)
+            except OperationalError as error:
+                if not is_busy(error) or self._busy_attempts + 1 >= self.max_attempts:
+                    written = await self._insert_each(batch)
+                else:
+                    # Keep the rows and retry on the next flush
+                    self._busy_attempts += 1
+                    self._pending[:0] = batch
+                    raise
+            except Exception:
+                written = await self._insert_each(batch)
+            self._busy_attempts = 0
+            self.flushed_rows += written
+            self.flushed_batches += 1
+            return written
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with self.engine.begin() as connection:
+            await connection.execute(_table.insert(), rows)
+
+    async def _insert_each(self, batch: List[Dict[str, Any]]) -> int:
+        written = 0
+        for message in batch:
+            try:
+                await self._insert([message])
+                written += 1
+            except Exception as error:
+                self.dropped_rows += 1
+                logger.error(
+                    "Dropped chat message seq %s of consultation %s: %s",
+                    message["seq"], message["consultation_id"], error,
+                )
+        return written
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Chat flush failed, %d messages pending", len(self._pending))
+
+    async def history(
+        self,
+        consultation_id: int,
+        after_seq: Optional[int] = None,
+        before_seq: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        Messages in seq order. `after_seq` pages forward (and resumes a
+        dropped connection), `before_seq` pages back from the newest.
+        """
+        try:
+            await self.flush()
+        except Exception:
+            # Serve what is stored; the buffered rows are retried later
+            logger.exception("Chat flush failed, %d messages pending", len(self._pending))
+        statement = select(_table).where(_table.c.consultation_id == consultation_id)
+        if after_seq is not None:
+            statement = statement.where(_table.c.seq > after_seq).order_by(_table.c.seq.asc(), _table.c.id.asc())
+        else:
+            if before_seq is not None:
+                statement = statement.where(_table.c.seq < before_seq)
+            statement = statement.order_by(_table.c.seq.desc(), _table.c.id.desc())
+        async with self.engine.connect() as connection:
+            rows = [dict(row._mapping) for row in await connection.execute(statement.limit(limit))]
+        if after_seq is None:
+            rows.reverse()
+        return rows
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "flushed_rows": self.flushed_rows,
+            "flushed_batches": self.flushed_batches,
+            "dropped_rows": self.dropped_rows,
+        }
+
+
+chat_store = ChatStore()
@@ -0,0 +1,216 @@
+"""
+Dashboard counters kept in the `statcounter` rollup table.
+
+Every write to the counted models adjusts the matching rows from mapper
+events, inside the same transaction, so reading the dashboard is a handful
+of primary-key lookups instead of COUNT(*) scans.
+
+Counters:
+- appointments: daily, keyed by the appointment's own date, clinic-wide and per doctor
+- patients, beds_available, labs_pending: gauges (day ""), plus a daily row
+  holding the net change made on that day, used for the *_delta figures
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel, Session
+
+from app.models.appointment import Appointment
+from app.models.bed import Bed, BedStatus
+from app.models.lab_result import LabResult
+from app.models.stats import StatCounter
+from app.models.user import Patient
+
+APPOINTMENTS = "appointments"
+PATIENTS = "patients"
+BEDS_AVAILABLE = "beds_available"
+LABS_PENDING = "labs_pending"
+GAUGES = (PATIENTS, BEDS_AVAILABLE, LABS_PENDING)
+
+ALL_DOCTORS = 0
+TOTAL = ""
+
+_table = StatCounter.__table__
+
+
+def day_key(value) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+
+def bump(connection: Connection, name: str, delta: int, day: str = TOTAL, doctor_id: int = ALL_DOCTORS) -> None:
+    """
+    Add `delta` to one counter row, creating it when missing.
+    """
+    if not delta:
+        return
+    key = {"name": name, "day": day, "doctor_id": doctor_id or ALL_DOCTORS}
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            insert = sqlite_insert
+        else:
+            # Imported here so SQLite deployments never load the PostgreSQL dialect
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(_table).values(value=delta, **key)
+        statement = statement.on_conflict_do_update(
+            index_elements=["name", "day", "doctor_id"],
+            set_={"value": _table.c.value + statement.excluded.value},
+        )
+        connection.execute(statement)
+        return
+    where = [_table.c[column] == value for column, value in key.items()]
+    updated = connection.execute(_table.update().where(*where).values(value=_table.c.value + delta))
+    if not updated.rowcount:
+        connection.execute(_table.insert().values(value=delta, **key))
+
+
+def bump_gauge(connection: Connection, name: str, delta: int) -> None:
+    bump(connection, name, delta)
+    bump(connection, name, delta, day=day_key(date.today()))
+
+
+def read_counters(db: Session, keys: Iterable[Tuple[str, str, int]]) -> Dict[Tuple[str, str, int], int]:
+    """
+    Fetch several counters in one query. Missing rows read as 0.
+    """
+    keys = list(keys)
+    rows = db.exec(
+        select(StatCounter.name, StatCounter.day, StatCounter.doctor_id, StatCounter.value).where(
+            StatCounter.name.in_({name for name, _, _ in keys}),
+            StatCounter.day.in_({day for _, day, _ in keys}),
+            StatCounter.doctor_id.in_({doctor_id for _, _, doctor_id in keys}),
+        )
+    ).all()
+    found = {(row.name, row.day, row.doctor_id): row.value for row in rows}
+    return {key: found.get(key, 0) for key in keys}
+
+
+# ---------------------------------------------------------------------------
+# Rebuild
+# ---------------------------------------------------------------------------
+
+def rebuild_counters(connection: Connection) -> None:
+    """
+    Recompute every counter from the base tables. Daily change rows for the
+    gauges cannot be recovered and start again from zero.
+    """
+    connection.execute(_table.delete())
+
+    appointments = connection.execute(
+        select(Appointment.doctor_id, Appointment.appointment_time)
+    ).all()
+    daily: Dict[Tuple[str, int], int] = {}
+    for doctor_id, appointment_time in appointments:
+        day = day_key(appointment_time)
+        daily[(day, ALL_DOCTORS)] = daily.get((day, ALL_DOCTORS), 0) + 1
+        daily[(day, doctor_id)] = daily.get((day, doctor_id), 0) + 1
+    rows = [
+        {"name": APPOINTMENTS, "day": day, "doctor_id": doctor_id, "value": value}
+        for (day, doctor_id), value in daily.items()
+    ]
+
+    gauges = {
+        PATIENTS: select(func.count(Patient.id)),
+        BEDS_AVAILABLE: select(func.count(Bed.id)).where(Bed.status == BedStatus.AVAILABLE),
+        LABS_PENDING: select(func.count(LabResult.id)).where(LabResult.status == "pending"),
+    }
+    for name, statement in gauges.items():
+        rows.append({"name": name, "day": TOTAL, "doctor_id": ALL_DOCTORS, "value": connection.execute(statement).scalar_one()})
+
+    connection.execute(_table.insert(), rows)
+
+
+@event.listens_for(StatCounter.__table__, "after_create")
+def _counter_table_created(target, connection, **kw):
+    # Other tables may not exist yet; backfill once the whole schema is in place
+    connection.info["rebuild_counters"] = True
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    if connection.info.pop("rebuild_counters", False):
+        rebuild_counters(connection)
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+def _previous(target, attribute: str):
+    """
+    Value of `attribute` before the flush in progress.
+    """
+    history = inspect(target).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, attribute)
+
+
+def _appointment_slot(appointment_time, doctor_id) -> Optional[Tuple[str, int]]:
+    if appointment_time is None:
+        return None
+    return day_key(appointment_time), doctor_id
+
+
+def _move_appointment(connection: Connection, slot: Optional[Tuple[str, int]], delta: int) -> None:
+    if slot is None:
+        return
+    day, doctor_id = slot
+    bump(connection, APPOINTMENTS, delta, day=day)
+    bump(connection, APPOINTMENTS, delta, day=day, doctor_id=doctor_id)
+
+
+@event.listens_for(Appointment, "after_insert")
+def _on_appointment_insert(mapper, connection, target):
+    _move_appointment(connection, _appointment_slot(target.appointment_time, target.doctor_id), 1)
+
+
+@event.listens_for(Appointment, "after_update")
+def _on_appointment_update(mapper, connection, target):
+    before = _appointment_slot(_previous(target, "appointment_time"), _previous(target, "doctor_id"))
+    after = _appointment_slot(target.appointment_time, target.doctor_id)
+    if before != after:
+        _move_appointment(connection, before, -1)
+        _move_appointment(connection, after, 1)
+
+
+@event.listens_for(Appointment, "after_delete")
+def _on_appointment_delete(mapper, connection, target):
+    _move_appointment(connection, _appointment_slot(target.appointment_time, target.doctor_id), -1)
+
+
+@event.listens_for(Patient, "after_insert")
+def _on_patient_insert(mapper, connection, target):
+    bump_gauge(connection, PATIENTS, 1)
+
+
+@event.listens_for(Patient, "after_delete")
+def _on_patient_delete(mapper, connection, target):
+    bump_gauge(connection, PATIENTS, -1)
+
+
+def _gauge_listeners(model, name: str, attribute: str, counted):
+    def on_insert(mapper, connection, target):
+        if counted(getattr(target, attribute)):
+            bump_gauge(connection, name, 1)
+
+    def on_update(mapper, connection, target):
+        delta = int(counted(getattr(target, attribute))) - int(counted(_previous(target, attribute)))
+        bump_gauge(connection, name, delta)
+
+    def on_delete(mapper, connection, target):
+        if counted(getattr(target, attribute)):
+            bump_gauge(connection, name, -1)
+
+    event.listen(model, "after_insert", on_insert)
+    event.listen(model, "after_update", on_update)
+    event.listen(model, "after_delete", on_delete)
+
+
+_gauge_listeners(Bed, BEDS_AVAILABLE, "status", lambda status: status == BedStatus.AVAILABLE)
+_gauge_listeners(LabResult, LABS_PENDING, "status", lambda status: status == "pending")
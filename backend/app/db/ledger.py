@@ -0,0 +1,150 @@
+"""
+Wallet balance changes.
+
+Money is held in integer minor units (kobo). Each change is one
+conditional UPDATE on the wallet row plus one append-only WalletEntry
+recording the signed amount and the resulting balance:
+
+    UPDATE wallet SET balance_minor = balance_minor - :amount
+    WHERE patient_id = :patient_id AND balance_minor >= :amount
+
+The database checks the funds and applies the debit in a single statement,
+so concurrent payments cannot both spend the same balance, and nothing
+holds a lock longer than the caller's transaction. Commit is left to the
+caller (see app/db/retry.py).
+"""
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional, Union
+
+from sqlalchemy import event, func, insert, literal, select, text, update
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel, Session
+
+from app.models.wallet import Wallet, WalletEntry
+
+OPENING = "opening"
+
+_wallets = Wallet.__table__
+_entries = WalletEntry.__table__
+
+_ENSURE_WALLET = text(
+    "INSERT INTO wallet (patient_id, balance_minor, balance, created_at, updated_at) "
+    "VALUES (:patient_id, 0, 0.0, :now, :now) ON CONFLICT (patient_id) DO NOTHING"
+)
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def to_minor(amount: Union[float, Decimal, str]) -> int:
+    """
+    Naira -> kobo, rounding half up at the second decimal place.
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_minor(amount_minor: int) -> float:
+    return amount_minor / 100
+
+
+def ensure_wallet(db: Session, patient_id: int) -> None:
+    """
+    Create the patient's wallet if missing; safe when racing another request.
+    """
+    db.execute(_ENSURE_WALLET, {"patient_id": patient_id, "now": datetime.utcnow()})
+
+
+def _apply(
+    db: Session,
+    patient_id: int,
+    delta: int,
+    entry_type: str,
+    transaction_id: Optional[int],
+) -> int:
+    balance = _wallets.c.balance_minor + delta
+    statement = (
+        update(_wallets)
+        .where(_wallets.c.patient_id == patient_id)
+        .values(balance_minor=balance, balance=balance / 100.0, updated_at=datetime.utcnow())
+        .returning(_wallets.c.id, _wallets.c.balance_minor)
+    )
+    if delta < 0:
+        statement = statement.where(_wallets.c.balance_minor >= -delta)
+    row = db.execute(statement).first()
+    if row is None:
+        raise InsufficientFunds(patient_id)
+    db.execute(
+        insert(_entries).values(
+            wallet_id=row.id,
+            patient_id=patient_id,
+            type=entry_type,
+            amount_minor=delta,
+            balance_after_minor=row.balance_minor,
+            transaction_id=transaction_id,
+            created_at=datetime.utcnow(),
+        )
+    )
+    return row.balance_minor
+
+
+def credit(db: Session, patient_id: int, amount_minor: int, entry_type: str, transaction_id: Optional[int] = None) -> int:
+    """
+    Add `amount_minor` to the wallet, creating it if needed. Returns the new balance.
+    """
+    if amount_minor <= 0:
+        raise ValueError("amount must be positive")
+    ensure_wallet(db, patient_id)
+    return _apply(db, patient_id, amount_minor, entry_type, transaction_id)
+
+
+def debit(db: Session, patient_id: int, amount_minor: int, entry_type: str, transaction_id: Optional[int] = None) -> int:
+    """
+    Take `amount_minor` from the wallet. Raises InsufficientFunds, changing
+    nothing, when the wallet is missing or the balance is too low.
+    """
+    if amount_minor <= 0:
+        raise ValueError("amount must be positive")
+    return _apply(db, patient_id, -amount_minor, entry_type, transaction_id)
+
+
+def ledger_balance(db: Session, wallet_id: int) -> int:
+    """
+    Balance recomputed from the ledger, for reconciliation against balance_minor.
+    """
+    return db.execute(
+        select(func.coalesce(func.sum(_entries.c.amount_minor), 0)).where(_entries.c.wallet_id == wallet_id)
+    ).scalar_one()
+
+
+def open_ledger(connection: Connection) -> None:
+    """
+    Give every wallet without entries an opening entry for its current
+    balance, so the ledger sums match from the start.
+    """
+    has_entries = select(_entries.c.id).where(_entries.c.wallet_id == _wallets.c.id).exists()
+    connection.execute(
+        insert(_entries).from_select(
+            ["wallet_id", "patient_id", "type", "amount_minor", "balance_after_minor", "created_at"],
+            select(
+                _wallets.c.id,
+                _wallets.c.patient_id,
+                literal(OPENING),
+                _wallets.c.balance_minor,
+                _wallets.c.balance_minor,
+                func.current_timestamp(),
+            ).where(_wallets.c.balance_minor != 0, ~has_entries),
+        )
+    )
+
+
+@event.listens_for(WalletEntry.__table__, "after_create")
+def _ledger_table_created(target, connection, **kw):
+    connection.info["open_ledger"] = True
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    if connection.info.pop("open_ledger", False):
+        open_ledger(connection)
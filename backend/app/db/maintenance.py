@@ -0,0 +1,80 @@
+"""
+Periodic maintenance jobs, run by app/core/scheduler.py.
+
+- overdue_invoices: marks pending invoices past their due date as overdue
+- purge: drops expired idempotency keys and old job history
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.scheduler import scheduler
+from app.db.ledger import to_minor
+from app.db.retry import run_with_retry
+from app.db.revenue import RollupBatch
+from app.models.idempotency import IdempotencyRecord
+from app.models.invoice import Invoice, InvoiceStatus
+
+_invoices = Invoice.__table__
+
+
+def sweep_overdue_invoices(db: Session, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Move pending invoices whose due date has passed to overdue, oldest
+    first, one short transaction per batch. Each batch is a range read on
+    ix_invoice_status_due_date, so the cost follows the number of invoices
+    falling due, not the size of the table.
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.OVERDUE_SWEEP_BATCH_SIZE
+    updated = batches = 0
+
+    def sweep_batch() -> Tuple[int, int]:
+        ids = db.execute(
+            select(_invoices.c.id)
+            .where(_invoices.c.status == InvoiceStatus.PENDING, _invoices.c.due_date < now)
+            .order_by(_invoices.c.due_date)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return 0, 0
+        # Re-check the status: an invoice paid meanwhile is left alone
+        moved = db.execute(
+            update(_invoices)
+            .where(_invoices.c.id.in_(ids), _invoices.c.status == InvoiceStatus.PENDING)
+            .values(status=InvoiceStatus.OVERDUE)
+            .returning(_invoices.c.due_date, _invoices.c.amount)
+        ).all()
+        rollups = RollupBatch()
+        for due_date, amount in moved:
+            rollups.invoice_status_changed(due_date, to_minor(amount), InvoiceStatus.PENDING, InvoiceStatus.OVERDUE)
+        rollups.apply(db.connection())
+        return len(ids), len(moved)
+
+    while True:
+        selected, moved = run_with_retry(db, sweep_batch)
+        if not selected:
+            break
+        updated += moved
+        batches += 1
+        if selected < batch_size:
+            break
+    return {"updated": updated, "batches": batches}
+
+
+@scheduler.job("overdue_invoices", interval=settings.OVERDUE_SWEEP_INTERVAL_SECONDS)
+def overdue_invoices(db: Session) -> Dict[str, Any]:
+    return sweep_overdue_invoices(db)
+
+
+@scheduler.job("purge", interval=settings.MAINTENANCE_PURGE_INTERVAL_SECONDS)
+def purge(db: Session) -> Dict[str, Any]:
+    idempotency_keys = db.execute(
+        delete(IdempotencyRecord.__table__).where(IdempotencyRecord.__table__.c.expires_at <= datetime.utcnow())
+    ).rowcount
+    job_runs = scheduler.prune_history(db, timedelta(days=settings.JOBS_HISTORY_RETENTION_DAYS))
+    db.commit()
+    return {"idempotency_keys": idempotency_keys, "job_runs": job_runs}
@@ -0,0 +1,63 @@
+"""
+Entry points to the schema migrations in app/db/migrations (Alembic).
+
+Deployments run them as a separate step, `alembic upgrade head` or
+`python -m app.db.migrate` from the backend directory; scripts and tests
+use upgrade() here. The application itself never touches the schema at
+startup unless DB_MIGRATE_ON_STARTUP is set.
+"""
+import sys
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+def alembic_config(engine: Optional[Engine] = None) -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    if engine is not None:
+        config.attributes["engine"] = engine
+    return config
+
+
+def upgrade(engine: Optional[Engine] = None, revision: str = "head") -> None:
+    """
+    Apply pending migrations up to `revision`, against the app's engine by
+    default.
+    """
+    command.upgrade(alembic_config(engine), revision)
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def head_revision() -> Optional[str]:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def check_schema(engine: Engine) -> None:
+    """
+    Raise if the database is not at the latest revision.
+    """
+    current, head = current_revision(engine), head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, the code expects {head}; "
+            "run `python -m app.db.migrate` from the backend directory"
+        )
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    upgrade(engine, sys.argv[1] if len(sys.argv) > 1 else "head")
+    print(f"Database schema is at revision {current_revision(engine)}")
@@ -0,0 +1,168 @@
+"""
+Operations for migrations that touch big tables while the app is running.
+
+Alembic runs each revision in one transaction. That is fine for DDL, but a
+backfill or index build over vitals or transactions would hold the write
+lock for its whole duration. These helpers instead commit as they go:
+
+- create_index_online: one short transaction per index on SQLite (in WAL
+  mode readers carry on while it builds), CREATE INDEX CONCURRENTLY on
+  PostgreSQL
+- backfill / backfill_rows: an UPDATE applied one id window at a time, each
+  window in its own transaction, so writers wait for one chunk at most
+
+Everything here is idempotent so a revision interrupted half way can simply
+be run again.
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core.config import settings
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table: str, column: str) -> bool:
+    return has_table(table) and column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def has_index(table: str, name: str) -> bool:
+    return has_table(table) and name in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def add_column(table: str, column: sa.Column) -> bool:
+    """
+    Add `column` unless the table is missing (a new database gets it from
+    the baseline) or already has it. Returns whether it was added.
+    """
+    if not has_table(table) or has_column(table, column.name):
+        return False
+    bind = op.get_bind()
+    if column.foreign_keys and bind.dialect.name == "sqlite":
+        # Alembic adds the FK as a separate ALTER, which SQLite lacks; an
+        # additive column may carry it inline though, no rebuild needed
+        (foreign_key,) = column.foreign_keys
+        target = foreign_key.target_fullname.split(".")
+        spec = sa.schema.CreateColumn(column).compile(dialect=bind.dialect)
+        op.execute(f'ALTER TABLE "{table}" ADD COLUMN {spec} REFERENCES "{target[0]}" ({target[1]})')
+    else:
+        op.add_column(table, column)
+    return True
+
+
+def create_table(name: str, *elements: Any) -> bool:
+    """
+    op.create_table() unless the table exists already (databases from
+    before migrations). Returns whether it was created.
+    """
+    if has_table(name):
+        return False
+    op.create_table(name, *elements)
+    return True
+
+
+@contextmanager
+def _chunk(bind: sa.engine.Connection) -> Iterator[None]:
+    # Inside autocommit_block every statement would commit on its own;
+    # group each chunk into one transaction instead
+    bind.exec_driver_sql("BEGIN")
+    try:
+        yield
+    except BaseException:
+        bind.exec_driver_sql("ROLLBACK")
+        raise
+    bind.exec_driver_sql("COMMIT")
+
+
+def create_index_online(name: str, table: str, columns: Sequence[str], unique: bool = False) -> bool:
+    """
+    Build an index without holding the migration's transaction open.
+    Returns whether it was created.
+    """
+    if not has_table(table) or has_index(table, name):
+        return False
+    with op.get_context().autocommit_block():
+        op.create_index(name, table, list(columns), unique=unique, if_not_exists=True, postgresql_concurrently=True)
+    return True
+
+
+def _id_windows(table: str, where: str, params: Dict[str, Any], chunk_size: int) -> Iterator[tuple]:
+    bind = op.get_bind()
+    low, high = bind.execute(
+        sa.text(f'SELECT min(id), max(id) FROM "{table}" WHERE {where}'), params
+    ).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, chunk_size):
+        yield start, start + chunk_size
+
+
+def backfill(
+    table: str,
+    assignments: str,
+    where: str = "1 = 1",
+    params: Optional[Dict[str, Any]] = None,
+    chunk_size: Optional[int] = None,
+) -> int:
+    """
+    UPDATE table SET <assignments> WHERE <where>, one id window per
+    transaction. Returns the number of rows updated.
+    """
+    params = params or {}
+    chunk_size = chunk_size or settings.MIGRATION_CHUNK_SIZE
+    bind = op.get_bind()
+    updated = 0
+    with op.get_context().autocommit_block():
+        for low, high in list(_id_windows(table, where, params, chunk_size)):
+            with _chunk(bind):
+                updated += bind.execute(
+                    sa.text(f'UPDATE "{table}" SET {assignments} WHERE id >= :_low AND id < :_high AND ({where})'),
+                    {**params, "_low": low, "_high": high},
+                ).rowcount
+    return updated
+
+
+def backfill_rows(
+    table: str,
+    columns: Dict[str, Any],
+    compute: Callable[[List[sa.Row]], List[Dict[str, Any]]],
+    where: str = "1 = 1",
+    types: Optional[Dict[str, Any]] = None,
+    chunk_size: Optional[int] = None,
+) -> int:
+    """
+    Backfill computed in Python. `compute` gets each chunk of rows (id plus
+    `columns`, a name -> type mapping, in id order) and returns the updates
+    to apply, as dicts with "id" and new column values of the given `types`.
+    One transaction per chunk. Returns the number of rows updated.
+    """
+    chunk_size = chunk_size or settings.MIGRATION_CHUNK_SIZE
+    types = types or {}
+    bind = op.get_bind()
+    select = sa.text(
+        f'SELECT {", ".join(["id", *columns])} FROM "{table}" '
+        f"WHERE id > :last_id AND ({where}) ORDER BY id LIMIT :limit"
+    ).columns(sa.column("id", sa.Integer), *(sa.column(name, type_) for name, type_ in columns.items()))
+    updated = 0
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while True:
+            rows = bind.execute(select, {"last_id": last_id, "limit": chunk_size}).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            updates = compute(rows)
+            if updates:
+                names = [name for name in updates[0] if name != "id"]
+                update = sa.text(
+                    f'UPDATE "{table}" SET {", ".join(f"{name} = :{name}" for name in names)} WHERE id = :id'
+                ).bindparams(*(sa.bindparam(name, type_=types[name]) for name in names if name in types))
+                with _chunk(bind):
+                    bind.execute(update, updates)
+                updated += len(updates)
+    return updated
@@ -0,0 +1,502 @@
+"""Baseline: the schema as it stood before versioned migrations
+
+Written out table by table, so it stays the same whatever the models say
+later. Indexes added after this point belong to the revisions that follow
+(0002 the unique slot index, 0003 the query indexes).
+
+Databases from before versioned migrations were built by create_all() on
+every startup plus the ALTER TABLEs of migrate_db.py. For those, the
+columns the scripts added are added first (only to tables that lack them)
+and only the tables they are missing are created. The derived data that
+create_all() hooks used to seed (search index, counters, wallet ledger,
+report rollups) is built here, in SQL written out as of this revision
+rather than by calling the app code that maintains it now.
+
+Downgrading drops every table of this schema, data included. For a
+database that predates migrations, restore the backup taken before the
+upgrade instead.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from typing import Any, List, Tuple
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import add_column, backfill, create_table
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    add_column("appointment", sa.Column("communication_preference", sa.String(14), server_default="IN_APP_CHAT"))
+    add_column("appointment", sa.Column("slot_start", sa.DateTime()))
+    add_column("appointment", sa.Column("slot_end", sa.DateTime()))
+    if add_column("wallet", sa.Column("balance_minor", sa.BigInteger(), nullable=False, server_default="0")):
+        backfill("wallet", "balance_minor = CAST(ROUND(balance * 100) AS INTEGER)")
+    add_column("invoice", sa.Column("doctor_id", sa.Integer(), sa.ForeignKey("doctor.id")))
+
+    created = {name for name, elements in _tables() if create_table(name, *elements)}
+
+    bind = op.get_bind()
+    _create_search_indexes(bind)
+    if "statcounter" in created:
+        for statement in _COUNTERS:
+            op.execute(statement)
+    if "walletentry" in created:
+        op.execute(_OPENING_ENTRIES)
+    if "revenuerollup" in created:
+        op.execute(_ROLLUPS)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS patient_search")
+        op.execute("DROP TABLE IF EXISTS clinical_search")
+    tables = _tables()
+    for name, _ in reversed(tables):
+        op.drop_table(name)
+    if bind.dialect.name == "postgresql":
+        # Enum types outlive their tables
+        enums = {e.type.name for _, elements in tables for e in elements if isinstance(getattr(e, "type", None), sa.Enum)}
+        for enum in sorted(enums):
+            op.execute(f"DROP TYPE IF EXISTS {enum}")
+
+
+# Search: SQLite FTS5 tables filled from the base tables, or on PostgreSQL
+# trigram and full-text expression indexes
+_SQLITE_SEARCH = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS patient_search USING fts5(
+        full_name, email, phone_number, date_of_birth, gender, blood_group, tokenize='trigram')""",
+    """INSERT INTO patient_search(rowid, full_name, email, phone_number, date_of_birth, gender, blood_group)
+    SELECT p.id, u.full_name, u.email, coalesce(u.phone_number, ''), coalesce(p.date_of_birth, ''),
+           coalesce(p.gender, ''), coalesce(p.blood_group, '')
+    FROM patient p JOIN "user" u ON u.id = p.user_id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clinical_search USING fts5(
+        kind UNINDEXED, doc_id UNINDEXED, patient_id UNINDEXED, doctor_id UNINDEXED,
+        recorded_at UNINDEXED, diagnosis, symptoms, treatment, notes, tokenize='porter unicode61')""",
+    # rowid = source id * 4 + kind code
+    """INSERT INTO clinical_search(rowid, kind, doc_id, patient_id, doctor_id, recorded_at,
+                                   diagnosis, symptoms, treatment, notes)
+    SELECT id * 4 + 1, 'medical_record', id, patient_id, doctor_id, visit_date,
+           diagnosis, symptoms, treatment, coalesce(notes, '') FROM medicalrecord
+    UNION ALL
+    SELECT id * 4 + 2, 'consultation', id, patient_id, doctor_id, created_at,
+           diagnosis, symptoms, '', coalesce(notes, '') FROM consultation
+    UNION ALL
+    SELECT id * 4 + 3, 'prescription', id, patient_id, doctor_id, created_at,
+           '', '', medication || ' ' || dosage || ' ' || frequency || ' ' || duration,
+           coalesce(instructions, '') FROM prescription""",
+]
+
+_POSTGRES_SEARCH = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS ix_user_full_name_trgm ON "user" USING gin (full_name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_user_email_trgm ON "user" USING gin (email gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_user_phone_number_trgm ON "user" USING gin (phone_number gin_trgm_ops)',
+    "CREATE INDEX IF NOT EXISTS ix_medical_record_fts ON medicalrecord USING gin ((to_tsvector('english', "
+    "diagnosis || ' ' || symptoms || ' ' || treatment || ' ' || coalesce(notes, ''))))",
+    "CREATE INDEX IF NOT EXISTS ix_consultation_fts ON consultation USING gin ((to_tsvector('english', "
+    "diagnosis || ' ' || symptoms || ' ' || coalesce(notes, ''))))",
+    "CREATE INDEX IF NOT EXISTS ix_prescription_fts ON prescription USING gin ((to_tsvector('english', "
+    "medication || ' ' || dosage || ' ' || frequency || ' ' || duration || ' ' || coalesce(instructions, ''))))",
+]
+
+
+def _create_search_indexes(bind: sa.engine.Connection) -> None:
+    if bind.dialect.name == "sqlite":
+        if bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'patient_search'")).first():
+            return
+        statements = _SQLITE_SEARCH
+    elif bind.dialect.name == "postgresql":
+        statements = _POSTGRES_SEARCH
+    else:
+        return
+    for statement in statements:
+        op.execute(statement)
+
+
+def _day(column: str) -> str:
+    return f"substr(CAST({column} AS TEXT), 1, 10)"
+
+
+def _minor(column: str) -> str:
+    return f"CAST(ROUND({column} * 100) AS BIGINT)"
+
+
+# Dashboard counters: appointments per day, clinic-wide (doctor 0) and per
+# doctor, and the patients / beds_available / labs_pending gauges (day '')
+_COUNTERS = [
+    f"""INSERT INTO statcounter (name, day, doctor_id, value)
+    SELECT 'appointments', day, 0, count(*) FROM (SELECT {_day('appointment_time')} AS day FROM appointment) a
+    GROUP BY day""",
+    f"""INSERT INTO statcounter (name, day, doctor_id, value)
+    SELECT 'appointments', day, doctor_id, count(*)
+    FROM (SELECT {_day('appointment_time')} AS day, doctor_id FROM appointment) a
+    GROUP BY day, doctor_id""",
+    "INSERT INTO statcounter (name, day, doctor_id, value) SELECT 'patients', '', 0, count(*) FROM patient",
+    """INSERT INTO statcounter (name, day, doctor_id, value)
+    SELECT 'beds_available', '', 0, count(*) FROM bed WHERE status = 'AVAILABLE'""",
+    """INSERT INTO statcounter (name, day, doctor_id, value)
+    SELECT 'labs_pending', '', 0, count(*) FROM labresult WHERE status = 'pending'""",
+]
+
+# Wallet ledger: an opening entry for each wallet's balance
+_OPENING_ENTRIES = """
+INSERT INTO walletentry (wallet_id, patient_id, type, amount_minor, balance_after_minor, created_at)
+SELECT w.id, w.patient_id, 'opening', w.balance_minor, w.balance_minor, CURRENT_TIMESTAMP
+FROM wallet w
+WHERE w.balance_minor != 0 AND NOT EXISTS (SELECT 1 FROM walletentry e WHERE e.wallet_id = w.id)
+"""
+
+# Billing rollups: invoiced per created day (all, per doctor), due per due
+# day and status, and completed transactions per day by type (all, per
+# payment method and, except top-ups, per doctor). Enums are stored by
+# name; the rollups key on their lower-case values.
+_ROLLUPS = f"""
+INSERT INTO revenuerollup (metric, day, dimension, bucket, "count", amount_minor)
+SELECT metric, day, dimension, bucket, sum(n), sum(amount_minor) FROM (
+    SELECT 'invoiced' AS metric, {_day('created_at')} AS day, 'all' AS dimension, '' AS bucket,
+           1 AS n, {_minor('amount')} AS amount_minor
+    FROM invoice
+    UNION ALL
+    SELECT 'invoiced', {_day('created_at')}, 'doctor', coalesce(CAST(doctor_id AS TEXT), ''), 1, {_minor('amount')}
+    FROM invoice
+    UNION ALL
+    SELECT 'due', {_day('due_date')}, 'status', lower(CAST(status AS TEXT)), 1, {_minor('amount')}
+    FROM invoice
+    UNION ALL
+    SELECT lower(CAST(type AS TEXT)), {_day('created_at')}, 'all', '', 1, {_minor('amount')}
+    FROM "transaction" WHERE status = 'COMPLETED'
+    UNION ALL
+    SELECT lower(CAST(type AS TEXT)), {_day('created_at')}, 'payment_method',
+           lower(CAST(payment_method AS TEXT)), 1, {_minor('amount')}
+    FROM "transaction" WHERE status = 'COMPLETED'
+    UNION ALL
+    SELECT lower(CAST(t.type AS TEXT)), {_day('t.created_at')}, 'doctor', coalesce(CAST(i.doctor_id AS TEXT), ''),
+           1, {_minor('t.amount')}
+    FROM "transaction" t LEFT JOIN invoice i ON i.id = t.invoice_id
+    WHERE t.status = 'COMPLETED' AND t.type != 'TOPUP'
+) contributions
+GROUP BY metric, day, dimension, bucket
+"""
+
+
+def _tables() -> List[Tuple[str, List[Any]]]:
+    # Fresh objects on every call: a Column belongs to one Table only.
+    # In dependency order, referenced tables first.
+    return [
+        ("idempotencyrecord", [
+            sa.Column("key", sa.String(), nullable=False),
+            sa.Column("request_hash", sa.String(), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=True),
+            sa.Column("content_type", sa.String(), nullable=True),
+            sa.Column("response_body", sa.LargeBinary(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("key"),
+            sa.Index("ix_idempotencyrecord_expires_at", "expires_at"),
+        ]),
+        ("joblease", [
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("owner", sa.String(), nullable=True),
+            sa.Column("locked_until", sa.DateTime(), nullable=False),
+            sa.Column("next_run_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        ]),
+        ("jobrun", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("owner", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=False),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.Column("duration_ms", sa.Float(), nullable=True),
+            sa.Column("result", sa.String(), nullable=True),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_jobrun_name_id", "name", "id"),
+        ]),
+        ("numbersequence", [
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("last_value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        ]),
+        ("revenuerollup", [
+            sa.Column("metric", sa.String(), nullable=False),
+            sa.Column("day", sa.String(), nullable=False),
+            sa.Column("dimension", sa.String(), nullable=False),
+            sa.Column("bucket", sa.String(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("amount_minor", sa.BigInteger(), server_default="0", nullable=False),
+            sa.PrimaryKeyConstraint("metric", "day", "dimension", "bucket"),
+        ]),
+        ("statcounter", [
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("day", sa.String(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=False),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("name", "day", "doctor_id"),
+        ]),
+        ("user", [
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("full_name", sa.String(), nullable=False),
+            sa.Column("role", sa.Enum("ADMIN", "DOCTOR", "PATIENT", "RECEPTIONIST", "NURSE", "PHARMACIST", "ACCOUNTANT", "LAB_TECH", name="userrole"), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("phone_number", sa.String(), nullable=True),
+            sa.Column("address", sa.String(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_user_email", "email", unique=True),
+            sa.Index("ix_user_full_name", "full_name"),
+        ]),
+        ("attendancelog", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("check_in_time", sa.DateTime(), nullable=False),
+            sa.Column("check_out_time", sa.DateTime(), nullable=True),
+            sa.Column("date", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_attendancelog_date", "date"),
+        ]),
+        ("doctor", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("specialization", sa.String(), nullable=False),
+            sa.Column("bio", sa.String(), nullable=True),
+            sa.Column("department", sa.String(), nullable=True),
+            sa.Column("consultation_fee", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id"),
+        ]),
+        ("patient", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("date_of_birth", sa.String(), nullable=True),
+            sa.Column("gender", sa.String(), nullable=True),
+            sa.Column("blood_group", sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id"),
+        ]),
+        ("appointment", [
+            sa.Column("doctor_id", sa.Integer(), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("appointment_time", sa.DateTime(), nullable=False),
+            sa.Column("type", sa.Enum("ONLINE", "OFFLINE", name="appointmenttype"), nullable=False),
+            sa.Column("status", sa.Enum("PENDING", "CONFIRMED", "COMPLETED", "CANCELLED", name="appointmentstatus"), nullable=False),
+            sa.Column("communication_preference", sa.Enum("IN_APP_CHAT", "VIDEO_WHATSAPP", name="communicationpreference"), nullable=False),
+            sa.Column("reason", sa.String(), nullable=True),
+            sa.Column("meeting_link", sa.String(), nullable=True),
+            sa.Column("notes", sa.String(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("slot_start", sa.DateTime(), nullable=True),
+            sa.Column("slot_end", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["doctor_id"], ["doctor.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("bed", [
+            sa.Column("ward_name", sa.String(), nullable=False),
+            sa.Column("bed_number", sa.String(), nullable=False),
+            sa.Column("status", sa.Enum("AVAILABLE", "OCCUPIED", "MAINTENANCE", name="bedstatus"), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("doctorschedule", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=False),
+            sa.Column("weekday", sa.Integer(), nullable=False),
+            sa.Column("start_time", sa.Time(), nullable=False),
+            sa.Column("end_time", sa.Time(), nullable=False),
+            sa.Column("slot_minutes", sa.Integer(), nullable=False),
+            sa.Column("valid_from", sa.Date(), nullable=True),
+            sa.Column("valid_to", sa.Date(), nullable=True),
+            sa.ForeignKeyConstraint(["doctor_id"], ["doctor.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_doctorschedule_doctor_id", "doctor_id"),
+        ]),
+        ("invoice", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("invoice_number", sa.String(), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("status", sa.Enum("PENDING", "PAID", "OVERDUE", "CANCELLED", "PARTIAL", name="invoicestatus"), nullable=False),
+            sa.Column("due_date", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["doctor_id"], ["doctor.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_invoice_invoice_number", "invoice_number", unique=True),
+        ]),
+        ("medicalrecord", [
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=False),
+            sa.Column("visit_date", sa.DateTime(), nullable=False),
+            sa.Column("diagnosis", sa.String(), nullable=False),
+            sa.Column("symptoms", sa.String(), nullable=False),
+            sa.Column("treatment", sa.String(), nullable=False),
+            sa.Column("notes", sa.String(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["doctor_id"], ["doctor.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("referral", [
+            sa.Column("from_doctor_id", sa.Integer(), nullable=False),
+            sa.Column("to_doctor_id", sa.Integer(), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("reason", sa.String(), nullable=False),
+            sa.Column("urgency", sa.Enum("ROUTINE", "URGENT", "EMERGENCY", name="referralurgency"), nullable=False),
+            sa.Column("status", sa.Enum("PENDING", "ACCEPTED", "REJECTED", name="referralstatus"), nullable=False),
+            sa.Column("notes", sa.String(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["from_doctor_id"], ["doctor.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.ForeignKeyConstraint(["to_doctor_id"], ["doctor.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("vitals", [
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("weight", sa.Float(), nullable=True),
+            sa.Column("height", sa.Float(), nullable=True),
+            sa.Column("blood_pressure", sa.String(), nullable=True),
+            sa.Column("heart_rate", sa.Integer(), nullable=True),
+            sa.Column("temperature", sa.Float(), nullable=True),
+            sa.Column("oxygen_saturation", sa.Integer(), nullable=True),
+            sa.Column("recorded_at", sa.DateTime(), nullable=False),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("wallet", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("balance_minor", sa.BigInteger(), server_default="0", nullable=False),
+            sa.Column("balance", sa.Float(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("patient_id"),
+        ]),
+        ("consultation", [
+            sa.Column("appointment_id", sa.Integer(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("symptoms", sa.String(), nullable=False),
+            sa.Column("diagnosis", sa.String(), nullable=False),
+            sa.Column("notes", sa.String(), nullable=True),
+            sa.Column("follow_up_date", sa.DateTime(), nullable=True),
+            sa.Column("is_admitted", sa.Boolean(), nullable=False),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["appointment_id"], ["appointment.id"]),
+            sa.ForeignKeyConstraint(["doctor_id"], ["doctor.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("invoiceitem", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("invoice_id", sa.Integer(), nullable=False),
+            sa.Column("description", sa.String(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["invoice_id"], ["invoice.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("transaction", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("invoice_id", sa.Integer(), nullable=True),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("type", sa.Enum("PAYMENT", "REFUND", "TOPUP", name="transactiontype"), nullable=False),
+            sa.Column("payment_method", sa.Enum("CASH", "TRANSFER", "WALLET", "CARD", name="paymentmethod"), nullable=False),
+            sa.Column("status", sa.Enum("COMPLETED", "PENDING", "FAILED", name="transactionstatus"), nullable=False),
+            sa.Column("reference", sa.String(), nullable=False),
+            sa.Column("cashier_name", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["invoice_id"], ["invoice.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("reference"),
+        ]),
+        ("chatmessage", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("consultation_id", sa.Integer(), nullable=False),
+            sa.Column("seq", sa.BigInteger(), nullable=False),
+            sa.Column("sender_name", sa.String(), nullable=True),
+            sa.Column("body", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["consultation_id"], ["consultation.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_chatmessage_consultation_id_seq", "consultation_id", "seq"),
+        ]),
+        ("labresult", [
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("test_name", sa.String(), nullable=False),
+            sa.Column("result", sa.String(), nullable=False),
+            sa.Column("units", sa.String(), nullable=True),
+            sa.Column("reference_range", sa.String(), nullable=True),
+            sa.Column("notes", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("recorded_at", sa.DateTime(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=True),
+            sa.Column("consultation_id", sa.Integer(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["consultation_id"], ["consultation.id"]),
+            sa.ForeignKeyConstraint(["doctor_id"], ["doctor.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("prescription", [
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=False),
+            sa.Column("medication", sa.String(), nullable=False),
+            sa.Column("dosage", sa.String(), nullable=False),
+            sa.Column("frequency", sa.String(), nullable=False),
+            sa.Column("duration", sa.String(), nullable=False),
+            sa.Column("instructions", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("consultation_id", sa.Integer(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["consultation_id"], ["consultation.id"]),
+            sa.ForeignKeyConstraint(["doctor_id"], ["doctor.id"]),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        ]),
+        ("walletentry", [
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("wallet_id", sa.Integer(), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("amount_minor", sa.BigInteger(), nullable=False),
+            sa.Column("balance_after_minor", sa.BigInteger(), nullable=False),
+            sa.Column("transaction_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["patient_id"], ["patient.id"]),
+            sa.ForeignKeyConstraint(["transaction_id"], ["transaction.id"]),
+            sa.ForeignKeyConstraint(["wallet_id"], ["wallet.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_walletentry_wallet_id_id", "wallet_id", "id"),
+        ]),
+    ]
@@ -0,0 +1,55 @@
+"""Give existing appointments their slot and enforce one booking per slot
+
+Live bookings keep their time as their slot, 30 minutes long. Where a
+doctor was double-booked only the earliest booking holds the slot, so the
+unique (doctor_id, slot_start) index can be built.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import backfill_rows, create_index_online, has_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+SLOT_MINUTES = 30
+
+
+def upgrade() -> None:
+    if has_index("appointment", "ux_appointment_doctor_id_slot_start"):
+        return
+    claimed = set(op.get_bind().execute(
+        sa.text("SELECT doctor_id, slot_start FROM appointment WHERE slot_start IS NOT NULL")
+        .columns(sa.column("doctor_id", sa.Integer), sa.column("slot_start", sa.DateTime))
+    ).all())
+
+    def assign(rows):
+        updates = []
+        for row in rows:
+            start = row.appointment_time.replace(tzinfo=None)
+            if (row.doctor_id, start) in claimed:
+                continue
+            claimed.add((row.doctor_id, start))
+            updates.append({"id": row.id, "slot_start": start, "slot_end": start + timedelta(minutes=SLOT_MINUTES)})
+        return updates
+
+    backfill_rows(
+        "appointment",
+        {"doctor_id": sa.Integer, "appointment_time": sa.DateTime},
+        assign,
+        where="status != 'CANCELLED' AND slot_start IS NULL",
+        types={"slot_start": sa.DateTime, "slot_end": sa.DateTime},
+    )
+    create_index_online("ux_appointment_doctor_id_slot_start", "appointment", ["doctor_id", "slot_start"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_appointment_doctor_id_slot_start", table_name="appointment")
@@ -0,0 +1,60 @@
+"""Indexes for the list, timeline and foreign-key lookups
+
+Each is built online, and skipped where a database from before migrations
+already has it (migrate_db.py used to create them by hand).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+from app.db.migrations.helpers import create_index_online
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_appointment_appointment_time", "appointment", ["appointment_time"]),
+    ("ix_appointment_doctor_id_appointment_time", "appointment", ["doctor_id", "appointment_time"]),
+    ("ix_appointment_patient_id_appointment_time", "appointment", ["patient_id", "appointment_time"]),
+    ("ix_attendancelog_user_id_check_in_time", "attendancelog", ["user_id", "check_in_time"]),
+    ("ix_attendancelog_user_id_date", "attendancelog", ["user_id", "date"]),
+    ("ix_bed_status", "bed", ["status"]),
+    ("ix_consultation_appointment_id", "consultation", ["appointment_id"]),
+    ("ix_consultation_patient_id_created_at", "consultation", ["patient_id", "created_at"]),
+    ("ix_invoice_created_at", "invoice", ["created_at"]),
+    ("ix_invoice_patient_id_created_at", "invoice", ["patient_id", "created_at"]),
+    ("ix_invoice_status_due_date", "invoice", ["status", "due_date"]),
+    ("ix_invoiceitem_invoice_id", "invoiceitem", ["invoice_id"]),
+    ("ix_labresult_consultation_id", "labresult", ["consultation_id"]),
+    ("ix_labresult_patient_id_recorded_at", "labresult", ["patient_id", "recorded_at"]),
+    ("ix_labresult_recorded_at", "labresult", ["recorded_at"]),
+    ("ix_labresult_status", "labresult", ["status"]),
+    ("ix_medicalrecord_patient_id_visit_date", "medicalrecord", ["patient_id", "visit_date"]),
+    ("ix_medicalrecord_visit_date", "medicalrecord", ["visit_date"]),
+    ("ix_prescription_consultation_id", "prescription", ["consultation_id"]),
+    ("ix_prescription_created_at", "prescription", ["created_at"]),
+    ("ix_prescription_patient_id_created_at", "prescription", ["patient_id", "created_at"]),
+    ("ix_referral_to_doctor_id", "referral", ["to_doctor_id"]),
+    ("ix_transaction_invoice_id", "transaction", ["invoice_id"]),
+    ("ix_transaction_patient_id_created_at", "transaction", ["patient_id", "created_at"]),
+    ("ix_vitals_patient_id_recorded_at", "vitals", ["patient_id", "recorded_at"]),
+    ("ix_vitals_recorded_at", "vitals", ["recorded_at"]),
+    ("ix_walletentry_patient_id_id", "walletentry", ["patient_id", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+    if op.get_bind().dialect.name == "sqlite":
+        # Planner statistics, so the new indexes get picked
+        op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
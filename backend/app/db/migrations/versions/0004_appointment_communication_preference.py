@@ -0,0 +1,51 @@
+"""Rebuild appointment.communication_preference as NOT NULL without a default
+
+The old migrate_db.py added this column as nullable TEXT defaulting to
+'in_app_chat', the enum's value, while the ORM stores enum names
+('IN_APP_CHAT'), so defaulted rows could not be loaded. Values are fixed in
+chunks, then the table is rebuilt (SQLite can't alter a column in place)
+to match the model.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import backfill
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def _column():
+    columns = sa.inspect(op.get_bind()).get_columns("appointment")
+    return next(column for column in columns if column["name"] == "communication_preference")
+
+
+def upgrade() -> None:
+    column = _column()
+    if not column["nullable"] and column["default"] is None:
+        return
+    backfill(
+        "appointment",
+        "communication_preference = upper(coalesce(communication_preference, 'IN_APP_CHAT'))",
+        where="communication_preference IS NULL OR communication_preference != upper(communication_preference)",
+    )
+    with op.batch_alter_table("appointment", recreate="always") as batch:
+        batch.alter_column(
+            "communication_preference",
+            existing_type=column["type"],
+            type_=sa.String(14),
+            nullable=False,
+            server_default=None,
+        )
+
+
+def downgrade() -> None:
+    # The column is left NOT NULL: the old nullable form only ever held
+    # values this repaired, and 0001 creates new databases without it
+    pass
@@ -0,0 +1,28 @@
+"""Record who sent each chat message
+
+The sender used to be whatever name the client put in its frame. It is now
+the authenticated user; existing rows keep their name and no user.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations.helpers import add_column
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    add_column("chatmessage", sa.Column("sender_user_id", sa.Integer(), sa.ForeignKey("user.id")))
+
+
+def downgrade() -> None:
+    # SQLite can't drop a column that is part of a foreign key in place
+    with op.batch_alter_table("chatmessage") as batch:
+        batch.drop_column("sender_user_id")
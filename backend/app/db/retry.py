@@ -0,0 +1,63 @@
+"""
+Bounded retry for short write transactions that lose a lock race.
+
+SQLite answers "database is locked" when busy_timeout runs out, and
+immediately when a read transaction tries to upgrade to a write after
+another connection committed (the WAL snapshot is stale). PostgreSQL
+reports serialization failures and deadlocks. In every case the whole
+unit of work can simply run again.
+"""
+import logging
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_SQLITE_BUSY = ("database is locked", "database is busy", "database table is locked")
+_POSTGRES_RETRYABLE = ("40001", "40P01")  # serialization_failure, deadlock_detected
+
+
+def is_busy(error: OperationalError) -> bool:
+    if getattr(error.orig, "pgcode", None) in _POSTGRES_RETRYABLE:
+        return True
+    message = str(error.orig).lower()
+    return any(text in message for text in _SQLITE_BUSY)
+
+
+def run_with_retry(
+    db: Session,
+    work: Callable[[], T],
+    attempts: Optional[int] = None,
+    backoff_ms: Optional[float] = None,
+) -> T:
+    """
+    Run `work()` and commit. On a busy/serialization error roll back and run
+    it again, up to `attempts` times in total, with jittered exponential
+    backoff. `work` must build everything it writes afresh on each call.
+    """
+    attempts = attempts or settings.DB_BUSY_RETRIES
+    backoff_ms = settings.DB_BUSY_BACKOFF_MS if backoff_ms is None else backoff_ms
+    for attempt in range(1, attempts + 1):
+        try:
+            result = work()
+            db.commit()
+            return result
+        except OperationalError as error:
+            db.rollback()
+            if attempt == attempts or not is_busy(error):
+                raise
+            delay = backoff_ms * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5) / 1000
+            logger.info("Write conflict (%s), retry %d/%d in %.3fs", error.orig, attempt, attempts - 1, delay)
+            time.sleep(delay)
+        except Exception:
+            db.rollback()
+            raise
+    raise AssertionError("unreachable")
@@ -0,0 +1,175 @@
+"""
+Billing rollups kept in the `revenuerollup` table.
+
+Writers collect their changes in a RollupBatch and apply it inside their
+own transaction, so the reports (app/api/v1/endpoints/billing_reports.py)
+sum a few rows per day instead of scanning invoices and transactions.
+
+Rows, keyed (metric, day, dimension, bucket):
+- invoiced / <created day> / all | doctor
+- payment, topup, refund / <transaction day> / all | payment_method | doctor
+- due / <due day> / status: invoices currently in each status, moved on
+  every status change; aging and receivables read these
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from app.db.ledger import to_minor
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.stats import RevenueRollup
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+
+INVOICED = "invoiced"
+DUE = "due"
+
+ALL = "all"
+PAYMENT_METHOD = "payment_method"
+DOCTOR = "doctor"
+STATUS = "status"
+
+# Statuses still owed, as counted by aging and receivables
+OPEN_STATUSES = (InvoiceStatus.PENDING.value, InvoiceStatus.OVERDUE.value, InvoiceStatus.PARTIAL.value)
+
+_table = RevenueRollup.__table__
+
+Key = Tuple[str, str, str, str]
+
+
+def day_key(value: Union[date, datetime]) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+
+def _value(enum_or_str) -> str:
+    return getattr(enum_or_str, "value", enum_or_str)
+
+
+class RollupBatch:
+    """
+    Accumulates rollup changes so a whole request (or batch of invoices)
+    costs a single multi-row upsert.
+    """
+
+    def __init__(self):
+        self.rows: Dict[Key, List[int]] = {}
+
+    def add(self, metric: str, day: str, dimension: str = ALL, bucket: str = "", count: int = 1, amount_minor: int = 0) -> None:
+        row = self.rows.setdefault((metric, day, dimension, bucket), [0, 0])
+        row[0] += count
+        row[1] += amount_minor
+
+    def invoice_created(
+        self,
+        created_at: datetime,
+        due_date: datetime,
+        amount_minor: int,
+        doctor_id: Optional[int] = None,
+        status=InvoiceStatus.PENDING,
+    ) -> None:
+        day = day_key(created_at)
+        self.add(INVOICED, day, amount_minor=amount_minor)
+        self.add(INVOICED, day, DOCTOR, str(doctor_id or ""), amount_minor=amount_minor)
+        self.add(DUE, day_key(due_date), STATUS, _value(status), amount_minor=amount_minor)
+
+    def invoice_status_changed(self, due_date: datetime, amount_minor: int, old, new, count: int = 1) -> None:
+        old, new = _value(old), _value(new)
+        if old == new:
+            return
+        day = day_key(due_date)
+        self.add(DUE, day, STATUS, old, count=-count, amount_minor=-amount_minor)
+        self.add(DUE, day, STATUS, new, count=count, amount_minor=amount_minor)
+
+    def transaction_recorded(
+        self,
+        created_at: datetime,
+        transaction_type,
+        payment_method,
+        amount_minor: int,
+        doctor_id: Optional[int] = None,
+    ) -> None:
+        metric, day = _value(transaction_type), day_key(created_at)
+        self.add(metric, day, amount_minor=amount_minor)
+        self.add(metric, day, PAYMENT_METHOD, _value(payment_method), amount_minor=amount_minor)
+        if metric != TransactionType.TOPUP.value:
+            # Bucket "" holds invoice payments with no doctor attached
+            self.add(metric, day, DOCTOR, str(doctor_id or ""), amount_minor=amount_minor)
+
+    def apply(self, connection: Connection) -> None:
+        rows = [
+            {"metric": metric, "day": day, "dimension": dimension, "bucket": bucket, "count": count, "amount_minor": amount}
+            for (metric, day, dimension, bucket), (count, amount) in self.rows.items()
+            if count or amount
+        ]
+        self.rows = {}
+        if not rows:
+            return
+        dialect = connection.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                insert = sqlite_insert
+            else:
+                # Imported here so SQLite deployments never load the PostgreSQL dialect
+                from sqlalchemy.dialects.postgresql import insert
+            statement = insert(_table)
+            statement = statement.on_conflict_do_update(
+                index_elements=["metric", "day", "dimension", "bucket"],
+                set_={
+                    "count": _table.c.count + statement.excluded.count,
+                    "amount_minor": _table.c.amount_minor + statement.excluded.amount_minor,
+                },
+            )
+            connection.execute(statement, rows)
+            return
+        for row in rows:
+            where = [_table.c[column] == row[column] for column in ("metric", "day", "dimension", "bucket")]
+            updated = connection.execute(
+                _table.update().where(*where).values(
+                    count=_table.c.count + row["count"], amount_minor=_table.c.amount_minor + row["amount_minor"]
+                )
+            )
+            if not updated.rowcount:
+                connection.execute(_table.insert().values(**row))
+
+
+# ---------------------------------------------------------------------------
+# Rebuild
+# ---------------------------------------------------------------------------
+
+def rebuild_rollups(connection: Connection) -> None:
+    """
+    Recompute every rollup from invoices and completed transactions.
+    """
+    connection.execute(_table.delete())
+    batch = RollupBatch()
+    invoices = connection.execute(
+        select(Invoice.created_at, Invoice.due_date, Invoice.amount, Invoice.doctor_id, Invoice.status)
+    )
+    for created_at, due_date, amount, doctor_id, status in invoices:
+        batch.invoice_created(created_at, due_date, to_minor(amount), doctor_id, status)
+    transactions = connection.execute(
+        select(
+            Transaction.created_at, Transaction.type, Transaction.payment_method, Transaction.amount, Invoice.doctor_id
+        )
+        .outerjoin(Invoice, Invoice.id == Transaction.invoice_id)
+        .where(Transaction.status == TransactionStatus.COMPLETED)
+    )
+    for created_at, transaction_type, payment_method, amount, doctor_id in transactions:
+        batch.transaction_recorded(created_at, transaction_type, payment_method, to_minor(amount), doctor_id)
+    batch.apply(connection)
+
+
+@event.listens_for(RevenueRollup.__table__, "after_create")
+def _rollup_table_created(target, connection, **kw):
+    connection.info["rebuild_rollups"] = True
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    if connection.info.pop("rebuild_rollups", False):
+        rebuild_rollups(connection)
@@ -0,0 +1,498 @@
+"""
+Search indexes that live next to the regular tables.
+
+SQLite: FTS5 virtual tables, created with the schema and kept in sync from
+mapper events inside the writing transaction.
+PostgreSQL: pg_trgm GIN indexes on the base columns, nothing to sync.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel, Session
+
+from app.models.user import User, Patient
+from app.models.consultation import Consultation
+from app.models.medical_record import MedicalRecord
+from app.models.prescription import Prescription
+
+PATIENT_INDEX = "patient_search"
+CLINICAL_INDEX = "clinical_search"
+# Below this trigram similarity a fuzzy candidate is discarded (pg_trgm default)
+SIMILARITY_THRESHOLD = 0.3
+FUZZY_CANDIDATES = 200
+
+
+# ---------------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------------
+
+_PATIENT_DOCUMENT = f"""
+INSERT INTO {PATIENT_INDEX}(rowid, full_name, email, phone_number, date_of_birth, gender, blood_group)
+SELECT p.id, u.full_name, u.email, coalesce(u.phone_number, ''), coalesce(p.date_of_birth, ''),
+       coalesce(p.gender, ''), coalesce(p.blood_group, '')
+FROM patient p JOIN "user" u ON u.id = p.user_id
+"""
+
+# Clinical documents share one FTS table. rowid = source id * 4 + kind code,
+# so a document can be replaced without scanning the UNINDEXED columns.
+CLINICAL_KINDS = {"medical_record": 1, "consultation": 2, "prescription": 3}
+
+_CLINICAL_SOURCES = {
+    "medical_record": (
+        "SELECT id * 4 + 1, 'medical_record', id, patient_id, doctor_id, visit_date, "
+        "diagnosis, symptoms, treatment, coalesce(notes, '') FROM medicalrecord"
+    ),
+    "consultation": (
+        "SELECT id * 4 + 2, 'consultation', id, patient_id, doctor_id, created_at, "
+        "diagnosis, symptoms, '', coalesce(notes, '') FROM consultation"
+    ),
+    "prescription": (
+        "SELECT id * 4 + 3, 'prescription', id, patient_id, doctor_id, created_at, "
+        "'', '', medication || ' ' || dosage || ' ' || frequency || ' ' || duration, "
+        "coalesce(instructions, '') FROM prescription"
+    ),
+}
+
+_CLINICAL_INSERT = (
+    f"INSERT INTO {CLINICAL_INDEX}"
+    "(rowid, kind, doc_id, patient_id, doctor_id, recorded_at, diagnosis, symptoms, treatment, notes) "
+)
+
+# PostgreSQL: the same documents as tsvector expressions with GIN indexes
+_POSTGRES_CLINICAL_SOURCES = {
+    "medical_record": ("medicalrecord", "visit_date", {
+        "diagnosis": "diagnosis",
+        "symptoms": "symptoms",
+        "treatment": "treatment",
+        "notes": "coalesce(notes, '')",
+    }),
+    "consultation": ("consultation", "created_at", {
+        "diagnosis": "diagnosis",
+        "symptoms": "symptoms",
+        "notes": "coalesce(notes, '')",
+    }),
+    "prescription": ("prescription", "created_at", {
+        "treatment": "medication || ' ' || dosage || ' ' || frequency || ' ' || duration",
+        "notes": "coalesce(instructions, '')",
+    }),
+}
+
+
+def _postgres_text(fields: Dict[str, str], field: Optional[str] = None) -> str:
+    """The document text of one source, or of its `field` column alone."""
+    if field is not None:
+        return fields[field]
+    return " || ' ' || ".join(fields.values())
+
+
+def _postgres_document(fields: Dict[str, str], field: Optional[str] = None) -> str:
+    # Must stay textually identical to the indexed expression to use the index
+    return f"to_tsvector('english', {_postgres_text(fields, field)})"
+
+
+_POSTGRES_TRGM_INDEXES = {
+    "ix_user_full_name_trgm": '"user" USING gin (full_name gin_trgm_ops)',
+    "ix_user_email_trgm": '"user" USING gin (email gin_trgm_ops)',
+    "ix_user_phone_number_trgm": '"user" USING gin (phone_number gin_trgm_ops)',
+}
+
+
+def _sqlite_table_exists(connection: Connection, name: str) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name}
+    ).first() is not None
+
+
+def create_search_indexes(connection: Connection) -> None:
+    """
+    Create missing search structures and backfill them from existing rows.
+    """
+    if connection.dialect.name == "sqlite":
+        if not _sqlite_table_exists(connection, PATIENT_INDEX):
+            # trigram tokenizer gives case-insensitive substring matching and
+            # lets fuzzy lookups OR together the query's trigrams
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE {PATIENT_INDEX} USING fts5("
+                "full_name, email, phone_number, date_of_birth, gender, blood_group, "
+                "tokenize='trigram')"
+            ))
+            connection.execute(text(_PATIENT_DOCUMENT))
+        if not _sqlite_table_exists(connection, CLINICAL_INDEX):
+            # Word tokenizer with stemming, so "fevers" finds "fever"
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE {CLINICAL_INDEX} USING fts5("
+                "kind UNINDEXED, doc_id UNINDEXED, patient_id UNINDEXED, doctor_id UNINDEXED, "
+                "recorded_at UNINDEXED, diagnosis, symptoms, treatment, notes, "
+                "tokenize='porter unicode61')"
+            ))
+            for source in _CLINICAL_SOURCES.values():
+                connection.execute(text(_CLINICAL_INSERT + source))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for name, definition in _POSTGRES_TRGM_INDEXES.items():
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
+        for kind, (table, _, fields) in _POSTGRES_CLINICAL_SOURCES.items():
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{kind}_fts ON {table} USING gin (({_postgres_document(fields)}))"
+            ))
+
+
+def drop_search_indexes(connection: Connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {PATIENT_INDEX}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {CLINICAL_INDEX}"))
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    create_search_indexes(connection)
+
+
+@event.listens_for(SQLModel.metadata, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_search_indexes(connection)
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+def _reindex_patients(connection: Connection, where: str, params: Dict[str, Any]) -> None:
+    connection.execute(
+        text(f"DELETE FROM {PATIENT_INDEX} WHERE rowid IN (SELECT id FROM patient p WHERE {where})"),
+        params,
+    )
+    connection.execute(text(f"{_PATIENT_DOCUMENT} WHERE {where}"), params)
+
+
+def _on_patient_write(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        _reindex_patients(connection, "p.id = :id", {"id": target.id})
+
+
+def _on_patient_delete(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DELETE FROM {PATIENT_INDEX} WHERE rowid = :id"), {"id": target.id})
+
+
+def _on_user_update(mapper, connection, target):
+    # A new user has no patient row yet; that insert indexes it
+    if connection.dialect.name == "sqlite":
+        _reindex_patients(connection, "p.user_id = :user_id", {"user_id": target.id})
+
+
+event.listen(Patient, "after_insert", _on_patient_write)
+event.listen(Patient, "after_update", _on_patient_write)
+event.listen(Patient, "after_delete", _on_patient_delete)
+event.listen(User, "after_update", _on_user_update)
+
+
+def _clinical_listeners(kind: str):
+    code = CLINICAL_KINDS[kind]
+    source = _CLINICAL_SOURCES[kind]
+
+    def on_write(mapper, connection, target):
+        if connection.dialect.name != "sqlite":
+            return
+        params = {"rowid": target.id * 4 + code, "id": target.id}
+        connection.execute(text(f"DELETE FROM {CLINICAL_INDEX} WHERE rowid = :rowid"), params)
+        connection.execute(text(f"{_CLINICAL_INSERT}{source} WHERE id = :id"), params)
+
+    def on_delete(mapper, connection, target):
+        if connection.dialect.name == "sqlite":
+            connection.execute(
+                text(f"DELETE FROM {CLINICAL_INDEX} WHERE rowid = :rowid"), {"rowid": target.id * 4 + code}
+            )
+
+    return on_write, on_delete
+
+
+for _kind, _model in (
+    ("medical_record", MedicalRecord),
+    ("consultation", Consultation),
+    ("prescription", Prescription),
+):
+    _on_write, _on_delete = _clinical_listeners(_kind)
+    event.listen(_model, "after_insert", _on_write)
+    event.listen(_model, "after_update", _on_write)
+    event.listen(_model, "after_delete", _on_delete)
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def trigrams(value: str) -> set:
+    """
+    pg_trgm style trigrams: lower-cased words padded with two leading and
+    one trailing space.
+    """
+    grams = set()
+    for word in value.lower().split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _patient_rows(db: Session, ids: Sequence[int]) -> Dict[int, Any]:
+    if not ids:
+        return {}
+    rows = db.exec(
+        text(
+            'SELECT p.id, u.full_name, u.email, u.phone_number, p.date_of_birth, p.gender, p.blood_group '
+            'FROM patient p JOIN "user" u ON u.id = p.user_id '
+            f"WHERE p.id IN ({', '.join(str(int(i)) for i in ids)})"
+        )
+    ).all()
+    return {row.id: row for row in rows}
+
+
+def _hit(row, score: float) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "full_name": row.full_name,
+        "email": row.email,
+        "phone_number": row.phone_number,
+        "date_of_birth": row.date_of_birth,
+        "gender": row.gender,
+        "blood_group": row.blood_group,
+        "score": round(score, 4),
+    }
+
+
+def _best_similarity(query: str, row) -> float:
+    # Like pg_trgm's word_similarity: a query may match one word of a field
+    fields = (row.full_name or "", (row.email or "").split("@")[0], row.phone_number or "")
+    candidates = set(fields)
+    for field in fields:
+        candidates.update(field.split())
+    return max(similarity(query, candidate) for candidate in candidates if candidate)
+
+
+def _search_patients_sqlite(db: Session, query: str, limit: int) -> List[Dict[str, Any]]:
+    terms = query.split()
+    ranked: List[int] = []
+
+    if all(len(term) >= 3 for term in terms):
+        # Substring (and so prefix) match on every term, best bm25 first
+        match = " AND ".join(_fts_phrase(term) for term in terms)
+        ranked = [row[0] for row in db.exec(
+            text(f"SELECT rowid FROM {PATIENT_INDEX} WHERE {PATIENT_INDEX} MATCH :match ORDER BY rank LIMIT :limit"),
+            params={"match": match, "limit": limit},
+        ).all()]
+    else:
+        # Trigrams need three characters; short input falls back to word prefixes
+        clauses, params = [], {"limit": limit}
+        for i, term in enumerate(terms):
+            params[f"p{i}"] = f"{term}%"
+            params[f"w{i}"] = f"% {term}%"
+            clauses.append(
+                f"(full_name LIKE :p{i} OR full_name LIKE :w{i} OR email LIKE :p{i} OR phone_number LIKE :p{i})"
+            )
+        ranked = [row[0] for row in db.exec(
+            text(f"SELECT rowid FROM {PATIENT_INDEX} WHERE {' AND '.join(clauses)} LIMIT :limit"),
+            params=params,
+        ).all()]
+
+    rows = _patient_rows(db, ranked)
+    hits = [_hit(rows[pid], 1.0) for pid in ranked if pid in rows]
+
+    grams = trigrams(query)
+    if len(hits) < limit and grams and len(query.strip()) >= 3:
+        # Typo tolerance: candidates sharing any trigram, re-scored like pg_trgm
+        match = " OR ".join(_fts_phrase(gram.strip()) for gram in grams if len(gram.strip()) == 3)
+        candidate_ids = [] if not match else [row[0] for row in db.exec(
+            text(f"SELECT rowid FROM {PATIENT_INDEX} WHERE {PATIENT_INDEX} MATCH :match ORDER BY rank LIMIT :limit"),
+            params={"match": match, "limit": FUZZY_CANDIDATES},
+        ).all()]
+        seen = {hit["id"] for hit in hits}
+        candidates = _patient_rows(db, [pid for pid in candidate_ids if pid not in seen])
+        fuzzy = sorted(
+            ((_best_similarity(query, row), row) for row in candidates.values()),
+            key=lambda pair: pair[0],
+            reverse=True,
+        )
+        hits.extend(_hit(row, score) for score, row in fuzzy if score >= SIMILARITY_THRESHOLD)
+
+    return hits[:limit]
+
+
+def _search_patients_postgres(db: Session, query: str, limit: int) -> List[Dict[str, Any]]:
+    rows = db.exec(
+        text(
+            "SELECT p.id, u.full_name, u.email, u.phone_number, p.date_of_birth, p.gender, p.blood_group, "
+            "greatest(similarity(u.full_name, :q), similarity(u.email, :q), "
+            "         similarity(coalesce(u.phone_number, ''), :q)) AS score "
+            'FROM patient p JOIN "user" u ON u.id = p.user_id '
+            "WHERE u.full_name % :q OR u.email % :q OR u.phone_number % :q "
+            "   OR u.full_name ILIKE :prefix OR u.email ILIKE :prefix OR u.phone_number LIKE :prefix "
+            "ORDER BY score DESC LIMIT :limit"
+        ),
+        params={"q": query, "prefix": f"{query}%", "limit": limit},
+    ).all()
+    return [_hit(row, row.score) for row in rows]
+
+
+def search_patients(db: Session, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Patients matching `query` on name, email, phone and profile fields.
+    Exact substring/prefix hits come first, then typo-tolerant matches.
+    """
+    query = " ".join(query.split())
+    if not query:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_patients_postgres(db, query, limit)
+    return _search_patients_sqlite(db, query, limit)
+
+
+def _clinical_match(query: str, field: Optional[str]) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, a trailing *
+    keeps prefix matching, and `field` scopes it to one column.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append(_fts_phrase(word) + ("*" if prefix else ""))
+    match = " AND ".join(terms)
+    if field and match:
+        match = f"{field} : ({match})"
+    return match
+
+
+def _search_clinical_sqlite(
+    db: Session, query: str, kinds: Iterable[str], field: Optional[str],
+    patient_id: Optional[int], date_from: Optional[datetime], date_to: Optional[datetime],
+    limit: int, offset: int,
+) -> List[Dict[str, Any]]:
+    match = _clinical_match(query, field)
+    if not match:
+        return []
+    kinds = list(kinds)
+    params: Dict[str, Any] = {"match": match, "limit": limit, "offset": offset}
+    clauses = [f"{CLINICAL_INDEX} MATCH :match"]
+    clauses.append(f"kind IN ({', '.join(':k' + str(i) for i in range(len(kinds)))})")
+    params.update({f"k{i}": kind for i, kind in enumerate(kinds)})
+    if patient_id is not None:
+        clauses.append("patient_id = :patient_id")
+        params["patient_id"] = patient_id
+    # Stored in the same text format SQLAlchemy writes to the base tables
+    if date_from is not None:
+        clauses.append("recorded_at >= :date_from")
+        params["date_from"] = date_from.isoformat(sep=" ")
+    if date_to is not None:
+        clauses.append("recorded_at < :date_to")
+        params["date_to"] = date_to.isoformat(sep=" ")
+
+    rows = db.exec(
+        text(
+            f"SELECT kind, doc_id, patient_id, doctor_id, recorded_at, bm25({CLINICAL_INDEX}) AS score, "
+            f"snippet({CLINICAL_INDEX}, -1, '[', ']', '…', 12) AS snippet "
+            f"FROM {CLINICAL_INDEX} WHERE {' AND '.join(clauses)} "
+            "ORDER BY score LIMIT :limit OFFSET :offset"
+        ),
+        params=params,
+    ).all()
+    return [
+        {
+            "type": row.kind,
+            "id": row.doc_id,
+            "patient_id": row.patient_id,
+            "doctor_id": row.doctor_id,
+            "recorded_at": row.recorded_at,
+            "snippet": row.snippet,
+            # bm25() is lower-is-better; flip it so higher scores rank first
+            "score": round(-row.score, 4),
+        }
+        for row in rows
+    ]
+
+
+def _search_clinical_postgres(
+    db: Session, query: str, kinds: Iterable[str], field: Optional[str],
+    patient_id: Optional[int], date_from: Optional[datetime], date_to: Optional[datetime],
+    limit: int, offset: int,
+) -> List[Dict[str, Any]]:
+    params: Dict[str, Any] = {"q": query, "limit": limit, "offset": offset}
+    filters = []
+    if patient_id is not None:
+        filters.append("patient_id = :patient_id")
+        params["patient_id"] = patient_id
+    selects = []
+    for kind in kinds:
+        table, date_column, fields = _POSTGRES_CLINICAL_SOURCES[kind]
+        if field is not None and field not in fields:
+            # Same as an empty FTS5 column on SQLite: nothing can match
+            continue
+        # A field-scoped match has no expression index of its own; the
+        # patient and date filters keep the scan narrow
+        document = _postgres_document(fields, field)
+        where = [f"{document} @@ websearch_to_tsquery('english', :q)", *filters]
+        if date_from is not None:
+            where.append(f"{date_column} >= :date_from")
+            params["date_from"] = date_from
+        if date_to is not None:
+            where.append(f"{date_column} < :date_to")
+            params["date_to"] = date_to
+        selects.append(
+            f"SELECT '{kind}' AS kind, id AS doc_id, patient_id, doctor_id, {date_column} AS recorded_at, "
+            f"ts_rank_cd({document}, websearch_to_tsquery('english', :q)) AS score, "
+            f"ts_headline('english', {_postgres_text(fields, field)}, websearch_to_tsquery('english', :q)) AS snippet "
+            f"FROM {table} WHERE {' AND '.join(where)}"
+        )
+    if not selects:
+        return []
+    rows = db.exec(
+        text(f"{' UNION ALL '.join(selects)} ORDER BY score DESC LIMIT :limit OFFSET :offset"),
+        params=params,
+    ).all()
+    return [
+        {
+            "type": row.kind,
+            "id": row.doc_id,
+            "patient_id": row.patient_id,
+            "doctor_id": row.doctor_id,
+            "recorded_at": str(row.recorded_at),
+            "snippet": row.snippet,
+            "score": round(row.score, 4),
+        }
+        for row in rows
+    ]
+
+
+def search_clinical(
+    db: Session,
+    query: str,
+    kinds: Iterable[str] = tuple(CLINICAL_KINDS),
+    field: Optional[str] = None,
+    patient_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Ranked (BM25) search over medical records, consultations and
+    prescriptions. `field` limits matching to diagnosis, symptoms,
+    treatment or notes.
+    """
+    args = (db, query, kinds, field, patient_id, date_from, date_to, limit, offset)
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_clinical_postgres(*args)
+    return _search_clinical_sqlite(*args)
@@ -0,0 +1,35 @@
+"""
+Collision-free document number allocation.
+
+Values are taken with a single upsert ... RETURNING inside the caller's
+transaction, so two requests can never receive the same number: SQLite
+serialises writers and PostgreSQL row-locks the sequence row until commit.
+A rolled-back transaction gives its numbers back, so there are no gaps.
+"""
+from typing import List
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+_ALLOCATE = text(
+    "INSERT INTO numbersequence (name, last_value) VALUES (:name, :count) "
+    "ON CONFLICT (name) DO UPDATE SET last_value = numbersequence.last_value + excluded.last_value "
+    "RETURNING last_value"
+)
+
+
+def allocate(db: Session, name: str, count: int = 1) -> range:
+    """
+    Reserve `count` consecutive values of sequence `name` (created on first use).
+    """
+    if count < 1:
+        raise ValueError("count must be positive")
+    last = db.execute(_ALLOCATE, {"name": name, "count": count}).scalar_one()
+    return range(last - count + 1, last + 1)
+
+
+def invoice_numbers(db: Session, year: int, count: int = 1) -> List[str]:
+    """
+    INV-<year>-<6 digit serial>, restarting every year.
+    """
+    return [f"INV-{year}-{value:06d}" for value in allocate(db, f"invoice:{year}", count)]
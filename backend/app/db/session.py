@@ -1,11 +1,97 @@
-from sqlmodel import SQLModel, create_engine, Session
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlmodel import create_engine, Session
 from app.core.config import settings
+# Registers the search index DDL and its sync listeners on the models
+from app.db import search  # noqa: F401
+# Keeps the dashboard rollup counters in step with the counted models
+from app.db import counters  # noqa: F401
+# Opens the wallet ledger for balances that predate it
+from app.db import ledger  # noqa: F401
+# Billing report rollups, rebuilt when their table is first created
+from app.db import revenue  # noqa: F401
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(settings.DATABASE_URL, echo=True, connect_args=connect_args)
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Build create_engine() keyword arguments for the configured backend.
+    """
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if make_url(url).database in (None, "", ":memory:"):
+            # In-memory databases live and die with their single connection
+            return options
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    elif backend == "postgresql":
+        connect_args: Dict[str, Any] = {}
+        driver = make_url(url).get_driver_name()
+        if driver in ("psycopg2", "psycopg"):
+            connect_args["application_name"] = settings.POSTGRES_APPLICATION_NAME
+            if settings.POSTGRES_STATEMENT_TIMEOUT_MS:
+                connect_args["options"] = f"-c statement_timeout={settings.POSTGRES_STATEMENT_TIMEOUT_MS}"
+        elif driver == "asyncpg":
+            server_settings = {"application_name": settings.POSTGRES_APPLICATION_NAME}
+            if settings.POSTGRES_STATEMENT_TIMEOUT_MS:
+                server_settings["statement_timeout"] = str(settings.POSTGRES_STATEMENT_TIMEOUT_MS)
+            connect_args["server_settings"] = server_settings
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine: Engine) -> Engine:
+    """
+    Attach per-connection setup (SQLite pragmas) to an engine.
+    """
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def build_engine(url: str) -> Engine:
+    return configure_engine(create_engine(url, **engine_options(url)))
+
+
+engine = build_engine(settings.DATABASE_URL)
 
 def init_db():
-    SQLModel.metadata.create_all(engine)
+    """
+    Bring the schema up to date by applying pending migrations.
+    """
+    from app.db.migrate import upgrade
+    upgrade(engine)
 
 def get_session():
     with Session(engine) as session:
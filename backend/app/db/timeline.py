@@ -0,0 +1,118 @@
+"""
+A patient's chart as one stream: appointments, consultations, invoices, lab
+results, medical records, prescriptions and vitals, newest first.
+
+Every source table has a (patient_id, <time>) index, so a page costs one
+bounded range read per table -- at most `limit` rows each, related rows
+pulled in by selectinload -- and a k-way merge of the already sorted
+results. Events are ordered by (at, kind, id) descending and the cursor is
+the last event's key, so rows sharing a timestamp are never skipped or
+repeated across pages.
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from app import schemas
+from app.models.appointment import Appointment
+from app.models.consultation import Consultation
+from app.models.invoice import Invoice
+from app.models.lab_result import LabResult
+from app.models.medical_record import MedicalRecord
+from app.models.prescription import Prescription
+from app.models.user import Doctor, Patient
+from app.models.vitals import Vitals
+
+# (at, kind, id) of an event; pages continue strictly below it
+Key = Tuple[datetime, str, int]
+
+
+@dataclass
+class Stream:
+    kind: str
+    model: Any
+    time_field: Any
+    schema: Type[BaseModel]
+    options: Sequence[Any] = ()
+
+
+STREAMS: Dict[str, Stream] = {stream.kind: stream for stream in [
+    Stream("appointment", Appointment, Appointment.appointment_time, schemas.Appointment, (
+        selectinload(Appointment.doctor).selectinload(Doctor.user),
+        selectinload(Appointment.patient).selectinload(Patient.user),
+    )),
+    Stream("consultation", Consultation, Consultation.created_at, schemas.Consultation),
+    Stream("invoice", Invoice, Invoice.created_at, schemas.Invoice, (selectinload(Invoice.items),)),
+    Stream("lab_result", LabResult, LabResult.recorded_at, schemas.LabResult),
+    Stream("medical_record", MedicalRecord, MedicalRecord.visit_date, schemas.MedicalRecord),
+    Stream("prescription", Prescription, Prescription.created_at, schemas.Prescription),
+    Stream("vitals", Vitals, Vitals.recorded_at, schemas.Vitals),
+]}
+
+
+def _read(
+    db: Session,
+    stream: Stream,
+    patient_id: int,
+    limit: int,
+    after: Optional[Key],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+) -> Iterator[Tuple[Key, Any]]:
+    model, time_field = stream.model, stream.time_field
+    statement = select(model).where(model.patient_id == patient_id)
+    if date_from is not None:
+        statement = statement.where(time_field >= date_from)
+    if date_to is not None:
+        statement = statement.where(time_field < date_to)
+    if after is not None:
+        at, kind, last_id = after
+        if stream.kind < kind:
+            # Same timestamp, earlier kind: still to come
+            statement = statement.where(time_field <= at)
+        elif stream.kind == kind:
+            statement = statement.where(or_(time_field < at, and_(time_field == at, model.id < last_id)))
+        else:
+            statement = statement.where(time_field < at)
+    statement = statement.order_by(time_field.desc(), model.id.desc()).options(*stream.options).limit(limit)
+    for row in db.exec(statement).all():
+        yield (getattr(row, time_field.key), stream.kind, row.id), row
+
+
+def patient_timeline(
+    db: Session,
+    patient_id: int,
+    limit: int,
+    after: Optional[Key] = None,
+    kinds: Optional[Sequence[str]] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[Key]]:
+    """
+    Up to `limit` events after `after`, and the key to continue from (None
+    on the last page).
+    """
+    streams = [STREAMS[kind] for kind in sorted(kinds or STREAMS)]
+    # One extra row per table tells whether another page exists
+    merged = heapq.merge(
+        *(_read(db, stream, patient_id, limit + 1, after, date_from, date_to) for stream in streams),
+        key=lambda event: event[0],
+        reverse=True,
+    )
+    page = list(islice(merged, limit + 1))
+    next_key = page[limit - 1][0] if len(page) > limit else None
+    events = [
+        {
+            "kind": kind, "id": id, "at": at,
+            "data": STREAMS[kind].schema.model_validate(row, from_attributes=True).model_dump(),
+        }
+        for (at, kind, id), row in page[:limit]
+    ]
+    return events, next_key
@@ -1,13 +1,41 @@
+# First, so the startup profile's clock includes every import below
+from app.core.startup import startup_profile
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.idempotency import REPLAYED_HEADER, IdempotencyMiddleware
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.scheduler import scheduler
+from app.core.websockets import manager
+from app.db import maintenance  # noqa: F401  (registers the periodic jobs)
+from app.db.chat_store import chat_store
 from app.db.session import init_db
 from contextlib import asynccontextmanager
 
+startup_profile.mark("framework, models and core imports")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    startup_profile.mark("server setup")
+    # The schema is migrated as a deployment step (python -m app.db.migrate)
+    if settings.DB_MIGRATE_ON_STARTUP:
+        init_db()
+        startup_profile.mark("lifespan: migrations")
+    await manager.start()
+    startup_profile.mark("lifespan: pub/sub")
+    # Fails here if several workers share rooms without CHAT_WORKER_ID
+    chat_store.start()
+    if settings.JOBS_ENABLED:
+        scheduler.start()
+        startup_profile.mark("lifespan: job scheduler")
+    if settings.STARTUP_PROFILE:
+        startup_profile.log()
     yield
+    await scheduler.stop()
+    await manager.stop()
+    # Write out chat messages still in the buffer
+    await chat_store.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -15,6 +43,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Replays retried payments/bookings that carry an Idempotency-Key
+app.add_middleware(IdempotencyMiddleware)
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -23,6 +54,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER],
     )
 
 @app.get("/")
@@ -31,3 +63,4 @@ def root():
 
 from app.api.v1.api import api_router
 app.include_router(api_router, prefix=settings.API_V1_STR)
+startup_profile.mark("mount API routes")
@@ -5,9 +5,15 @@ from .prescription import Prescription
 from .medical_record import MedicalRecord
 from .vitals import Vitals
 from .lab_result import LabResult
-from .wallet import Wallet
+from .wallet import Wallet, WalletEntry
 from .invoice import Invoice, InvoiceItem, InvoiceStatus
 from .transaction import Transaction, TransactionType, TransactionStatus, PaymentMethod
 from .consultation import Consultation
 from .bed import Bed, BedStatus
 from .referral import Referral, ReferralStatus, ReferralUrgency
+from .stats import StatCounter, RevenueRollup
+from .chat import ChatMessage
+from .sequence import NumberSequence
+from .idempotency import IdempotencyRecord
+from .job import JobLease, JobRun
+from .schedule import DoctorSchedule
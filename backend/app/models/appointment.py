@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 from enum import Enum
@@ -20,7 +21,7 @@ class CommunicationPreference(str, Enum):
 class AppointmentBase(SQLModel):
     doctor_id: int = Field(foreign_key="doctor.id")
     patient_id: int = Field(foreign_key="patient.id")
-    appointment_time: datetime
+    appointment_time: datetime = Field(index=True)
     type: AppointmentType = Field(default=AppointmentType.OFFLINE)
     status: AppointmentStatus = Field(default=AppointmentStatus.PENDING)
     communication_preference: CommunicationPreference = Field(default=CommunicationPreference.IN_APP_CHAT)
@@ -29,7 +30,20 @@ class AppointmentBase(SQLModel):
     notes: Optional[str] = None
 
 class Appointment(AppointmentBase, table=True):
+    __table_args__ = (
+        # Doctor dashboards and day views: doctor_id = ? AND appointment_time in [start, end)
+        Index("ix_appointment_doctor_id_appointment_time", "doctor_id", "appointment_time"),
+        # Patient charts and the timeline: patient_id = ? ORDER BY appointment_time DESC
+        Index("ix_appointment_patient_id_appointment_time", "patient_id", "appointment_time"),
+        # One booking per doctor and slot, and the range index slot searches
+        # read; cancelled appointments release their slot (slot_start NULL)
+        Index("ux_appointment_doctor_id_slot_start", "doctor_id", "slot_start", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # The booked slot, see app/db/availability.py
+    slot_start: Optional[datetime] = None
+    slot_end: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     doctor: "Doctor" = Relationship(back_populates="appointments")
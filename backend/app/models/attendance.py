@@ -1,8 +1,16 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
 class AttendanceLog(SQLModel, table=True):
+    __table_args__ = (
+        # Check-in/out: user_id = ? AND date = ?
+        Index("ix_attendancelog_user_id_date", "user_id", "date"),
+        # History: user_id = ? ORDER BY check_in_time DESC
+        Index("ix_attendancelog_user_id_check_in_time", "user_id", "check_in_time"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     check_in_time: datetime = Field(default_factory=datetime.utcnow)
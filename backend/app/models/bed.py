@@ -11,7 +11,7 @@ class BedStatus(str, Enum):
 class BedBase(SQLModel):
     ward_name: str
     bed_number: str
-    status: BedStatus = Field(default=BedStatus.AVAILABLE)
+    status: BedStatus = Field(default=BedStatus.AVAILABLE, index=True)
     patient_id: Optional[int] = Field(default=None, foreign_key="patient.id", nullable=True)
 
 class Bed(BedBase, table=True):
@@ -0,0 +1,24 @@
+from typing import Optional
+from sqlalchemy import BigInteger, Index
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+class ChatMessage(SQLModel, table=True):
+    """
+    A consultation chat message. `seq` is a time-ordered id assigned when the
+    message arrives (see app/db/chat_store.py), before it is written.
+    """
+    __table_args__ = (
+        # History and resume: consultation_id = ? AND seq > ? ORDER BY seq
+        Index("ix_chatmessage_consultation_id_seq", "consultation_id", "seq"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    consultation_id: int = Field(foreign_key="consultation.id")
+    seq: int = Field(sa_type=BigInteger)
+    # Who sent it, from their token; the name is copied so history reads
+    # without a join and keeps the name used at the time
+    sender_user_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    sender_name: Optional[str] = None
+    body: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
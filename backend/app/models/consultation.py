@@ -1,9 +1,10 @@
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
 class ConsultationBase(SQLModel):
-    appointment_id: int = Field(foreign_key="appointment.id")
+    appointment_id: int = Field(foreign_key="appointment.id", index=True)
     doctor_id: int = Field(foreign_key="doctor.id")
     patient_id: int = Field(foreign_key="patient.id")
     symptoms: str
@@ -13,6 +14,11 @@ class ConsultationBase(SQLModel):
     is_admitted: bool = Field(default=False)
 
 class Consultation(ConsultationBase, table=True):
+    __table_args__ = (
+        # Patient charts and the timeline: patient_id = ? ORDER BY created_at DESC
+        Index("ix_consultation_patient_id_created_at", "patient_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import SQLModel, Field
+
+class IdempotencyRecord(SQLModel, table=True):
+    """
+    A request made with an Idempotency-Key header and, once it finished, the
+    response to replay for retries. See app/core/idempotency.py.
+    """
+    key: str = Field(primary_key=True)  # sha256 of the user and their Idempotency-Key
+    request_hash: str  # sha256 of method, path, query and body
+    status_code: Optional[int] = None  # None while the first request is running
+    content_type: Optional[str] = None
+    response_body: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
@@ -1,6 +1,7 @@
 from enum import Enum
 from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 class InvoiceStatus(str, Enum):
@@ -11,13 +12,22 @@ class InvoiceStatus(str, Enum):
     PARTIAL = "partial"
 
 class Invoice(SQLModel, table=True):
+    __table_args__ = (
+        # Overdue sweep: status = 'pending' AND due_date < now ORDER BY due_date
+        Index("ix_invoice_status_due_date", "status", "due_date"),
+        # Patient charts and the timeline: patient_id = ? ORDER BY created_at DESC
+        Index("ix_invoice_patient_id_created_at", "patient_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     invoice_number: str = Field(index=True, unique=True)
     patient_id: int = Field(foreign_key="patient.id")
+    # Attending doctor, for revenue by doctor/department
+    doctor_id: Optional[int] = Field(default=None, foreign_key="doctor.id")
     amount: float
     status: InvoiceStatus = Field(default=InvoiceStatus.PENDING)
     due_date: datetime
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     
     # Relationships
     patient: "Patient" = Relationship(back_populates="invoices")
@@ -26,7 +36,7 @@ class Invoice(SQLModel, table=True):
 
 class InvoiceItem(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    invoice_id: int = Field(foreign_key="invoice.id")
+    invoice_id: int = Field(foreign_key="invoice.id", index=True)
     description: str
     amount: float
     
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+class JobLease(SQLModel, table=True):
+    """
+    Shared schedule and lock of one periodic job (app/core/scheduler.py).
+    A worker runs the job only after taking the lease with a conditional
+    UPDATE, so each run happens on exactly one worker.
+    """
+    name: str = Field(primary_key=True)
+    owner: Optional[str] = None  # Worker holding, or last holding, the lock
+    locked_until: datetime = Field(default=datetime.min)  # Lock held while in the future
+    next_run_at: datetime = Field(default_factory=datetime.utcnow)
+
+class JobRun(SQLModel, table=True):
+    """
+    One execution of a job, kept for JOBS_HISTORY_RETENTION_DAYS.
+    """
+    __table_args__ = (Index("ix_jobrun_name_id", "name", "id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+    owner: str
+    status: str = "running"  # running, succeeded, failed
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+    result: Optional[str] = None  # JSON summary returned by the job
+    error: Optional[str] = None
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
@@ -11,12 +12,17 @@ class LabResultBase(SQLModel):
     units: Optional[str] = None
     reference_range: Optional[str] = None
     notes: Optional[str] = None
-    status: str = Field(default="completed") # pending, completed
-    recorded_at: datetime = Field(default_factory=datetime.utcnow)
+    status: str = Field(default="completed", index=True) # pending, completed
+    recorded_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     doctor_id: Optional[int] = Field(default=None, foreign_key="doctor.id")
-    consultation_id: Optional[int] = Field(default=None, foreign_key="consultation.id")
+    consultation_id: Optional[int] = Field(default=None, foreign_key="consultation.id", index=True)
 
 class LabResult(LabResultBase, table=True):
+    __table_args__ = (
+        # Patient charts and the timeline: patient_id = ? ORDER BY recorded_at DESC
+        Index("ix_labresult_patient_id_recorded_at", "patient_id", "recorded_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     patient: "Patient" = Relationship(back_populates="lab_results")
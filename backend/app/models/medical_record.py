@@ -1,17 +1,23 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
 class MedicalRecordBase(SQLModel):
     patient_id: int = Field(foreign_key="patient.id")
     doctor_id: int = Field(foreign_key="doctor.id")
-    visit_date: datetime = Field(default_factory=datetime.utcnow)
+    visit_date: datetime = Field(default_factory=datetime.utcnow, index=True)
     diagnosis: str
     symptoms: str
     treatment: str
     notes: Optional[str] = None
 
 class MedicalRecord(MedicalRecordBase, table=True):
+    __table_args__ = (
+        # Patient charts and the timeline: patient_id = ? ORDER BY visit_date DESC
+        Index("ix_medicalrecord_patient_id_visit_date", "patient_id", "visit_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
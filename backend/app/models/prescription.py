@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
@@ -11,11 +12,16 @@ class PrescriptionBase(SQLModel):
     duration: str
     instructions: Optional[str] = None
     status: str = Field(default="active") # active, completed, cancelled
-    consultation_id: Optional[int] = Field(default=None, foreign_key="consultation.id")
+    consultation_id: Optional[int] = Field(default=None, foreign_key="consultation.id", index=True)
 
 class Prescription(PrescriptionBase, table=True):
+    __table_args__ = (
+        # Patient charts and the timeline: patient_id = ? ORDER BY created_at DESC
+        Index("ix_prescription_patient_id_created_at", "patient_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
     patient: "Patient" = Relationship()
     doctor: "Doctor" = Relationship()
@@ -15,7 +15,7 @@ class ReferralUrgency(str, Enum):
 
 class ReferralBase(SQLModel):
     from_doctor_id: int = Field(foreign_key="doctor.id")
-    to_doctor_id: int = Field(foreign_key="doctor.id")
+    to_doctor_id: int = Field(foreign_key="doctor.id", index=True)
     patient_id: int = Field(foreign_key="patient.id")
     reason: str
     urgency: ReferralUrgency = Field(default=ReferralUrgency.ROUTINE)
@@ -0,0 +1,18 @@
+from datetime import date, time
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+class DoctorSchedule(SQLModel, table=True):
+    """
+    A weekly working-hours template: on `weekday` (0 = Monday) the doctor
+    sees patients from start_time to end_time in slots of slot_minutes.
+    A doctor may have several per day (e.g. morning and afternoon clinics).
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    doctor_id: int = Field(foreign_key="doctor.id", index=True)
+    weekday: int
+    start_time: time
+    end_time: time
+    slot_minutes: int = Field(default=30)
+    valid_from: Optional[date] = None  # Inclusive; open-ended when None
+    valid_to: Optional[date] = None
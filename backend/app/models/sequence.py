@@ -0,0 +1,9 @@
+from sqlmodel import SQLModel, Field
+
+class NumberSequence(SQLModel, table=True):
+    """
+    Named counters for human-readable document numbers, e.g.
+    "invoice:2026" -> INV-2026-000123. See app/db/sequences.py.
+    """
+    name: str = Field(primary_key=True)
+    last_value: int = Field(default=0)
@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column
+from sqlmodel import SQLModel, Field
+
+class StatCounter(SQLModel, table=True):
+    """
+    Pre-aggregated dashboard counters, maintained by app/db/counters.py.
+
+    day is YYYY-MM-DD for daily counters and "" for running totals (gauges);
+    doctor_id 0 means clinic-wide.
+    """
+    name: str = Field(primary_key=True)
+    day: str = Field(default="", primary_key=True)
+    doctor_id: int = Field(default=0, primary_key=True)
+    value: int = Field(default=0)
+
+class RevenueRollup(SQLModel, table=True):
+    """
+    Daily billing totals, maintained by app/db/revenue.py in the same
+    transaction as the invoice or transaction they count.
+
+    metric is "invoiced", a transaction type (payment, topup, refund) or
+    "due" (invoices currently in each status, by due date). dimension is
+    "all" (bucket "") or the breakdown the bucket holds: payment_method,
+    doctor or status.
+    """
+    metric: str = Field(primary_key=True)
+    day: str = Field(primary_key=True)
+    dimension: str = Field(default="all", primary_key=True)
+    bucket: str = Field(default="", primary_key=True)
+    count: int = Field(default=0)
+    amount_minor: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
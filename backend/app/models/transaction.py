@@ -1,6 +1,7 @@
 from enum import Enum
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 class TransactionType(str, Enum):
@@ -20,8 +21,13 @@ class TransactionStatus(str, Enum):
     FAILED = "failed"
 
 class Transaction(SQLModel, table=True):
+    __table_args__ = (
+        # The patient's statement: patient_id = ? ORDER BY created_at DESC
+        Index("ix_transaction_patient_id_created_at", "patient_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    invoice_id: Optional[int] = Field(default=None, foreign_key="invoice.id")
+    invoice_id: Optional[int] = Field(default=None, foreign_key="invoice.id", index=True)
     patient_id: int = Field(foreign_key="patient.id")
     amount: float
     type: TransactionType
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
@@ -10,9 +11,14 @@ class VitalsBase(SQLModel):
     heart_rate: Optional[int] = None
     temperature: Optional[float] = None
     oxygen_saturation: Optional[int] = None
-    recorded_at: datetime = Field(default_factory=datetime.utcnow)
+    recorded_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
 class Vitals(VitalsBase, table=True):
+    __table_args__ = (
+        # Patient charts and the timeline: patient_id = ? ORDER BY recorded_at DESC
+        Index("ix_vitals_patient_id_recorded_at", "patient_id", "recorded_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     patient: "Patient" = Relationship(back_populates="vitals")
@@ -1,13 +1,37 @@
 from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import BigInteger, Column, Index
 from sqlmodel import SQLModel, Field, Relationship
 
 class Wallet(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     patient_id: int = Field(foreign_key="patient.id", unique=True)
+    # Balance in kobo. Only changed by app/db/ledger.py, together with a WalletEntry.
+    balance_minor: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
+    # Naira copy of balance_minor kept for older readers
     balance: float = Field(default=0.0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Relationships
     patient: "Patient" = Relationship(back_populates="wallet")
+
+class WalletEntry(SQLModel, table=True):
+    """
+    Append-only wallet ledger. A wallet's balance_minor always equals the
+    sum of its entries' amount_minor.
+    """
+    __table_args__ = (
+        Index("ix_walletentry_wallet_id_id", "wallet_id", "id"),
+        # The patient's ledger page: patient_id = ? ORDER BY id DESC
+        Index("ix_walletentry_patient_id_id", "patient_id", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    wallet_id: int = Field(foreign_key="wallet.id")
+    patient_id: int = Field(foreign_key="patient.id")
+    type: str  # TransactionType value, or "opening" for balances carried over
+    amount_minor: int = Field(sa_column=Column(BigInteger, nullable=False))  # Signed: credits > 0, debits < 0
+    balance_after_minor: int = Field(sa_column=Column(BigInteger, nullable=False))
+    transaction_id: Optional[int] = Field(default=None, foreign_key="transaction.id")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
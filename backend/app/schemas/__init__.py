@@ -1,10 +1,14 @@
 from .user import User, UserCreate, UserUpdate, PatientInfo, DoctorInfo
+from .patient import PatientSearchHit, TimelineEvent
+from .search import ClinicalSearchHit
 from .token import Token, TokenPayload
 from .appointment import Appointment, AppointmentCreate, AppointmentUpdate
+from .schedule import DoctorSchedule, DoctorScheduleCreate, Slot
 from .prescription import Prescription, PrescriptionCreate, PrescriptionUpdate
 from .medical_record import MedicalRecord, MedicalRecordCreate, MedicalRecordUpdate
 from .vitals import Vitals, VitalsCreate
 from .lab_result import LabResult, LabResultCreate
+from .consultation import Consultation, ConsultationBundle
 from .finance import (
     Invoice, InvoiceCreate, InvoiceUpdate, InvoiceItem, InvoiceItemCreate,
     Wallet, WalletTopup, Transaction
@@ -26,6 +26,8 @@ class Appointment(AppointmentBase):
     patient_id: int
     status: AppointmentStatus
     meeting_link: Optional[str] = None
+    slot_start: Optional[datetime] = None
+    slot_end: Optional[datetime] = None
     created_at: datetime
     
     doctor: Optional[DoctorInfo] = None
@@ -0,0 +1,29 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+from .appointment import Appointment
+from .lab_result import LabResult
+from .prescription import Prescription
+from .user import DoctorInfo, PatientInfo
+
+class Consultation(BaseModel):
+    id: int
+    appointment_id: int
+    doctor_id: int
+    patient_id: int
+    symptoms: str
+    diagnosis: str
+    notes: Optional[str] = None
+    follow_up_date: Optional[datetime] = None
+    is_admitted: bool = False
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ConsultationBundle(Consultation):
+    appointment: Optional[Appointment] = None
+    doctor: Optional[DoctorInfo] = None
+    patient: Optional[PatientInfo] = None
+    prescriptions: List[Prescription] = []
+    lab_results: List[LabResult] = []
@@ -23,6 +23,7 @@ class InvoiceBase(BaseModel):
     patient_id: int
     amount: float
     due_date: datetime
+    doctor_id: Optional[int] = None
 
 class InvoiceCreate(InvoiceBase):
     items: List[InvoiceItemCreate]
@@ -47,12 +48,25 @@ class WalletBase(BaseModel):
 
 class Wallet(WalletBase):
     id: int
+    balance_minor: int
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class WalletEntry(BaseModel):
+    id: int
+    wallet_id: int
+    type: str
+    amount_minor: int
+    balance_after_minor: int
+    transaction_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class WalletTopup(BaseModel):
     amount: float
     payment_method: PaymentMethod
@@ -0,0 +1,19 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class PatientSearchHit(BaseModel):
+    id: int
+    full_name: str
+    email: str
+    phone_number: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    gender: Optional[str] = None
+    blood_group: Optional[str] = None
+    score: float
+
+class TimelineEvent(BaseModel):
+    kind: str  # appointment, consultation, invoice, lab_result, medical_record, prescription, vitals
+    id: int
+    at: datetime
+    data: Dict[str, Any]
@@ -0,0 +1,25 @@
+from typing import Optional
+from datetime import date, datetime, time
+from pydantic import BaseModel, Field
+
+class DoctorScheduleBase(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # 0 = Monday
+    start_time: time
+    end_time: time
+    slot_minutes: int = Field(default=30, ge=5, le=240)
+    valid_from: Optional[date] = None
+    valid_to: Optional[date] = None
+
+class DoctorScheduleCreate(DoctorScheduleBase):
+    pass
+
+class DoctorSchedule(DoctorScheduleBase):
+    id: int
+    doctor_id: int
+
+    class Config:
+        from_attributes = True
+
+class Slot(BaseModel):
+    start: datetime
+    end: datetime
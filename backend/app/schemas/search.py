@@ -0,0 +1,11 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class ClinicalSearchHit(BaseModel):
+    type: str  # medical_record, consultation or prescription
+    id: int
+    patient_id: int
+    doctor_id: Optional[int] = None
+    recorded_at: Optional[str] = None
+    snippet: str
+    score: float
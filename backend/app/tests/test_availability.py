@@ -0,0 +1,102 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, create_engine
+from app.api.v1.endpoints import doctors
+from app.db import availability
+from app.models.appointment import Appointment
+from app.models.schedule import DoctorSchedule
+from app.models.user import Doctor, User, UserRole
+
+MONDAY = datetime(2026, 3, 2)
+
+
+def _schedules():
+    return [
+        DoctorSchedule(doctor_id=1, weekday=0, start_time=time(9), end_time=time(10, 40), slot_minutes=20),
+        DoctorSchedule(doctor_id=1, weekday=0, start_time=time(14), end_time=time(15)),
+        # Tuesdays only from the 10th
+        DoctorSchedule(doctor_id=1, weekday=1, start_time=time(9), end_time=time(10), valid_from=date(2026, 3, 10)),
+    ]
+
+
+def test_slots_follow_the_templates():
+    slots = availability.generate_slots(_schedules(), MONDAY, MONDAY + timedelta(days=9))
+    starts = [start.strftime("%d %H:%M") for start, _ in slots]
+    assert starts == [
+        "02 09:00", "02 09:20", "02 09:40", "02 10:00", "02 10:20", "02 14:00", "02 14:30",
+        "09 09:00", "09 09:20", "09 09:40", "09 10:00", "09 10:20", "09 14:00", "09 14:30",
+        "10 09:00", "10 09:30",
+    ]
+
+    assert availability.resolve_slot(_schedules(), MONDAY.replace(hour=9, minute=25)) == (
+        MONDAY.replace(hour=9, minute=20), MONDAY.replace(hour=9, minute=40),
+    )
+    # Outside working hours, and before a template starts to apply
+    assert availability.resolve_slot(_schedules(), MONDAY.replace(hour=10, minute=45)) is None
+    assert availability.resolve_slot(_schedules(), MONDAY + timedelta(days=1, hours=9)) is None
+    # Without templates any time is bookable on the default grid
+    assert availability.resolve_slot([], MONDAY.replace(hour=11, minute=10)) == (
+        MONDAY.replace(hour=11), MONDAY.replace(hour=11, minute=30),
+    )
+
+
+def test_free_slots_skip_overlapping_bookings():
+    slots = availability.generate_slots(_schedules(), MONDAY, MONDAY + timedelta(days=1))
+    booked = [
+        (MONDAY.replace(hour=9, minute=20), MONDAY.replace(hour=9, minute=40)),
+        # A legacy half-hour booking straddling two template slots
+        (MONDAY.replace(hour=14, minute=15), MONDAY.replace(hour=14, minute=45)),
+    ]
+    free = [start.strftime("%H:%M") for start, _ in availability.free_slots(slots, booked)]
+    assert free == ["09:00", "09:40", "10:00", "10:20"]
+
+
+def test_a_slot_can_only_be_booked_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slots.db'}")
+    SQLModel.metadata.create_all(engine)
+    slot = (MONDAY.replace(hour=9), MONDAY.replace(hour=9, minute=20))
+    with Session(engine) as session:
+        session.add(Appointment(doctor_id=1, patient_id=1, appointment_time=slot[0], slot_start=slot[0], slot_end=slot[1]))
+        # Cancelled bookings hold no slot
+        session.add(Appointment(doctor_id=1, patient_id=2, appointment_time=slot[0]))
+        session.commit()
+
+        assert session.exec(availability.conflicts(1, slot)).first()
+        assert not session.exec(availability.conflicts(2, slot)).first()
+        statement = availability.booked_statement(1, MONDAY, MONDAY + timedelta(days=7))
+        compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+        plan = " ".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        assert "ux_appointment_doctor_id_slot_start" in plan
+
+        session.add(Appointment(doctor_id=1, patient_id=3, appointment_time=slot[0], slot_start=slot[0], slot_end=slot[1]))
+        with pytest.raises(IntegrityError):
+            session.commit()
+
+
+def test_slots_accept_utc_timestamps(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slots.db'}")
+    SQLModel.metadata.create_all(engine)
+    # A Monday far enough ahead not to be clipped to now
+    monday = datetime(2030, 3, 4)
+    with Session(engine) as session:
+        doctor = Doctor(user=User(email="d@test.com", full_name="Doctor", role=UserRole.DOCTOR, hashed_password="x"), specialization="GP")
+        session.add(doctor)
+        session.commit()
+        session.add(DoctorSchedule(doctor_id=doctor.id, weekday=0, start_time=time(9), end_time=time(10)))
+        session.commit()
+
+        # ?from=2030-03-04T09:00:00Z&to=2030-03-04T09:31:00Z
+        slots = doctors.get_doctor_slots(
+            doctor.id,
+            date_from=monday.replace(hour=9, tzinfo=timezone.utc),
+            date_to=monday.replace(hour=9, minute=31, tzinfo=timezone.utc),
+            db=session,
+            principal=None,
+        )
+    assert [(slot.start, slot.end) for slot in slots] == [
+        (monday.replace(hour=9), monday.replace(hour=9, minute=30)),
+        (monday.replace(hour=9, minute=30), monday.replace(hour=10)),
+    ]
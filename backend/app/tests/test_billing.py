@@ -0,0 +1,95 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from app.api.v1.endpoints.billing import _create_invoices, pay_invoice, topup_wallet
+from app.api.v1.endpoints.billing_reports import get_aging_report, get_collections_report, get_revenue_report
+from app.core.principal import Principal
+from app.db.revenue import rebuild_rollups
+from app.db.sequences import invoice_numbers
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.stats import RevenueRollup
+from app.models.transaction import PaymentMethod
+from app.models.user import User, UserRole
+from app.schemas.finance import InvoiceCreate, InvoiceItemCreate, WalletTopup
+
+
+def test_invoices_are_numbered_and_created_in_one_transaction(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'billing.db'}")
+    SQLModel.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2].split()[0]))
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+
+    invoices_in = [
+        InvoiceCreate(
+            patient_id=1,
+            amount=30,
+            due_date=datetime(2026, 1, 31),
+            items=[InvoiceItemCreate(description=f"item {n}", amount=10) for n in range(3)],
+        )
+        for _ in range(4)
+    ]
+    year = datetime.now().year
+    with Session(engine) as session:
+        created = _create_invoices(session, invoices_in)
+        assert [invoice.invoice_number for invoice in created] == [f"INV-{year}-{n:06d}" for n in range(1, 5)]
+        assert [item.description for item in created[2].items] == ["item 0", "item 1", "item 2"]
+        assert all(item.invoice_id == created[2].id for item in created[2].items)
+        # sequence upsert, one INSERT for the invoices, one for all 12 items,
+        # one upsert for the report rollups; no SELECT
+        assert statements == ["INSERT", "INSERT", "INSERT", "INSERT"]
+        assert len(commits) == 1
+
+        assert len(session.exec(select(InvoiceItem)).all()) == 12
+        assert invoice_numbers(session, year) == [f"INV-{year}-000005"]
+        # A rolled back allocation is handed out again
+        session.rollback()
+        assert invoice_numbers(session, year) == [f"INV-{year}-000005"]
+        assert invoice_numbers(session, year + 1) == [f"INV-{year + 1}-000001"]
+
+
+def test_reports_answer_from_rollups_kept_in_step_with_billing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reports.db'}")
+    SQLModel.metadata.create_all(engine)
+    patient = Principal(user=User(id=1, email="p@x", full_name="P", role=UserRole.PATIENT), patient_id=1)
+    accountant = Principal(user=User(id=2, email="a@x", full_name="A", role=UserRole.ACCOUNTANT))
+    today = date.today()
+
+    with Session(engine) as session:
+        created = _create_invoices(session, [
+            InvoiceCreate(patient_id=1, doctor_id=3, amount=amount, due_date=due, items=[])
+            for amount, due in ((100.5, datetime.now() + timedelta(days=5)), (40, datetime(2000, 1, 1)), (60, datetime.now() - timedelta(days=45)))
+        ])
+        topup_wallet(db=session, topup_in=WalletTopup(amount=150, payment_method=PaymentMethod.CARD, reference="T1"), principal=patient)
+        pay_invoice(db=session, invoice_id=created[0].id, payment_method=PaymentMethod.WALLET, principal=patient)
+        pay_invoice(db=session, invoice_id=created[1].id, payment_method=PaymentMethod.CASH, principal=accountant)
+
+        revenue = get_revenue_report(date_from=today, date_to=today, group_by="payment_method", db=session, principal=accountant)
+        assert revenue["totals"]["invoiced"] == 200.5 and revenue["totals"]["invoiced_count"] == 3
+        assert revenue["totals"]["collected"] == 140.5 and revenue["totals"]["topups"] == 150.0
+        assert {row["payment_method"]: row["collected"] for row in revenue["rows"]} == {"card": 0, "cash": 40.0, "wallet": 100.5}
+        by_doctor = get_revenue_report(date_from=today, date_to=today, group_by="doctor", db=session, principal=accountant)
+        assert [(row["doctor_id"], row["collected"]) for row in by_doctor["rows"]] == [(3, 140.5)]
+
+        aging = get_aging_report(as_of=today, db=session, principal=accountant)
+        assert {bucket["bucket"]: bucket["count"] for bucket in aging["buckets"]} == {
+            "current": 0, "1-30": 0, "31-60": 1, "61-90": 0, "90+": 0
+        }
+        assert aging["total"] == {"count": 1, "amount": 60.0}
+
+        collections = get_collections_report(date_from=today, date_to=today, db=session, principal=accountant)
+        assert collections["collection_rate"] == round(140.5 / 200.5, 4)
+        assert collections["by_method"] == {"wallet": 100.5, "cash": 40.0}
+
+        # The incremental rollups match a rebuild from the base tables
+        def rollups():
+            return sorted(
+                (row.metric, row.day, row.dimension, row.bucket, row.count, row.amount_minor)
+                for row in session.exec(select(RevenueRollup)).all()
+                if row.count or row.amount_minor
+            )
+
+        incremental = rollups()
+        rebuild_rollups(session.connection())
+        assert rollups() == incremental
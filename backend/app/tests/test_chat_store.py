@@ -0,0 +1,138 @@
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from app.core.config import settings
+from app.db.chat_store import ChatStore, SequenceGenerator, chat_worker_id
+from app.models.consultation import Consultation
+
+
+def test_sequence_is_unique_and_ordered():
+    generator = SequenceGenerator(worker_id=3)
+    other = SequenceGenerator(worker_id=4)
+    ids = [generator.next() for _ in range(10000)] + [other.next() for _ in range(100)]
+    assert len(set(ids)) == len(ids)
+    assert ids[:10000] == sorted(ids[:10000])
+    assert max(ids) < 2 ** 53
+    with pytest.raises(ValueError):
+        SequenceGenerator(worker_id=32)
+
+
+def test_worker_id_is_required_once_workers_share_rooms(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_WORKER_ID", None)
+    monkeypatch.setattr(settings, "PUBSUB_BACKEND", "memory")
+    assert chat_worker_id() == 0
+
+    monkeypatch.setattr(settings, "PUBSUB_BACKEND", "redis")
+    with pytest.raises(RuntimeError):
+        chat_worker_id()
+    with pytest.raises(RuntimeError):
+        ChatStore(worker_id=None).start()
+
+    monkeypatch.setattr(settings, "CHAT_WORKER_ID", 9)
+    assert chat_worker_id() == 9
+
+
+def test_messages_are_written_in_batches_and_resumable(tmp_path):
+    path = tmp_path / "chat.db"
+    SQLModel.metadata.create_all(create_engine(f"sqlite:///{path}"))
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        inserts = []
+        event.listen(
+            engine.sync_engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: inserts.append(statement) if statement.startswith("INSERT") else None,
+        )
+        store = ChatStore(engine=engine, worker_id=1, batch_size=1000, flush_interval=60)
+
+        # A senderName in the frame is ignored for the authenticated sender
+        sent = [
+            await store.append(7, f'{{"senderName": "Mallory", "text": "msg {i}"}}', sender_user_id=3, sender_name="Dr A")
+            for i in range(50)
+        ]
+        await store.append(8, "other room")
+        assert store.stats()["pending"] == 51
+
+        # Reading flushes the buffer: one INSERT for all 51 rows
+        page = await store.history(7, limit=20)
+        assert len(inserts) == 1
+        assert [m["body"] for m in page] == [f"msg {i}" for i in range(30, 50)]
+        assert (page[0]["sender_user_id"], page[0]["sender_name"]) == (3, "Dr A")
+
+        older = await store.history(7, before_seq=page[0]["seq"], limit=100)
+        assert [m["seq"] for m in older] == [m["seq"] for m in sent[:30]]
+
+        resumed = await store.history(7, after_seq=sent[44]["seq"])
+        assert [m["body"] for m in resumed] == [f"msg {i}" for i in range(45, 50)]
+
+        await store.stop()
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_bad_row_is_dropped_without_holding_up_later_messages(tmp_path):
+    path = tmp_path / "chat.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    with Session(sync_engine) as session:
+        session.add(Consultation(id=7, appointment_id=1, doctor_id=1, patient_id=1, symptoms="s", diagnosis="d"))
+        session.commit()
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        # Enforce chatmessage.consultation_id as PostgreSQL would
+        event.listen(engine.sync_engine, "connect", lambda connection, record: connection.execute("PRAGMA foreign_keys=ON"))
+        store = ChatStore(engine=engine, worker_id=1, batch_size=1000, flush_interval=60)
+
+        await store.append(7, "before")
+        await store.append(999, "no such consultation")
+        await store.append(7, "after")
+        # The failed batch is written row by row; only the bad row is lost
+        assert await store.flush() == 2
+        assert store.stats()["dropped_rows"] == 1 and store.stats()["pending"] == 0
+
+        await store.append(7, "next batch")
+        assert [m["body"] for m in await store.history(7)] == ["before", "after", "next batch"]
+
+        await store.stop()
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_locked_batch_is_retried_a_bounded_number_of_times(tmp_path, monkeypatch):
+    path = tmp_path / "chat.db"
+    SQLModel.metadata.create_all(create_engine(f"sqlite:///{path}"))
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        store = ChatStore(engine=engine, worker_id=1, batch_size=1000, flush_interval=60, max_attempts=3)
+        insert = store._insert
+
+        async def locked(rows):
+            if len(rows) > 1:
+                raise OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+            await insert(rows)
+
+        monkeypatch.setattr(store, "_insert", locked)
+        await store.append(7, "one")
+        await store.append(7, "two")
+        with pytest.raises(OperationalError):
+            await store.flush()
+        assert store.stats()["pending"] == 2
+        # History still answers, from what is stored, while the flush fails
+        assert await store.history(7) == []
+        assert store.stats()["pending"] == 2
+        # Out of attempts: written one row at a time instead
+        assert await store.flush() == 2
+
+        await store.stop()
+        await engine.dispose()
+
+    asyncio.run(scenario())
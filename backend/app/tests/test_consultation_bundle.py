@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from app.api.pagination import PageParams
+from app.api.v1.endpoints.consultations import get_consultation_bundle, get_my_consultation_bundles
+from app.core.principal import Principal
+from app.models.appointment import Appointment
+from app.models.consultation import Consultation
+from app.models.lab_result import LabResult
+from app.models.prescription import Prescription
+from app.models.user import Doctor, Patient, User, UserRole
+from app.schemas import ConsultationBundle
+
+
+def _page(limit):
+    return PageParams(
+        limit=limit, cursor=None, sort=None, order="desc", patient_id=None,
+        date_from=None, date_to=None, status=None, unpaginated=False,
+    )
+
+
+def test_bundles_load_in_a_fixed_number_of_queries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bundle.db'}")
+    SQLModel.metadata.create_all(engine)
+    start = datetime(2026, 1, 1)
+    with Session(engine) as session:
+        doctor = Doctor(user=User(email="d@test.com", full_name="Doctor", role=UserRole.DOCTOR, hashed_password="x"), specialization="GP")
+        patient_user = User(email="p@test.com", full_name="Patient", role=UserRole.PATIENT, hashed_password="x")
+        patient = Patient(user=patient_user)
+        for i in range(6):
+            appointment = Appointment(doctor=doctor, patient=patient, appointment_time=start + timedelta(days=i))
+            session.add(Consultation(
+                appointment=appointment, doctor=doctor, patient=patient, symptoms="cough", diagnosis=f"d{i}",
+                created_at=start + timedelta(days=i),
+                prescriptions=[
+                    Prescription(patient=patient, doctor=doctor, medication=f"m{i}-{n}", dosage="1", frequency="daily", duration="5d")
+                    for n in range(2)
+                ],
+                lab_results=[LabResult(patient=patient, test_name="FBC", result="ok")],
+            ))
+        session.commit()
+        principal = Principal(user=User(id=patient_user.id, email="p@test.com", full_name="Patient", role=UserRole.PATIENT), patient_id=patient.id)
+        session.expunge_all()
+
+        def bundles(limit):
+            statements = []
+
+            def count(*args):
+                statements.append(args[2])
+
+            event.listen(engine, "before_cursor_execute", count)
+            rows = get_my_consultation_bundles(Response(), _page(limit), session, principal)
+            payload = [ConsultationBundle.model_validate(row, from_attributes=True) for row in rows]
+            event.remove(engine, "before_cursor_execute", count)
+            session.expunge_all()
+            return payload, len(statements)
+
+        two, two_queries = bundles(2)
+        six, six_queries = bundles(6)
+        assert [bundle.diagnosis for bundle in six] == ["d5", "d4", "d3", "d2", "d1", "d0"]
+        assert [p.medication for p in six[0].prescriptions] == ["m5-0", "m5-1"]
+        assert six[0].lab_results[0].test_name == "FBC"
+        assert six[0].appointment.doctor.user.full_name == "Doctor"
+        assert six[0].patient.user.email == "p@test.com"
+        # consultation page + appointment, doctor, doctor.user, patient,
+        # patient.user, prescriptions, lab results
+        assert two_queries == six_queries == 8
+
+        single = get_consultation_bundle(db=session, id=six[0].id, principal=principal)
+        assert ConsultationBundle.model_validate(single, from_attributes=True) == six[0]
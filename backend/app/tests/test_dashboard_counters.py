@@ -0,0 +1,74 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from app.db import counters
+from app.models.appointment import Appointment
+from app.models.bed import Bed, BedStatus
+from app.models.lab_result import LabResult
+from app.models.user import User, UserRole, Doctor, Patient
+
+
+def _snapshot(session, doctor_id):
+    today = counters.day_key(date.today())
+    keys = [
+        (counters.APPOINTMENTS, today, counters.ALL_DOCTORS),
+        (counters.APPOINTMENTS, today, doctor_id),
+        (counters.PATIENTS, counters.TOTAL, counters.ALL_DOCTORS),
+        (counters.BEDS_AVAILABLE, counters.TOTAL, counters.ALL_DOCTORS),
+        (counters.LABS_PENDING, counters.TOTAL, counters.ALL_DOCTORS),
+    ]
+    return list(counters.read_counters(session, keys).values())
+
+
+def test_counters_follow_writes_and_match_rebuild(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'counters.db'}")
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now().replace(hour=12)
+
+    with Session(engine) as session:
+        doctor_user = User(email="d@test.com", full_name="Doctor", role=UserRole.DOCTOR, hashed_password="x")
+        patient_user = User(email="p@test.com", full_name="Patient", role=UserRole.PATIENT, hashed_password="x")
+        session.add_all([doctor_user, patient_user])
+        session.commit()
+        doctor = Doctor(user_id=doctor_user.id, specialization="GP")
+        patient = Patient(user_id=patient_user.id)
+        session.add_all([doctor, patient])
+        session.commit()
+
+        session.add_all([
+            Appointment(doctor_id=doctor.id, patient_id=patient.id, appointment_time=now),
+            Appointment(doctor_id=doctor.id, patient_id=patient.id, appointment_time=now + timedelta(days=1)),
+            Bed(ward_name="A", bed_number="1"),
+            Bed(ward_name="A", bed_number="2"),
+            LabResult(patient_id=patient.id, test_name="FBC", result="-", status="pending"),
+        ])
+        session.commit()
+        assert _snapshot(session, doctor.id) == [1, 1, 1, 2, 1]
+
+        # Moving an appointment into today, occupying a bed, completing a lab
+        tomorrow = session.get(Appointment, 2)
+        tomorrow.appointment_time = now
+        bed = session.get(Bed, 1)
+        bed.status = BedStatus.OCCUPIED
+        lab = session.get(LabResult, 1)
+        lab.status = "completed"
+        session.add_all([tomorrow, bed, lab])
+        session.commit()
+        assert _snapshot(session, doctor.id) == [2, 2, 1, 1, 0]
+
+        session.delete(session.get(Appointment, 1))
+        session.commit()
+        before = _snapshot(session, doctor.id)
+        assert before == [1, 1, 1, 1, 0]
+
+    with engine.begin() as connection:
+        counters.rebuild_counters(connection)
+    with Session(engine) as session:
+        assert _snapshot(session, doctor.id) == before
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with Session(engine) as session:
+        _snapshot(session, doctor.id)
+    assert len(statements) == 1
+    assert "count(" not in statements[0].lower()
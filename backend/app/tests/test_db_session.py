@@ -0,0 +1,22 @@
+from sqlalchemy import text
+from app.db.session import build_engine, engine_options
+
+
+def test_sqlite_engine_profile(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    options = engine_options(url)
+    assert options["echo"] is False
+    assert options["pool_size"] > 0
+
+    engine = build_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+    engine.dispose()
+
+
+def test_postgres_engine_profile():
+    options = engine_options("postgresql+psycopg2://user:pw@localhost/najbel")
+    assert options["pool_pre_ping"] is True
+    assert "statement_timeout" in options["connect_args"]["options"]
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select
+from app.core.idempotency import REPLAYED_HEADER, IdempotencyMiddleware, IdempotencyStore
+from app.core.security import create_access_token
+from app.models.idempotency import IdempotencyRecord
+
+
+def _client(tmp_path):
+    path = tmp_path / "idempotency.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    store = IdempotencyStore(create_async_engine(f"sqlite+aiosqlite:///{path}"))
+
+    calls = []
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=store, routes=[("POST", r"/pay/\d+")], prefix="")
+
+    @app.post("/pay/{invoice_id}")
+    def pay(invoice_id: int, body: dict):
+        calls.append(invoice_id)
+        if body.get("fail"):
+            raise HTTPException(status_code=503, detail="Try again")
+        return {"paid": invoice_id, "call": len(calls)}
+
+    headers = {"Authorization": f"Bearer {create_access_token(7)}"}
+    return TestClient(app), headers, calls, store, sync_engine
+
+
+def test_retries_replay_the_stored_response(tmp_path):
+    client, headers, calls, store, _ = _client(tmp_path)
+    keyed = {**headers, "Idempotency-Key": "k1"}
+
+    first = client.post("/pay/1", json={"amount": 5}, headers=keyed)
+    again = client.post("/pay/1", json={"amount": 5}, headers=keyed)
+    assert first.json() == again.json() == {"paid": 1, "call": 1}
+    assert again.headers[REPLAYED_HEADER] == "true" and REPLAYED_HEADER not in first.headers
+    assert calls == [1]
+
+    # Same key for another request is refused; without a key nothing is cached
+    assert client.post("/pay/2", json={"amount": 5}, headers=keyed).status_code == 422
+    client.post("/pay/1", json={"amount": 5}, headers=headers)
+    assert calls == [1, 1]
+    # Keys belong to the user who sent them
+    other = {"Authorization": f"Bearer {create_access_token(8)}", "Idempotency-Key": "k1"}
+    assert client.post("/pay/1", json={"amount": 5}, headers=other).json()["call"] == 3
+    assert store.replayed == 1
+
+
+def test_failures_are_not_stored_and_running_keys_conflict(tmp_path):
+    client, headers, calls, store, sync_engine = _client(tmp_path)
+    keyed = {**headers, "Idempotency-Key": "k2"}
+
+    assert client.post("/pay/1", json={"fail": True}, headers=keyed).status_code == 503
+    assert client.post("/pay/1", json={"fail": True}, headers=keyed).status_code == 503
+    assert calls == [1, 1]
+
+    # A key claimed by a request that has not finished yet
+    assert asyncio.run(store.begin("running", "hash")) is None
+    assert asyncio.run(store.begin("running", "hash")).status_code is None
+
+
+def test_expired_keys_are_purged(tmp_path):
+    client, headers, calls, store, sync_engine = _client(tmp_path)
+    client.post("/pay/1", json={}, headers={**headers, "Idempotency-Key": "old"})
+    client.post("/pay/1", json={}, headers={**headers, "Idempotency-Key": "new"})
+    with Session(sync_engine) as session:
+        old = session.exec(select(IdempotencyRecord)).first()
+        old.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.add(old)
+        session.commit()
+
+    assert asyncio.run(store.purge_expired()) == 1
+    with Session(sync_engine) as session:
+        assert len(session.exec(select(IdempotencyRecord)).all()) == 1
@@ -3,6 +3,8 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.api import deps
 from sqlmodel import Session, create_engine, SQLModel
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.user import User, UserRole, Patient, Doctor
 from app.models.prescription import Prescription
 from app.models.medical_record import MedicalRecord
@@ -10,12 +12,19 @@ from app.models.medical_record import MedicalRecord
 # Setup test database
 sqlite_url = "sqlite:///./test.db"
 engine = create_engine(sqlite_url, connect_args={"check_same_thread": False})
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+AsyncTestSession = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 def get_test_db():
     with Session(engine) as session:
         yield session
 
+async def get_test_async_db():
+    async with AsyncTestSession() as session:
+        yield session
+
 app.dependency_overrides[deps.get_db] = get_test_db
+app.dependency_overrides[deps.get_async_db] = get_test_async_db
 
 client = TestClient(app)
 
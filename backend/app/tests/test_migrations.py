@@ -0,0 +1,163 @@
+from datetime import datetime
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, create_engine
+from app.core.config import settings
+from app.db.counters import rebuild_counters
+from app.db.migrate import alembic_config, check_schema, current_revision, head_revision, upgrade
+from app.db.revenue import rebuild_rollups
+from app.db.search import search_clinical, search_patients
+from app.models.appointment import Appointment, CommunicationPreference
+from app.models.bed import Bed, BedStatus
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.lab_result import LabResult
+from app.models.medical_record import MedicalRecord
+from app.models.transaction import PaymentMethod, Transaction, TransactionStatus, TransactionType
+from app.models.user import Doctor, Patient, User, UserRole
+from app.models.wallet import Wallet
+
+# appointment as create_all() plus the old migrate_db.py left it: no slot
+# columns, communication_preference nullable with a lower-case default
+LEGACY_APPOINTMENT = """
+CREATE TABLE appointment (
+    doctor_id INTEGER NOT NULL REFERENCES doctor (id),
+    patient_id INTEGER NOT NULL REFERENCES patient (id),
+    appointment_time DATETIME NOT NULL,
+    type VARCHAR(7) NOT NULL,
+    status VARCHAR(9) NOT NULL,
+    reason VARCHAR,
+    meeting_link VARCHAR,
+    notes VARCHAR,
+    id INTEGER NOT NULL PRIMARY KEY,
+    created_at DATETIME NOT NULL,
+    communication_preference TEXT DEFAULT 'in_app_chat'
+)
+"""
+
+
+def test_new_database_is_created_at_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    with pytest.raises(RuntimeError, match="python -m app.db.migrate"):
+        check_schema(engine)
+    upgrade(engine)
+    assert current_revision(engine) == head_revision()
+    check_schema(engine)
+    tables = set(inspect(engine).get_table_names())
+    assert set(SQLModel.metadata.tables) <= tables
+
+    # The revisions add up to exactly what the models describe (search
+    # index tables aside, they aren't models)
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={
+            "compare_type": True,
+            "include_name": lambda name, type_, parent: type_ != "table" or name in SQLModel.metadata.tables,
+        })
+        assert compare_metadata(context, SQLModel.metadata) == []
+
+    # Running it again is a no-op
+    upgrade(engine)
+    assert current_revision(engine) == head_revision()
+
+    command.downgrade(alembic_config(engine), "base")
+    assert current_revision(engine) is None
+    assert set(inspect(engine).get_table_names()) <= {"alembic_version", "sqlite_stat1"}
+
+
+def test_legacy_database_is_brought_to_head(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MIGRATION_CHUNK_SIZE", 2)
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(LEGACY_APPOINTMENT)
+    SQLModel.metadata.create_all(engine)
+    nine, ten = "2026-01-01 09:00:00.000000", "2026-01-01 10:00:00.000000"
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO appointment (id, doctor_id, patient_id, appointment_time, type, status, created_at, communication_preference) VALUES "
+            f"(1, 1, 1, '{nine}', 'OFFLINE', 'PENDING', '{nine}', NULL), "
+            # Double-booked before slots existed: only the earliest keeps it
+            f"(2, 1, 2, '{nine}', 'OFFLINE', 'CONFIRMED', '{nine}', 'in_app_chat'), "
+            f"(3, 1, 3, '{ten}', 'ONLINE', 'CANCELLED', '{nine}', 'video_whatsapp'), "
+            f"(4, 1, 3, '{ten}', 'ONLINE', 'PENDING', '{nine}', 'VIDEO_WHATSAPP'), "
+            f"(5, 2, 1, '{nine}', 'OFFLINE', 'PENDING', '{nine}', 'IN_APP_CHAT')"
+        )
+
+    upgrade(engine)
+
+    assert current_revision(engine) == head_revision()
+    columns = {c["name"]: c for c in inspect(engine).get_columns("appointment")}
+    assert not columns["communication_preference"]["nullable"]
+    assert columns["communication_preference"]["default"] is None
+    indexes = {i["name"]: i for i in inspect(engine).get_indexes("appointment")}
+    assert indexes["ux_appointment_doctor_id_slot_start"]["unique"]
+    assert {"ix_appointment_appointment_time", "ix_appointment_patient_id_appointment_time"} <= set(indexes)
+    with Session(engine) as session:
+        rows = {a.id: a for a in session.query(Appointment)}
+        assert [a.slot_start for a in rows.values()] == [datetime(2026, 1, 1, 9), None, None, datetime(2026, 1, 1, 10), datetime(2026, 1, 1, 9)]
+        assert rows[1].slot_end == datetime(2026, 1, 1, 9, 30)
+        assert rows[1].communication_preference == CommunicationPreference.IN_APP_CHAT
+        assert rows[3].communication_preference == CommunicationPreference.VIDEO_WHATSAPP
+        assert session.execute(text("PRAGMA integrity_check")).scalar() == "ok"
+
+
+def test_baseline_seeds_derived_tables_like_the_app_rebuilds(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    SQLModel.metadata.create_all(engine)
+    day, later = datetime(2026, 1, 1, 9), datetime(2026, 1, 2, 11)
+    with Session(engine) as session:
+        doctor = Doctor(user=User(email="d@test.com", full_name="Dr Ada", role=UserRole.DOCTOR, hashed_password="x"), specialization="GP")
+        patient = Patient(user=User(email="p@test.com", full_name="Musa Bello", role=UserRole.PATIENT, hashed_password="x"))
+        session.add_all([doctor, patient])
+        session.commit()
+        invoice = Invoice(invoice_number="INV-1", patient_id=patient.id, doctor_id=doctor.id, amount=1500.255,
+                          status=InvoiceStatus.PARTIAL, due_date=later, created_at=day)
+        session.add_all([
+            Appointment(doctor_id=doctor.id, patient_id=patient.id, appointment_time=day),
+            Appointment(doctor_id=doctor.id, patient_id=patient.id, appointment_time=later),
+            Bed(ward_name="A", bed_number="1", status=BedStatus.AVAILABLE),
+            Bed(ward_name="A", bed_number="2", status=BedStatus.OCCUPIED),
+            LabResult(patient_id=patient.id, test_name="FBC", result="-", status="pending"),
+            MedicalRecord(patient_id=patient.id, doctor_id=doctor.id, diagnosis="Malaria", symptoms="fever",
+                          treatment="ACT", visit_date=day),
+            Wallet(patient_id=patient.id, balance_minor=250000, balance=2500.0),
+            invoice,
+        ])
+        session.commit()
+        session.add_all([
+            Transaction(invoice_id=invoice.id, patient_id=patient.id, amount=500.0, type=TransactionType.PAYMENT,
+                        payment_method=PaymentMethod.CARD, reference="T1", created_at=later),
+            Transaction(patient_id=patient.id, amount=2500.0, type=TransactionType.TOPUP,
+                        payment_method=PaymentMethod.CASH, reference="T2", created_at=day),
+            Transaction(patient_id=patient.id, amount=99.0, type=TransactionType.PAYMENT,
+                        payment_method=PaymentMethod.CASH, status=TransactionStatus.FAILED, reference="T3"),
+        ])
+        session.commit()
+    # As before these tables existed
+    with engine.begin() as connection:
+        for table in ("statcounter", "walletentry", "revenuerollup", "patient_search", "clinical_search"):
+            connection.exec_driver_sql(f"DROP TABLE {table}")
+
+    upgrade(engine)
+
+    def rows(connection, table, columns):
+        return sorted(connection.execute(text(f"SELECT {columns} FROM {table}")).all())
+
+    with engine.begin() as connection:
+        seeded = {
+            "statcounter": rows(connection, "statcounter", "name, day, doctor_id, value"),
+            "revenuerollup": rows(connection, "revenuerollup", "metric, day, dimension, bucket, count, amount_minor"),
+        }
+        assert rows(connection, "walletentry", "wallet_id, type, amount_minor, balance_after_minor") == [(1, "opening", 250000, 250000)]
+        rebuild_counters(connection)
+        rebuild_rollups(connection)
+        assert rows(connection, "statcounter", "name, day, doctor_id, value") == seeded["statcounter"]
+        assert rows(connection, "revenuerollup", "metric, day, dimension, bucket, count, amount_minor") == seeded["revenuerollup"]
+    assert ("beds_available", "", 0, 1) in seeded["statcounter"]
+    assert ("invoiced", "2026-01-01", "all", "", 1, 150026) in seeded["revenuerollup"]
+
+    with Session(engine) as session:
+        assert [hit["full_name"] for hit in search_patients(session, "bello", 5)] == ["Musa Bello"]
+        assert [hit["type"] for hit in search_clinical(session, "malaria")] == ["medical_record"]
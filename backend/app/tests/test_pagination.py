@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.api.pagination import NEXT_CURSOR_HEADER, PageParams, paginate
+from app.api.v1.endpoints.vitals import VITALS_LIST
+from app.models.vitals import Vitals
+
+
+def page_params(**overrides):
+    values = dict(
+        limit=50, cursor=None, sort=None, order="desc", patient_id=None,
+        date_from=None, date_to=None, status=None, unpaginated=False,
+    )
+    values.update(overrides)
+    return PageParams(**values)
+
+
+@pytest.fixture(name="session")
+def session_fixture(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pages.db'}")
+    SQLModel.metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    with Session(engine) as session:
+        # Pairs of rows share a timestamp so the id tie-breaker matters
+        for i in range(25):
+            session.add(Vitals(patient_id=1 + i % 2, heart_rate=60 + i, recorded_at=start + timedelta(hours=i // 2)))
+        session.commit()
+        yield session
+
+
+def test_keyset_pages_cover_every_row_once(session: Session):
+    seen = []
+    cursor = None
+    while True:
+        response = Response()
+        rows = paginate(session, select(Vitals), VITALS_LIST, page_params(limit=7, cursor=cursor), response)
+        seen.extend(row.id for row in rows)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    times = [session.get(Vitals, i).recorded_at for i in seen]
+    assert times == sorted(times, reverse=True)
+
+
+def test_filters_and_opt_in(session: Session):
+    rows = paginate(
+        session, select(Vitals), VITALS_LIST,
+        page_params(patient_id=2, date_from=datetime(2025, 1, 1, 2), date_to=datetime(2025, 1, 1, 4), order="asc"),
+    )
+    assert [row.recorded_at.hour for row in rows] == [2, 3]
+    assert all(row.patient_id == 2 for row in rows)
+
+    assert len(paginate(session, select(Vitals), VITALS_LIST, page_params(limit=5, unpaginated=True))) == 25
+
+
+def test_rejects_bad_sort_and_cursor(session: Session):
+    with pytest.raises(HTTPException):
+        paginate(session, select(Vitals), VITALS_LIST, page_params(sort="heart_rate"))
+    with pytest.raises(HTTPException):
+        paginate(session, select(Vitals), VITALS_LIST, page_params(cursor="not-a-cursor"))
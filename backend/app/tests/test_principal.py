@@ -0,0 +1,63 @@
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from app.core.principal import load_principal, principal_cache
+from app.models.user import User, UserRole, Patient
+
+
+def test_principal_cache_and_invalidation(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'principal.db'}")
+    SQLModel.metadata.create_all(engine)
+    principal_cache.clear()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    with Session(engine) as session:
+        user = User(email="p@test.com", full_name="Patient", role=UserRole.PATIENT, hashed_password="x")
+        session.add(user)
+        session.commit()
+        patient = Patient(user_id=user.id)
+        session.add(patient)
+        session.commit()
+        user_id, patient_id = user.id, patient.id
+
+    with Session(engine) as session:
+        statements.clear()
+        principal = load_principal(session, user_id)
+        assert principal.patient_id == patient_id
+        assert principal.doctor_id is None
+        assert len(statements) == 1
+
+        statements.clear()
+        assert load_principal(session, user_id) is principal
+        assert statements == []
+
+    with Session(engine) as session:
+        user = session.get(User, user_id)
+        user.is_active = False
+        session.add(user)
+        session.commit()
+
+    with Session(engine) as session:
+        assert load_principal(session, user_id).user.is_active is False
+
+
+def test_load_racing_an_invalidation_is_not_cached(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'principal.db'}")
+    SQLModel.metadata.create_all(engine)
+    principal_cache.clear()
+    with Session(engine) as session:
+        user = User(email="p@test.com", full_name="Patient", role=UserRole.PATIENT, hashed_password="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+    def concurrent_write(*args):
+        # Another request changes the user while this one reads the row
+        principal_cache.invalidate(user_id)
+
+    event.listen(engine, "before_cursor_execute", concurrent_write)
+    with Session(engine) as session:
+        assert load_principal(session, user_id).id == user_id
+    event.remove(engine, "before_cursor_execute", concurrent_write)
+    assert principal_cache.get(user_id) is None
@@ -0,0 +1,79 @@
+import re
+from datetime import datetime, timedelta
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from app.api.pagination import PageParams
+from app.api.v1.endpoints import (
+    appointments, attendance, billing, consultations, doctors, labs, medical_records,
+    patients, prescriptions, referrals, users, vitals,
+)
+from app.core.principal import Principal
+from app.models.appointment import Appointment
+from app.models.consultation import Consultation
+from app.models.user import Doctor, Patient, User, UserRole
+
+# A plan step reading a whole table: "SCAN vitals", not "SCAN vitals USING INDEX ..."
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def _page(**overrides):
+    values = dict(
+        limit=20, cursor=None, sort=None, order="desc", patient_id=None,
+        date_from=None, date_to=None, status=None, unpaginated=False,
+    )
+    values.update(overrides)
+    return PageParams(**values)
+
+
+def test_endpoint_queries_use_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        doctor_user = User(email="d@test.com", full_name="Doctor", role=UserRole.DOCTOR, hashed_password="x")
+        patient_user = User(email="p@test.com", full_name="Patient", role=UserRole.PATIENT, hashed_password="x")
+        doctor, patient = Doctor(user=doctor_user, specialization="GP"), Patient(user=patient_user)
+        appointment = Appointment(doctor=doctor, patient=patient, appointment_time=datetime(2026, 1, 1, 9))
+        session.add(Consultation(appointment=appointment, doctor=doctor, patient=patient, symptoms="s", diagnosis="d"))
+        session.commit()
+        as_doctor = Principal(user=User(id=doctor_user.id, email="d@test.com", full_name="Doctor", role=UserRole.DOCTOR), doctor_id=doctor.id)
+        as_patient = Principal(user=User(id=patient_user.id, email="p@test.com", full_name="Patient", role=UserRole.PATIENT), patient_id=patient.id)
+        patient_id, staff_user = patient.id, session.get(User, doctor_user.id)
+
+        queries = []
+
+        def capture(connection, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                queries.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        for principal in (as_doctor, as_patient):
+            appointments.read_appointments(Response(), _page(), session, principal)
+            vitals.get_vitals(Response(), _page(), session, principal)
+            labs.get_lab_results(Response(), _page(), session, principal)
+            prescriptions.get_prescriptions(Response(), _page(), session, principal)
+            medical_records.get_medical_records(Response(), _page(), session, principal)
+        vitals.get_vitals(Response(), _page(patient_id=patient_id), session, as_doctor)
+        billing.get_all_invoices(Response(), _page(), session, staff_user)
+        billing.get_my_invoices(session, as_patient)
+        billing.get_my_wallet_entries(Response(), _page(), session, as_patient)
+        billing.get_my_transactions(session, as_patient)
+        consultations.get_my_consultations(session, as_patient)
+        consultations.get_consultation_by_appointment(db=session, appointment_id=appointment.id, current_user=staff_user)
+        consultations.get_my_consultation_bundles(Response(), _page(), session, as_patient)
+        referrals.get_received_referrals(session, as_doctor)
+        users.get_my_patients(session, as_doctor)
+        attendance.check_in(db=session, current_user=staff_user)
+        attendance.read_attendance_history(Response(), _page(), session, staff_user)
+        patients.timeline(patient_id, Response(), 20, None, None, None, None, session, as_doctor)
+        start = datetime.now() + timedelta(days=1)
+        doctors.get_doctor_slots(doctor.id, start, start + timedelta(days=7), session, as_patient)
+        event.remove(engine, "before_cursor_execute", capture)
+
+        assert len(queries) > 30
+        with engine.connect() as connection:
+            for statement, parameters in queries:
+                plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                scans = [step for step in plan if FULL_SCAN.match(step)]
+                assert not scans, f"{statement}\n{plan}"
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, text
+from sqlmodel import Session, SQLModel, create_engine, select
+from app.core.scheduler import JobBusy, Scheduler
+from app.db.maintenance import sweep_overdue_invoices
+from app.db.revenue import rebuild_rollups
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.stats import RevenueRollup
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_only_one_worker_runs_a_job_per_interval(tmp_path):
+    engine = _engine(tmp_path)
+    first, second = Scheduler(engine, owner="first"), Scheduler(engine, owner="second")
+    inside = []
+
+    def work(db):
+        # While this run holds the lease nobody else may start the job
+        with pytest.raises(JobBusy):
+            second.run("report", force=True)
+        inside.append(1)
+        return {"rows": 3}
+
+    for scheduler in (first, second):
+        scheduler.job("report", interval=3600)(work)
+
+    run = first.run("report")
+    assert (run["status"], run["owner"], run["result"]) == ("succeeded", "first", '{"rows": 3}')
+    assert run["duration_ms"] >= 0
+    # Not due again for an hour, on any worker
+    assert second.run_due() == 0 and first.run_due() == 0
+    assert inside == [1]
+
+    second.jobs["report"].func = lambda db: 1 / 0
+    failed = second.run("report", force=True)
+    assert failed["status"] == "failed" and failed["error"].startswith("ZeroDivisionError")
+
+    status = {job["name"]: job for job in first.status()["jobs"]}["report"]
+    assert status["recent_runs"] == 2 and status["recent_failures"] == 1 and not status["running"]
+    assert status["next_run_at"] > datetime.utcnow() + timedelta(minutes=59)
+    with Session(engine) as session:
+        assert first.prune_history(session, timedelta(0)) == 2
+
+
+def test_overdue_sweep_moves_due_invoices_in_batches(tmp_path):
+    engine = _engine(tmp_path)
+    now = datetime(2026, 3, 1)
+    with Session(engine) as session:
+        for n, (status, due) in enumerate([
+            (InvoiceStatus.PENDING, now - timedelta(days=40)),
+            (InvoiceStatus.PENDING, now - timedelta(days=2)),
+            (InvoiceStatus.PENDING, now - timedelta(days=1)),
+            (InvoiceStatus.PENDING, now + timedelta(days=1)),
+            (InvoiceStatus.PAID, now - timedelta(days=3)),
+        ]):
+            session.add(Invoice(invoice_number=f"INV-{n}", patient_id=1, amount=10, status=status, due_date=due))
+        session.commit()
+        rebuild_rollups(session.connection())
+        session.commit()
+
+        plan = " ".join(row[-1] for row in session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM invoice WHERE status = 'PENDING' AND due_date < '2026-03-01' ORDER BY due_date"
+        )))
+        assert "ix_invoice_status_due_date" in plan
+
+        assert sweep_overdue_invoices(session, now=now, batch_size=2) == {"updated": 3, "batches": 2}
+        statuses = [invoice.status for invoice in session.exec(select(Invoice).order_by(Invoice.id)).all()]
+        assert statuses == [InvoiceStatus.OVERDUE] * 3 + [InvoiceStatus.PENDING, InvoiceStatus.PAID]
+        assert sweep_overdue_invoices(session, now=now) == {"updated": 0, "batches": 0}
+
+        due = session.exec(
+            select(RevenueRollup.bucket, func.sum(RevenueRollup.count))
+            .where(RevenueRollup.metric == "due")
+            .group_by(RevenueRollup.bucket)
+        ).all()
+        assert dict(due) == {"overdue": 3, "pending": 1, "paid": 1}
@@ -0,0 +1,72 @@
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.db.search import search_patients
+from app.models.user import User, UserRole, Patient
+
+
+@pytest.fixture(name="session")
+def session_fixture(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i, (name, phone) in enumerate([
+            ("Musa Abdullahi", "08031234567"),
+            ("Fatima Bello", "08039876543"),
+            ("Aisha Musa", None),
+        ]):
+            user = User(email=f"user{i}@najbel.com", full_name=name, phone_number=phone,
+                        role=UserRole.PATIENT, hashed_password="x")
+            session.add(user)
+            session.commit()
+            session.add(Patient(user_id=user.id))
+            session.commit()
+        yield session
+
+
+def names(hits):
+    return {hit["full_name"] for hit in hits}
+
+
+def test_prefix_substring_and_phone(session: Session):
+    assert names(search_patients(session, "musa")) == {"Musa Abdullahi", "Aisha Musa"}
+    assert names(search_patients(session, "Fa")) == {"Fatima Bello"}
+    assert names(search_patients(session, "0803987")) == {"Fatima Bello"}
+
+
+def test_typo_tolerance(session: Session):
+    hits = search_patients(session, "abdulahi")
+    assert [hit["full_name"] for hit in hits] == ["Musa Abdullahi"]
+    assert hits[0]["score"] < 1
+
+
+def test_index_follows_user_updates(session: Session):
+    user = session.get(User, 2)
+    user.full_name = "Fatima Sani"
+    session.add(user)
+    session.commit()
+    assert names(search_patients(session, "sani")) == {"Fatima Sani"}
+    assert search_patients(session, "bello") == []
+
+
+def test_clinical_search_scoping(session: Session):
+    from datetime import datetime
+    from app.db.search import search_clinical
+    from app.models.medical_record import MedicalRecord
+    from app.models.prescription import Prescription
+
+    session.add(MedicalRecord(patient_id=1, doctor_id=1, diagnosis="Malaria", symptoms="fever",
+                              treatment="ACT", visit_date=datetime(2026, 8, 1)))
+    session.add(MedicalRecord(patient_id=2, doctor_id=1, diagnosis="Typhoid", symptoms="fevers, malaria ruled out",
+                              treatment="Cipro", visit_date=datetime(2026, 3, 1)))
+    session.add(Prescription(patient_id=2, doctor_id=1, medication="Artemether", dosage="80mg",
+                             frequency="bd", duration="3 days", instructions="malaria"))
+    session.commit()
+
+    assert len(search_clinical(session, "malaria")) == 3
+    diagnosed = search_clinical(session, "malaria", field="diagnosis", date_from=datetime(2026, 7, 1))
+    assert [(hit["type"], hit["patient_id"]) for hit in diagnosed] == [("medical_record", 1)]
+    assert {hit["type"] for hit in search_clinical(session, "malaria", kinds=["prescription"])} == {"prescription"}
+    # Porter stemming: "fever" also finds "fevers"
+    assert {hit["patient_id"] for hit in search_clinical(session, "fever")} == {1, 2}
+    assert {hit["patient_id"] for hit in search_clinical(session, "fever", patient_id=2)} == {2}
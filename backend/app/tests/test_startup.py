@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Cold start of a worker: a new interpreter importing app.asgi and running
+# its lifespan startup, as measured by app.core.startup. This machine boots
+# in about 1.5s; the budget leaves room for slower CI runners.
+BOOT_BUDGET_SECONDS = 3.0
+
+BOOT = """
+import asyncio, gc, json, sys
+from app.asgi import app
+from app.core.startup import startup_profile
+from app.main import lifespan
+
+async def boot():
+    async with lifespan(app):
+        print(json.dumps({
+            "total": startup_profile.total,
+            "steps": [step for step, _ in startup_profile.steps],
+            "modules": sorted(sys.modules),
+            "gc_enabled": gc.isenabled(),
+            "frozen": gc.get_freeze_count(),
+        }))
+
+asyncio.run(boot())
+"""
+
+
+def _boot(tmp_path, script=BOOT):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'boot.db'}",
+        "JOBS_ENABLED": "false",
+        "PYTHONWARNINGS": "ignore",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=Path(__file__).parents[2], env=env,
+        capture_output=True, text=True, timeout=60, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cold_start_within_budget(tmp_path):
+    # Best of three, so one slow run on a busy machine doesn't fail it
+    boots = [_boot(tmp_path) for _ in range(3)]
+    assert min(boot["total"] for boot in boots) < BOOT_BUDGET_SECONDS
+
+    boot = boots[0]
+    assert "endpoint modules" in boot["steps"] and "lifespan: pub/sub" in boot["steps"]
+    # Schema work is a deployment step: no migrations ran, nothing connected
+    assert "lifespan: migrations" not in boot["steps"]
+    assert not (tmp_path / "boot.db").exists()
+    assert not any(m == "alembic" or m.startswith("sqlalchemy.dialects.postgresql") for m in boot["modules"])
+    assert boot["gc_enabled"] and boot["frozen"] > 0
+
+
+def test_importing_the_app_leaves_the_garbage_collector_alone(tmp_path):
+    state = _boot(tmp_path, (
+        "import gc, json\n"
+        "import app.main\n"
+        "print(json.dumps({'gc_enabled': gc.isenabled(), 'frozen': gc.get_freeze_count()}))"
+    ))
+    assert state == {"gc_enabled": True, "frozen": 0}
@@ -0,0 +1,57 @@
+import threading
+import time
+from sqlmodel import Session, SQLModel, create_engine
+from app.core.cache import TTLCache
+from app.core.stats_cache import stats_cache, stats_key
+from app.models.bed import Bed
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = TTLCache(ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"value": len(calls)}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced"] < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 8
+    assert cache.get_or_compute("k", compute) == {"value": 1}
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "coalesced": 7}
+
+
+def test_invalidation_during_computation_is_not_cached():
+    cache = TTLCache(ttl=60)
+
+    def compute():
+        cache.clear()  # a write committed while we were reading
+        return "stale"
+
+    assert cache.get_or_compute("k", compute) == "stale"
+    assert cache.get_or_compute("k", lambda: "fresh") == "fresh"
+    assert cache.get("k") == "fresh"
+
+
+def test_bed_write_invalidates_dashboard_stats(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    SQLModel.metadata.create_all(engine)
+    key = stats_key("admin", 0)
+    stats_cache.set(key, {"available_beds": 0})
+
+    with Session(engine) as session:
+        session.add(Bed(ward_name="A", bed_number="1"))
+        session.commit()
+
+    assert stats_cache.get(key) is None
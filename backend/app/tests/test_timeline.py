@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, create_engine
+from app.api.v1.endpoints import patients
+from app.core.principal import Principal
+from app.db.timeline import STREAMS, patient_timeline
+from app.models.appointment import Appointment
+from app.models.consultation import Consultation
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.lab_result import LabResult
+from app.models.medical_record import MedicalRecord
+from app.models.prescription import Prescription
+from app.models.user import Patient, User, UserRole
+from app.models.vitals import Vitals
+
+
+def _chart(session: Session, patient_id: int, start: datetime):
+    for i in range(3):
+        # Every kind shares these timestamps, so ordering relies on (kind, id)
+        at = start + timedelta(days=i)
+        session.add(Appointment(doctor_id=1, patient_id=patient_id, appointment_time=at))
+        session.add(Consultation(appointment_id=1, doctor_id=1, patient_id=patient_id, symptoms="s", diagnosis="d", created_at=at))
+        invoice = Invoice(invoice_number=f"INV-{patient_id}-{i}", patient_id=patient_id, amount=10, due_date=at, created_at=at)
+        invoice.items = [InvoiceItem(description="x", amount=10)]
+        session.add(invoice)
+        session.add(LabResult(patient_id=patient_id, test_name="FBC", result="ok", recorded_at=at))
+        session.add(MedicalRecord(patient_id=patient_id, doctor_id=1, diagnosis="d", symptoms="s", treatment="t", visit_date=at))
+        session.add(Prescription(patient_id=patient_id, doctor_id=1, medication="m", dosage="1", frequency="daily", duration="5d", created_at=at))
+        session.add(Vitals(patient_id=patient_id, heart_rate=70 + i, recorded_at=at))
+        session.add(Vitals(patient_id=patient_id, heart_rate=80 + i, recorded_at=at))
+
+
+def test_timeline_pages_through_every_event_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'timeline.db'}")
+    SQLModel.metadata.create_all(engine)
+    start = datetime(2026, 1, 1)
+    with Session(engine) as session:
+        _chart(session, 1, start)
+        _chart(session, 2, start)
+        session.commit()
+
+        statements = []
+
+        def count(*args):
+            statements.append(args[2])
+
+        event.listen(engine, "before_cursor_execute", count)
+        seen, after, pages = [], None, 0
+        while True:
+            events, after = patient_timeline(session, 1, limit=5, after=after)
+            seen.extend(events)
+            pages += 1
+            if after is None:
+                break
+        event.remove(engine, "before_cursor_execute", count)
+
+        assert len(seen) == 24 and pages == 5
+        keys = [(e["at"], e["kind"], e["id"]) for e in seen]
+        assert keys == sorted(set(keys), reverse=True)
+        assert {e["data"]["patient_id"] for e in seen} == {1}
+        assert seen[0]["kind"] == "vitals" and seen[0]["data"]["heart_rate"] == 82
+        assert [item["amount"] for item in next(e for e in seen if e["kind"] == "invoice")["data"]["items"]] == [10]
+        # One range read per table plus the eager loads, whatever the page size
+        assert len(statements) <= pages * (len(STREAMS) + 5)
+
+        events, _ = patient_timeline(session, 1, limit=50, kinds=["vitals", "lab_result"], date_from=start + timedelta(days=1))
+        assert [e["kind"] for e in events] == ["vitals", "vitals", "lab_result"] * 2
+
+        for stream in STREAMS.values():
+            table = stream.model.__tablename__
+            plan = " ".join(row[-1] for row in session.execute(text(
+                f"EXPLAIN QUERY PLAN SELECT id FROM {table} WHERE patient_id = 1 ORDER BY {stream.time_field.key} DESC, id DESC"
+            )))
+            assert f"ix_{table}_patient_id_{stream.time_field.key}" in plan, plan
+
+
+def test_timeline_shows_each_role_only_its_kinds(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'timeline.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        patient = Patient(user=User(email="p@test.com", full_name="Patient", role=UserRole.PATIENT, hashed_password="x"))
+        session.add(patient)
+        session.commit()
+        _chart(session, patient.id, datetime(2026, 1, 1))
+        session.commit()
+
+        def read(role, kind=None):
+            principal = Principal(user=User(id=99, email=f"{role.value}@test.com", full_name="Staff", role=role))
+            events = patients.timeline(patient.id, Response(), 50, None, kind, None, None, session, principal)
+            return {event["kind"] for event in events}
+
+        assert read(UserRole.DOCTOR) == set(STREAMS)
+        assert read(UserRole.PHARMACIST) == {"prescription"}
+        # Asking for more than the role may see narrows, rather than widens
+        assert read(UserRole.PHARMACIST, ["prescription", "medical_record"]) == {"prescription"}
+        assert read(UserRole.PHARMACIST, ["medical_record"]) == set()
+        for role in (UserRole.RECEPTIONIST, UserRole.ACCOUNTANT):
+            with pytest.raises(HTTPException) as refused:
+                read(role)
+            assert refused.value.status_code == 403
@@ -0,0 +1,100 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine, select
+from app.db.ledger import InsufficientFunds, credit, debit, ledger_balance, open_ledger, to_minor
+from app.db.retry import run_with_retry
+from app.models.wallet import Wallet, WalletEntry
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ledger.db'}", connect_args={"timeout": 10})
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_amounts_are_held_in_kobo():
+    assert to_minor(0.1 + 0.2) == 30
+    assert to_minor(1999.99) == 199999
+    assert to_minor("10.005") == 1001
+
+
+def test_debits_are_checked_and_recorded_in_the_ledger(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        assert credit(session, 1, 5000, "topup") == 5000
+        assert debit(session, 1, 3000, "payment") == 2000
+        with pytest.raises(InsufficientFunds):
+            debit(session, 1, 2001, "payment")
+        with pytest.raises(InsufficientFunds):
+            debit(session, 2, 1, "payment")  # no wallet
+        session.commit()
+
+        wallet = session.exec(select(Wallet).where(Wallet.patient_id == 1)).one()
+        assert (wallet.balance_minor, wallet.balance) == (2000, 20.0)
+        entries = session.exec(select(WalletEntry).order_by(WalletEntry.id)).all()
+        assert [(e.amount_minor, e.balance_after_minor) for e in entries] == [(5000, 5000), (-3000, 2000)]
+        assert ledger_balance(session, wallet.id) == wallet.balance_minor
+
+
+def test_concurrent_payments_cannot_overdraw(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        credit(session, 1, 10000, "topup")
+        session.commit()
+
+    def pay(_):
+        with Session(engine) as session:
+            try:
+                run_with_retry(session, lambda: debit(session, 1, 1500, "payment"), attempts=20, backoff_ms=1)
+                return True
+            except InsufficientFunds:
+                return False
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(pay, range(20)))
+
+    assert results.count(True) == 6
+    with Session(engine) as session:
+        wallet = session.exec(select(Wallet)).one()
+        assert wallet.balance_minor == 1000
+        assert ledger_balance(session, wallet.id) == 1000
+
+
+def test_existing_balances_get_an_opening_entry(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        session.add(Wallet(patient_id=1, balance_minor=2500, balance=25.0))
+        session.add(Wallet(patient_id=2))
+        session.commit()
+    with engine.begin() as connection:
+        open_ledger(connection)
+        open_ledger(connection)
+    with Session(engine) as session:
+        entries = session.exec(select(WalletEntry)).all()
+        assert [(e.patient_id, e.type, e.amount_minor) for e in entries] == [(1, "opening", 2500)]
+
+
+def test_busy_transactions_are_retried_a_bounded_number_of_times(tmp_path):
+    engine = _engine(tmp_path)
+    busy = OperationalError("UPDATE wallet", {}, sqlite3.OperationalError("database is locked"))
+    calls = []
+
+    def busy_twice():
+        calls.append(1)
+        if len(calls) < 3:
+            raise busy
+        return "done"
+
+    def always_busy():
+        calls.append(1)
+        raise busy
+
+    with Session(engine) as session:
+        assert run_with_retry(session, busy_twice, attempts=3, backoff_ms=0) == "done"
+        calls.clear()
+        with pytest.raises(OperationalError):
+            run_with_retry(session, always_busy, attempts=2, backoff_ms=0)
+        assert len(calls) == 2
@@ -0,0 +1,268 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import WebSocketDisconnect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from app.api import deps
+from app.api.v1.endpoints import chat
+from app.api.v1.endpoints import websockets as notifications
+from app.core.principal import principal_cache
+from app.core.pubsub import PubSub, SQLitePubSub
+from app.core.security import create_access_token
+from app.core.websockets import ConnectionManager, role_channel, user_channel
+from app.db.chat_store import ChatStore
+from app.models.appointment import Appointment
+from app.models.consultation import Consultation
+from app.models.user import Doctor, Patient, User, UserRole
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+def test_slow_or_broken_client_does_not_delay_the_room():
+    async def scenario():
+        manager = ConnectionManager(queue_size=10, send_timeout=5)
+        fast, slow, broken = FakeSocket(), FakeSocket(delay=1), FakeSocket(fail=True)
+        for socket in (fast, slow, broken):
+            await manager.connect(socket, "ward")
+
+        await manager.broadcast("hello", "ward")
+        await _settle()
+
+        assert fast.sent == ["hello"]
+        assert slow.sent == []
+        assert broken not in manager.active_connections["ward"]
+        metrics = manager.metrics_snapshot()["ward"]
+        assert metrics["connections"] == 2
+        assert metrics["sent"] == 1
+        assert metrics["send_errors"] == 1
+        assert metrics["latency_ms"]["p50"] is not None
+        for socket in (fast, slow):
+            manager.disconnect(socket, "ward")
+        assert manager.active_connections == {}
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_policies():
+    async def scenario(policy):
+        manager = ConnectionManager(queue_size=2, send_timeout=5, slow_consumer_policy=policy)
+        stuck = FakeSocket(delay=10)
+        await manager.connect(stuck, "ward")
+        await asyncio.sleep(0)
+        for index in range(5):
+            await manager.broadcast(f"m{index}", "ward")
+        await _settle()
+        return manager, stuck
+
+    manager, stuck = asyncio.run(scenario("coalesce"))
+    connection = manager.active_connections["ward"][stuck]
+    # Only the newest two survived; the writer is stuck sending m3
+    assert [item[0] for item in connection.queue._queue] == ["m4"]
+    assert manager.metrics["ward"].dropped == 3
+
+    manager, stuck = asyncio.run(scenario("disconnect"))
+    assert manager.active_connections == {}
+    assert stuck.closed_with == 1013
+
+
+def test_sqlite_pubsub_shares_rooms_between_workers(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "pubsub.db")
+        workers = [
+            ConnectionManager(pubsub=SQLitePubSub(path, poll_interval=0.01)),
+            ConnectionManager(pubsub=SQLitePubSub(path, poll_interval=0.01)),
+        ]
+        sockets = [FakeSocket(), FakeSocket()]
+        for worker, socket in zip(workers, sockets):
+            await worker.connect(socket, "ward")
+
+        await workers[0].broadcast("bed 4 free", "ward")
+        await workers[1].global_broadcast("fire drill")
+        for _ in range(50):
+            if all(len(socket.sent) == 2 for socket in sockets):
+                break
+            await asyncio.sleep(0.02)
+
+        for worker in workers:
+            await worker.stop()
+        return sockets
+
+    for socket in asyncio.run(scenario()):
+        assert socket.sent == ["bed 4 free", "fire drill"]
+
+
+def test_events_reach_only_their_recipients():
+    async def scenario():
+        manager = ConnectionManager()
+        doctor, pharmacist, other = FakeSocket(), FakeSocket(), FakeSocket()
+        await manager.connect(doctor, user_channel(1), role_channel(UserRole.DOCTOR))
+        await manager.connect(pharmacist, user_channel(2), role_channel(UserRole.PHARMACIST))
+        await manager.connect(other, user_channel(3), role_channel(UserRole.DOCTOR))
+
+        await manager.notify_user(1, "referral.created", {"referral_id": 9})
+        await manager.notify_role(UserRole.PHARMACIST, "prescription.created", {"prescription_id": 4})
+        await manager.global_broadcast("maintenance")
+        await _settle()
+
+        manager.disconnect(doctor, user_channel(1))
+        assert user_channel(1) not in manager.active_connections
+        assert list(manager.active_connections[role_channel(UserRole.DOCTOR)]) == [other]
+        return doctor, pharmacist, other
+
+    doctor, pharmacist, other = asyncio.run(scenario())
+    assert [json.loads(m)["type"] for m in doctor.sent[:1]] == ["referral.created"]
+    assert json.loads(doctor.sent[0])["data"] == {"referral_id": 9}
+    assert json.loads(pharmacist.sent[0])["type"] == "prescription.created"
+    # Global broadcasts arrive once per socket, not once per subscribed room
+    assert doctor.sent[1:] == pharmacist.sent[1:] == other.sent == ["maintenance"]
+
+
+def test_idle_connections_are_reaped_and_caps_enforced():
+    async def scenario():
+        manager = ConnectionManager(heartbeat_interval=None, idle_timeout=30, max_connections=3, max_connections_per_user=2)
+        first, second, third = FakeSocket(), FakeSocket(), FakeSocket()
+        for socket in (first, second, third):
+            assert await manager.connect(socket, user_channel(1), user_id=1)
+        await _settle()
+        # Per-user cap: the oldest connection makes room for the new one
+        assert first.closed_with == 1001
+        assert not manager._closing
+        assert list(manager.user_connections[1]) == [second, third]
+
+        other, rejected = FakeSocket(), FakeSocket()
+        assert await manager.connect(other, "ward")
+        assert not await manager.connect(rejected, "ward")
+        assert rejected.closed_with == 1013
+
+        # `second` has gone silent, `third` answered the last ping
+        manager.connections[second].last_seen -= 60
+        assert manager.touch(third, '{"type": "pong"}')
+        assert not manager.touch(other, '{"senderName": "Dr A", "text": "hi"}')
+        assert manager.reap_and_ping() == 1
+        await _settle()
+
+        stats = manager.connection_stats()
+        assert second.closed_with == 1001
+        assert stats["connections"] == 2
+        assert stats["rooms"] == {user_channel(1): 1, "ward": 1}
+        assert (stats["reaped"], stats["rejected"], stats["evicted"]) == (1, 1, 1)
+        return third
+
+    third = asyncio.run(scenario())
+    assert third.sent == ['{"type": "ping"}']
+
+
+def test_socket_is_unregistered_when_the_handler_fails(monkeypatch):
+    class BrokenSocket(FakeSocket):
+        async def receive_text(self):
+            raise RuntimeError("connection reset")
+
+    principal = SimpleNamespace(id=1, role=UserRole.DOCTOR)
+    monkeypatch.setattr(deps, "get_websocket_principal", lambda token: principal)
+    monkeypatch.setattr(notifications, "manager", ConnectionManager(heartbeat_interval=None))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(notifications.websocket_endpoint(BrokenSocket(), token="t"))
+    assert notifications.manager.connection_stats()["connections"] == 0
+
+
+def test_connection_limits_must_admit_someone():
+    with pytest.raises(ValueError):
+        ConnectionManager(max_connections_per_user=0)
+    with pytest.raises(ValueError):
+        ConnectionManager(max_connections=0)
+
+
+def test_backend_missing_publish_fails_when_created():
+    class Incomplete(PubSub):
+        async def start(self, handler):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_consultation_chat_admits_only_its_participants(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(deps, "engine", engine)
+    monkeypatch.setattr(chat, "manager", ConnectionManager())
+    principal_cache.clear()
+    with Session(engine) as session:
+        doctor = Doctor(user=User(email="d@test.com", full_name="Doctor", role=UserRole.DOCTOR, hashed_password="x"), specialization="GP")
+        patient = Patient(user=User(email="p@test.com", full_name="Patient", role=UserRole.PATIENT, hashed_password="x"))
+        other = Patient(user=User(email="o@test.com", full_name="Other", role=UserRole.PATIENT, hashed_password="x"))
+        pharmacist = User(email="ph@test.com", full_name="Pharmacist", role=UserRole.PHARMACIST, hashed_password="x")
+        appointment = Appointment(doctor=doctor, patient=patient, appointment_time=datetime(2026, 1, 1, 9))
+        consultation = Consultation(appointment=appointment, doctor=doctor, patient=patient, symptoms="s", diagnosis="d")
+        session.add_all([consultation, other, pharmacist])
+        session.commit()
+        tokens = {name: create_access_token(p.user_id) for name, p in (("doctor", doctor), ("patient", patient), ("other", other))}
+        tokens["pharmacist"] = create_access_token(pharmacist.id)
+        patient_user_id = patient.user_id
+        consultation_id = consultation.id
+
+    class ChatSocket(FakeSocket):
+        def __init__(self, *frames):
+            super().__init__()
+            self.frames = list(frames)
+
+        async def receive_text(self):
+            if not self.frames:
+                raise WebSocketDisconnect()
+            return self.frames.pop(0)
+
+    async def join(token, consultation_id=consultation_id, *frames):
+        socket = ChatSocket(*frames)
+        await chat.websocket_endpoint(socket, consultation_id, last_seq=0, token=token)
+        return socket.closed_with
+
+    async def scenario():
+        store = ChatStore(engine=create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}"), worker_id=1, flush_interval=60)
+        monkeypatch.setattr(chat, "chat_store", store)
+        # Refused before the room, the replay or the store are touched
+        assert await join(None) == 1008
+        assert await join("not-a-token") == 1008
+        assert await join(tokens["other"]) == 1008
+        assert await join(tokens["pharmacist"]) == 1008
+        assert await join(tokens["patient"], consultation_id + 1) == 1008
+
+        # The sender is the authenticated user, whatever the frame claims
+        assert await join(tokens["patient"], consultation_id, '{"senderName": "Doctor", "text": "hello"}') is None
+        (message,) = await store.history(consultation_id)
+        assert (message["sender_user_id"], message["sender_name"], message["body"]) == (patient_user_id, "Patient", "hello")
+        await store.stop()
+        await store.engine.dispose()
+
+    asyncio.run(scenario())
+    assert chat.manager.connection_stats()["connections"] == 0
+    assert chat._chat_principal(tokens["patient"], consultation_id).patient_id == patient.id
+    assert chat._chat_principal(tokens["doctor"], consultation_id).doctor_id == doctor.id
+    principal_cache.clear()
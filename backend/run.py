@@ -1,4 +1,17 @@
+import sys
+
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # The server doesn't migrate the schema itself (see app/db/migrate.py);
+    # stop here rather than fail on the first query against an old schema
+    from app.core.config import settings
+    from app.db.migrate import check_schema
+    from app.db.session import engine
+
+    if not settings.DB_MIGRATE_ON_STARTUP:
+        try:
+            check_schema(engine)
+        except RuntimeError as error:
+            sys.exit(str(error))
+    uvicorn.run("app.asgi:app", host="0.0.0.0", port=8000, reload=True)
@@ -22,8 +22,10 @@ export default function LiveChat({ consultationId, userName }: LiveChatProps) {
     const messagesEndRef = useRef<HTMLDivElement>(null);
 
     useEffect(() => {
-        // Connect to WebSocket
-        const wsUrl = `ws://localhost:8000/api/v1/ws/consultations/${consultationId}`;
+        // Connect to WebSocket; the chat room only admits the consultation's
+        // patient, doctor and clinical staff, identified by the access token
+        const token = localStorage.getItem('token') ?? '';
+        const wsUrl = `ws://localhost:8000/api/v1/ws/consultations/${consultationId}?token=${encodeURIComponent(token)}`;
         const ws = new WebSocket(wsUrl);
         socketRef.current = ws;
 
@@ -53,6 +55,12 @@ export default function LiveChat({ consultationId, userName }: LiveChatProps) {
                     msgData = { senderName: "Unknown", text: text };
                 }
 
+                // Answer server heartbeats so the connection isn't reaped as idle
+                if (msgData.type === "ping") {
+                    ws.send(JSON.stringify({ type: "pong" }));
+                    return;
+                }
+
                 if (msgData.senderName !== userName) {
                     const newMsg: Message = {
                         sender: "other",
@@ -83,10 +91,9 @@ export default function LiveChat({ consultationId, userName }: LiveChatProps) {
     const handleSendMessage = () => {
         if (!inputValue.trim() || !socketRef.current || socketRef.current.readyState !== WebSocket.OPEN) return;
 
-        const msgPayload = JSON.stringify({
-            senderName: userName, // Using name as ID for simplicity in this demo
-            text: inputValue
-        });
+        // The server stamps the sender from the token; it relays our own
+        // messages under our full name, which is how onmessage skips them
+        const msgPayload = JSON.stringify({ text: inputValue });
 
         socketRef.current.send(msgPayload);
 
@@ -24,6 +24,24 @@ api.interceptors.request.use(
     }
 );
 
+// Retries of payments and bookings should reuse the key of the first attempt,
+// so the server replays its response instead of charging/booking twice
+const idempotent = (key?: string): AxiosRequestConfig =>
+    key ? { headers: { 'Idempotency-Key': key } } : {};
+
+// List endpoints return one page at a time; callers that want the whole list
+// follow the X-Next-Cursor header until the server stops sending it
+const getAllPages = async (url: string, params: Record<string, any> = {}) => {
+    const rows: any[] = [];
+    let cursor: string | undefined;
+    do {
+        const response = await api.get(url, { params: { ...params, cursor } });
+        rows.push(...response.data);
+        cursor = response.headers['x-next-cursor'] as string | undefined;
+    } while (cursor);
+    return rows;
+};
+
 export const auth = {
     login: async (email: string, password: string) => {
         const params = new URLSearchParams();
@@ -48,11 +66,10 @@ export const auth = {
 
 export const appointments = {
     getAll: async () => {
-        const response = await api.get('/appointments/my-appointments');
-        return response.data;
+        return getAllPages('/appointments/my-appointments');
     },
-    create: async (data: any) => {
-        const response = await api.post('/appointments/', data);
+    create: async (data: any, idempotencyKey?: string) => {
+        const response = await api.post('/appointments/', data, idempotent(idempotencyKey));
         return response.data;
     },
     update: async (id: number, data: any) => {
@@ -65,6 +82,21 @@ export const appointments = {
     },
 };
 
+export const doctors = {
+    getSlots: async (doctorId: number, from: string, to?: string) => {
+        const response = await api.get(`/doctors/${doctorId}/slots`, { params: { from, to } });
+        return response.data;
+    },
+    getSchedule: async (doctorId: number) => {
+        const response = await api.get(`/doctors/${doctorId}/schedule`);
+        return response.data;
+    },
+    setSchedule: async (doctorId: number, data: any[]) => {
+        const response = await api.put(`/doctors/${doctorId}/schedule`, data);
+        return response.data;
+    },
+};
+
 export const attendance = {
     checkIn: async () => {
         const response = await api.post('/attendance/check-in');
@@ -75,8 +107,7 @@ export const attendance = {
         return response.data;
     },
     getHistory: async () => {
-        const response = await api.get('/attendance/my-history');
-        return response.data;
+        return getAllPages('/attendance/my-history');
     }
 }
 
@@ -89,19 +120,22 @@ export const dashboard = {
 
 export const patients = {
     getAll: async () => {
-        const response = await api.get('/dashboard/patients');
-        return response.data;
+        return getAllPages('/dashboard/patients');
     },
     getMyPatients: async () => {
         const response = await api.get('/users/patients/my');
         return response.data;
+    },
+    // One page of the patient's chart, newest first; pass back nextCursor for more
+    getTimeline: async (patientId: number, cursor?: string, limit?: number) => {
+        const response = await api.get(`/patients/${patientId}/timeline`, { params: { cursor, limit } });
+        return { events: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
     }
 }
 
 export const prescriptions = {
     getAll: async () => {
-        const response = await api.get('/prescriptions/');
-        return response.data;
+        return getAllPages('/prescriptions/');
     },
     getById: async (id: number) => {
         const response = await api.get(`/prescriptions/${id}`);
@@ -115,8 +149,7 @@ export const prescriptions = {
 
 export const medicalRecords = {
     getAll: async () => {
-        const response = await api.get('/medical-records/');
-        return response.data;
+        return getAllPages('/medical-records/');
     },
     getById: async (id: number) => {
         const response = await api.get(`/medical-records/${id}`);
@@ -130,8 +163,7 @@ export const medicalRecords = {
 
 export const vitals = {
     getAll: async () => {
-        const response = await api.get('/vitals/');
-        return response.data;
+        return getAllPages('/vitals/');
     },
     create: async (data: any) => {
         const response = await api.post('/vitals/', data);
@@ -141,8 +173,7 @@ export const vitals = {
 
 export const labs = {
     getAll: async () => {
-        const response = await api.get('/labs/');
-        return response.data;
+        return getAllPages('/labs/');
     },
     create: async (data: any) => {
         const response = await api.post('/labs/', data);
@@ -166,14 +197,22 @@ export const consultations = {
     getMyHistory: async () => {
         const response = await api.get('/consultations/history/my');
         return response.data;
+    },
+    // Consultation with its appointment, doctor, patient, prescriptions and lab results
+    getBundle: async (id: number) => {
+        const response = await api.get(`/consultations/${id}/bundle`);
+        return response.data;
+    },
+    getMyHistoryBundles: async (cursor?: string) => {
+        const response = await api.get('/consultations/history/my/bundle', { params: { cursor } });
+        return { bundles: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined };
     }
 }
 
 
 export const billing = {
     getInvoices: async () => {
-        const response = await api.get('/billing/invoices');
-        return response.data;
+        return getAllPages('/billing/invoices');
     },
     getMyInvoices: async () => {
         const response = await api.get('/billing/invoices/my');
@@ -183,16 +222,16 @@ export const billing = {
         const response = await api.post('/billing/invoices', data);
         return response.data;
     },
-    payInvoice: async (id: number, paymentMethod: string) => {
-        const response = await api.put(`/billing/invoices/${id}/pay?payment_method=${paymentMethod}`);
+    payInvoice: async (id: number, paymentMethod: string, idempotencyKey?: string) => {
+        const response = await api.put(`/billing/invoices/${id}/pay?payment_method=${paymentMethod}`, undefined, idempotent(idempotencyKey));
         return response.data;
     },
     getWallet: async () => {
         const response = await api.get('/billing/wallet');
         return response.data;
     },
-    topupWallet: async (data: any) => {
-        const response = await api.post('/billing/wallet/topup', data);
+    topupWallet: async (data: any, idempotencyKey?: string) => {
+        const response = await api.post('/billing/wallet/topup', data, idempotent(idempotencyKey));
         return response.data;
     },
     getTransactions: async () => {
@@ -210,13 +249,25 @@ export const pharmacy = {
 
 export const subscribeToNotifications = (onMessage: (msg: string) => void) => {
     if (typeof window === 'undefined') return null;
-    const socket = new WebSocket('ws://localhost:8000/api/v1/ws');
+    // The notification socket is per user; it authenticates with the access token
+    const token = localStorage.getItem('token');
+    if (!token) return null;
+    const socket = new WebSocket(`ws://localhost:8000/api/v1/ws?token=${encodeURIComponent(token)}`);
 
     socket.onopen = () => {
         console.log('Connected to notification service');
     };
 
     socket.onmessage = (event) => {
+        // Answer server heartbeats so the connection isn't reaped as idle
+        try {
+            if (JSON.parse(event.data).type === 'ping') {
+                socket.send(JSON.stringify({ type: 'pong' }));
+                return;
+            }
+        } catch {
+            // Not JSON, pass it through
+        }
         onMessage(event.data);
     };
 